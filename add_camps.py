@@ -5,9 +5,15 @@ Script pour ajouter facilement des camps de réfugiés
 """
 
 import argparse
+import csv
+import json
+import os
 import sys
 from src.camp_manager import CampManager
+from src.camp_service import RemoteCampManager
 from src.config import *
+from src.journal import atomic_write, journal_path_for
+from src.metrics import metrics
 
 def add_single_camp(manager: CampManager, args):
     """Ajouter un seul camp"""
@@ -24,20 +30,63 @@ def add_single_camp(manager: CampManager, args):
     
     if success:
         # Sauvegarder automatiquement
-        manager.save_to_json()
+        manager.save()
         print("💾 Données sauvegardées automatiquement")
         return True
     return False
 
-def add_from_csv(manager: CampManager, csv_file: str):
+def add_from_csv(manager: CampManager, csv_file: str, report_file: str = None):
     """Ajouter des camps depuis un fichier CSV"""
     print(f"📂 Chargement des camps depuis {csv_file}...")
     
-    if manager.load_from_csv(csv_file):
-        # Sauvegarder automatiquement
-        manager.save_to_json()
+    report = manager.import_csv(csv_file, report_file=report_file)
+    if report is None:
+        return False
+    
+    if report.imported:
+        # Sauvegarder automatiquement, une seule fois pour tout le fichier
+        manager.save()
+        print("💾 Données sauvegardées automatiquement")
+    return True
+
+def update_from_csv(manager: CampManager, csv_file: str, report_file: str = None):
+    """Modifier des camps existants depuis un CSV (colonne name et colonnes des champs à modifier)
+    
+    Une cellule vide laisse le champ inchangé. Tout le fichier est appliqué en un
+    seul lot : une ligne invalide le fait refuser entièrement (détail dans report_file).
+    """
+    print(f"📂 Mise à jour des camps depuis {csv_file}...")
+    try:
+        with open(csv_file, newline='', encoding='utf-8-sig') as file:
+            reader = csv.DictReader(file)
+            if "name" not in (reader.fieldnames or []):
+                print(MESSAGES["error"]["missing_field"].format(field="name"))
+                return False
+            updates = []
+            for row in reader:
+                changes = {field: value.strip() for field, value in row.items()
+                           if field and field != "name" and value and value.strip()}
+                for field in ("latitude", "longitude"):
+                    if field in changes:
+                        try:
+                            changes[field] = float(changes[field])
+                        except ValueError:
+                            pass  # Refusé par la validation du lot
+                updates.append((row["name"], changes))
+    except FileNotFoundError:
+        print(MESSAGES["error"]["file_not_found"].format(file=csv_file))
+        return False
+    
+    errors = []
+    if manager.update_camps(updates, errors=errors):
         print("💾 Données sauvegardées automatiquement")
         return True
+    if report_file:
+        # Numéro de ligne du fichier (en-tête en ligne 1) pour chaque erreur
+        rejected = [{**error, "line": error["index"] + 2} for error in errors]
+        atomic_write(report_file, lambda file: json.dump({"source": csv_file, "errors": rejected}, file,
+                                                         indent=2, ensure_ascii=False))
+        print(f"📝 Rapport des erreurs : {report_file}")
     return False
 
 def interactive_mode(manager: CampManager):
@@ -92,7 +141,7 @@ def interactive_mode(manager: CampManager):
         if confirm in ['o', 'oui', 'y', 'yes']:
             success = manager.add_camp(name, lat, lon, pop, radar, icon)
             if success:
-                manager.save_to_json()
+                manager.save()
                 print("💾 Camp ajouté et sauvegardé !")
                 return True
         else:
@@ -108,15 +157,45 @@ def interactive_mode(manager: CampManager):
 
 def list_camps_command(manager: CampManager):
     """Afficher la liste des camps"""
-    manager.load_from_json()
+    manager.load()
     manager.list_camps()
 
-def remove_camp_command(manager: CampManager, camp_name: str):
-    """Supprimer un camp"""
-    manager.load_from_json()
-    if manager.remove_camp(camp_name):
-        manager.save_to_json()
-        print("💾 Données sauvegardées")
+def remove_camp_command(manager: CampManager, camp_names: list):
+    """Supprimer un ou plusieurs camps (en un seul lot : tous ou aucun)"""
+    manager.load()
+    if len(camp_names) == 1:
+        if not manager.remove_camp(camp_names[0]):
+            return False
+        manager.save()
+    elif not manager.remove_camps(camp_names):
+        return False
+    print("💾 Données sauvegardées")
+    return True
+
+def migrate_command(manager: CampManager, target: str):
+    """Convertir le fichier de données vers la base SQLite, le format binaire ou JSON"""
+    if isinstance(manager, RemoteCampManager):
+        print("❌ Le service des camps utilise le fichier de données : l'arrêter avant la conversion")
+        return False
+    
+    source = get_camps_data_file()
+    destination = {"sqlite": CAMPS_SQLITE_FILE, "binary": CAMPS_SNAPSHOT_FILE, "json": CAMPS_JSON_FILE}[target]
+    if source == destination:
+        print(f"ℹ️ Les données sont déjà au format {target} : {destination}")
+        return True
+    
+    if not manager.load(source) or not manager.save(destination):
+        return False
+    manager.close()
+    
+    # Les fichiers prioritaires sur la destination seraient chargés à sa place : les retirer
+    # avec leur journal (ou les fichiers WAL de la base)
+    for data_file in CAMPS_DATA_FILES[:CAMPS_DATA_FILES.index(destination)]:
+        for filename in (data_file, journal_path_for(data_file), f"{data_file}-wal", f"{data_file}-shm"):
+            if os.path.exists(filename):
+                os.remove(filename)
+    print(f"🔄 Données converties : {source} -> {destination}")
+    return True
 
 def create_template_command(manager: CampManager):
     """Créer un template CSV"""
@@ -134,8 +213,8 @@ Exemples d'utilisation:
   # Ajouter un camp simple
   python add_camps.py --name "Nouveau_Camp" --lat 12.345 --lon 67.890 --pop "15000"
   
-  # Ajouter depuis un fichier CSV
-  python add_camps.py --from-csv data/camps_template.csv
+  # Ajouter depuis un fichier CSV (avec rapport des lignes rejetées)
+  python add_camps.py --from-csv data/camps_template.csv --report data/rejets.json
   
   # Mode interactif
   python add_camps.py --interactive
@@ -146,8 +225,21 @@ Exemples d'utilisation:
   # Lister tous les camps
   python add_camps.py --list
   
-  # Supprimer un camp
-  python add_camps.py --remove "Nom_Du_Camp"
+  # Supprimer un ou plusieurs camps
+  python add_camps.py --remove "Nom_Du_Camp" "Autre_Camp"
+  
+  # Mettre à jour des camps existants depuis un CSV (name + colonnes à modifier),
+  # en un seul lot : tout ou rien, une seule sauvegarde
+  python add_camps.py --update-csv populations.csv --report data/erreurs.json
+  
+  # Passer au format binaire (chargement rapide) ou revenir au JSON
+  python add_camps.py --migrate binary
+  
+  # Passer à la base SQLite (plusieurs scripts peuvent écrire en même temps)
+  python add_camps.py --migrate sqlite
+  
+  # Import massif sans message par camp, avec les mesures de chaque phase
+  python add_camps.py --from-csv camps.csv --quiet --metrics data/import_metrics.json
         """
     )
     
@@ -162,15 +254,27 @@ Exemples d'utilisation:
     
     # Autres options
     parser.add_argument('--from-csv', help='Charger des camps depuis un fichier CSV')
+    parser.add_argument('--update-csv', metavar='FICHIER', help='Modifier des camps existants depuis un fichier CSV')
+    parser.add_argument('--report', help='Fichier JSON où écrire les lignes rejetées par --from-csv ou --update-csv')
     parser.add_argument('--interactive', action='store_true', help='Mode interactif')
     parser.add_argument('--create-template', action='store_true', help='Créer un template CSV')
     parser.add_argument('--list', action='store_true', help='Lister tous les camps')
-    parser.add_argument('--remove', help='Supprimer un camp par son nom')
+    parser.add_argument('--remove', nargs='+', metavar='NOM', help='Supprimer un ou plusieurs camps par leur nom')
+    parser.add_argument('--migrate', choices=['sqlite', 'binary', 'json'], help='Convertir le fichier de données')
+    
+    # Mesures
+    parser.add_argument('--quiet', action='store_true', help='Ne pas afficher un message par camp')
+    parser.add_argument('--metrics', metavar='FICHIER', help='Écrire les mesures des phases en JSON')
+    parser.add_argument('--profile', metavar='FICHIER',
+                        help='Écrire le profil cProfile de la phase la plus lente (implique la mesure des phases)')
     
     args = parser.parse_args()
+    if args.metrics or args.profile:
+        metrics.enable(profile=bool(args.profile))
     
-    # Créer le gestionnaire
-    manager = CampManager()
+    # Créer le gestionnaire : celui du service des camps s'il est démarré (camp_daemon.py),
+    # sinon un gestionnaire local qui charge et sauvegarde le fichier de données
+    manager = RemoteCampManager.connect(args.quiet) or CampManager(quiet=args.quiet)
     
     try:
         # Traitement des commandes
@@ -181,20 +285,26 @@ Exemples d'utilisation:
             list_camps_command(manager)
             return 0
         
+        elif args.migrate:
+            return 0 if migrate_command(manager, args.migrate) else 1
+        
         elif args.remove:
-            remove_camp_command(manager, args.remove)
-            return 0
+            return 0 if remove_camp_command(manager, args.remove) else 1
         
         elif args.interactive:
-            manager.load_from_json()
+            manager.load()
             return 0 if interactive_mode(manager) else 1
         
         elif args.from_csv:
-            manager.load_from_json()
-            return 0 if add_from_csv(manager, args.from_csv) else 1
+            manager.load()
+            return 0 if add_from_csv(manager, args.from_csv, args.report) else 1
+        
+        elif args.update_csv:
+            manager.load()
+            return 0 if update_from_csv(manager, args.update_csv, args.report) else 1
         
         elif args.name and args.lat is not None and args.lon is not None:
-            manager.load_from_json()
+            manager.load()
             return 0 if add_single_camp(manager, args) else 1
         
         else:
@@ -209,6 +319,9 @@ Exemples d'utilisation:
     except Exception as e:
         print(f"❌ Erreur: {e}")
         return 1
+    finally:
+        if metrics.enabled:
+            metrics.finish("add_camps.py", args.metrics, args.profile)
 
 if __name__ == "__main__":
     sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# analyze_camps.py
+"""
+Script pour calculer les statistiques de changement des camps et produire leurs images de résultats
+"""
+
+import argparse
+import sys
+from src.analytics import analyze_camps
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(
+        description='Calculer les statistiques mensuelles de changement des camps (.tif radar)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Analyser tous les camps ayant un .tif (seuls les nouveaux mois sont lus)
+  python analyze_camps.py
+  
+  # Analyser un camp, en recalculant tous les mois
+  python analyze_camps.py --camp Mbera --force
+        """
+    )
+    
+    parser.add_argument('--camp', action='append', help='Nom du camp à analyser (répétable)')
+    parser.add_argument('--workers', type=int, help='Nombre de processus (0 : un par cœur)')
+    parser.add_argument('--force', action='store_true', help='Recalculer tous les mois et les images')
+    
+    args = parser.parse_args()
+    
+    try:
+        print("📊 Statistiques de changement des camps")
+        print("=" * 50)
+        analyze_camps(args.camp, args.workers, args.force)
+        return 0
+    except KeyboardInterrupt:
+        print("\n⚠️ Opération annulée par l'utilisateur")
+        return 1
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# benchmark.py
+"""
+Script pour mesurer les performances sur des camps synthétiques et détecter les régressions
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+from benchmarks.stress import STRESS_FORMATS, run_stress
+from benchmarks.suite import BENCHMARK_CASES, compare_results, load_results, run_benchmarks, save_results
+from src.config import *
+
+def parse_sizes(text: str) -> list:
+    """Tailles séparées par des virgules ("1000,10000", "1k,1M")"""
+    sizes = []
+    for part in text.split(","):
+        part = part.strip().lower()
+        factor = {"k": 1000, "m": 1000000}.get(part[-1:], 1)
+        sizes.append(int(float(part.rstrip("km")) * factor))
+    return sizes
+
+def parse_threshold(text: str) -> tuple:
+    """Seuil de régression "mesure=fraction" (ex. seconds=0.3)"""
+    metric, _, value = text.partition("=")
+    if metric not in BENCHMARK_CONFIG["thresholds"]:
+        raise argparse.ArgumentTypeError(
+            f"mesure inconnue '{metric}' (choix : {', '.join(BENCHMARK_CONFIG['thresholds'])})")
+    return metric, float(value)
+
+def format_value(metric: str, value: float) -> str:
+    """Valeur lisible d'une mesure"""
+    if metric.endswith("seconds"):
+        return f"{value * 1000:.1f} ms" if value < 1 else f"{value:.2f} s"
+    if metric == "speedup":
+        return f"×{value:.2f}"
+    if metric.endswith("bytes_per_camp"):
+        return f"{value:.0f} o/camp"
+    if not metric.endswith("bytes"):
+        return str(value)
+    return f"{value / (1024 * 1024):.1f} Mo" if value >= 1024 * 1024 else f"{value / 1024:.1f} Ko"
+
+def print_measurement(case: str, size: int, measurement: dict) -> None:
+    details = ", ".join(f"{metric} {format_value(metric, value)}" for metric, value in measurement.items())
+    print(f"⏱️ {case} ({size} camps) : {details}")
+
+def stress_command(args) -> int:
+    """Lancer des processus écrivains en parallèle et vérifier qu'aucune modification n'est perdue"""
+    print(f"🔀 Test de charge : {args.stress} écrivains en parallèle ({args.stress_format})")
+    print("=" * 50)
+    result = run_stress(args.stress, args.stress_operations, args.stress_format)
+    print(f"⏱️ {result['writers']} × {result['operations']} opérations en {result['seconds']:.2f} s "
+          f"({result['transactions_per_second']:.0f} transactions/s)")
+    print(f"🏕️ Camps : {result['camps']}/{result['expected_camps']} "
+          f"(manquants {result['missing_camps']}, en trop {result['unexpected_camps']}, "
+          f"mal placés {result['misplaced_camps']}, dans l'index spatial {result['indexed_camps']})")
+    print(f"🔢 Compteur partagé : {result['counter']}/{result['expected_counter']} "
+          f"({result['lost_updates']} mises à jour perdues)")
+    if result["failed_operations"]:
+        print(f"⚠️ {result['failed_operations']} opérations refusées")
+
+    if args.output:
+        save_results(args.output, result)
+        print(f"💾 Résultats enregistrés : {args.output}")
+    if not result["ok"]:
+        print("❌ Des modifications ont été perdues")
+        return 1
+    print("✅ Aucune modification perdue")
+    return 0
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(
+        description='Mesurer les performances sur des camps synthétiques et les comparer à la référence',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Mesurer toutes les opérations (tailles de BENCHMARK_CONFIG) et comparer à la référence
+  python benchmark.py
+
+  # Enregistrer les mesures comme nouvelle référence
+  python benchmark.py --save-baseline
+
+  # Mesurer le chargement sur 1 million de camps, avec un seuil de temps de 50 %
+  python benchmark.py --sizes 1M --case load_from_json --case load_from_csv --threshold seconds=0.5
+
+  # Vérifier que la page de 1 million de camps est écrite sans la garder en mémoire
+  python benchmark.py --sizes 1M --case generate_map_rss --repeat 1
+
+  # Accélération de la génération avec BENCHMARK_CONFIG["map_workers"] processus (fichiers comparés à la série)
+  python benchmark.py --sizes 100k --case generate_map_workers
+
+  # Test de charge : 8 processus écrivent en même temps dans une base SQLite
+  python benchmark.py --stress 8
+        """
+    )
+
+    parser.add_argument('--sizes', type=parse_sizes, help='Nombres de camps, séparés par des virgules (ex. 1k,10k)')
+    parser.add_argument('--case', action='append', choices=list(BENCHMARK_CASES),
+                        help='Opération à mesurer (répétable, toutes par défaut)')
+    parser.add_argument('--repeat', type=int, help='Exécutions par mesure (la plus rapide est gardée)')
+    parser.add_argument('--seed', type=int, help='Graine du générateur de camps')
+    parser.add_argument('--output', help='Fichier de résultats JSON (défaut : benchmarks/results/)')
+    parser.add_argument('--baseline', default=BENCHMARK_BASELINE, help='Fichier de référence')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Enregistrer les mesures dans la référence au lieu de comparer')
+    parser.add_argument('--threshold', type=parse_threshold, action='append', default=[],
+                        help='Seuil de régression mesure=fraction (seconds, peak_bytes, output_bytes, peak_rss_bytes)')
+    parser.add_argument('--stress', type=int, nargs='?', const=BENCHMARK_CONFIG["stress_writers"], metavar='ÉCRIVAINS',
+                        help='Test de charge : processus écrivant en même temps, aucune modification ne doit être perdue')
+    parser.add_argument('--stress-operations', type=int, help='Opérations par écrivain du test de charge')
+    parser.add_argument('--stress-format', choices=list(STRESS_FORMATS), default='sqlite',
+                        help='Fichier de données du test de charge (json : montre les modifications perdues)')
+
+    args = parser.parse_args()
+    if args.repeat is not None and args.repeat < 1:
+        parser.error("--repeat doit être au moins 1")
+    if args.stress is not None and args.stress < 1:
+        parser.error("--stress doit être au moins 1")
+
+    try:
+        if args.stress:
+            return stress_command(args)
+
+        print("⏱️ Benchmarks des camps synthétiques")
+        print("=" * 50)
+        results = run_benchmarks(args.sizes, args.case, args.repeat, args.seed, progress=print_measurement)
+
+        output = args.output or os.path.join(
+            BENCHMARK_RESULTS_DIR, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        save_results(output, results)
+        print(f"💾 Résultats enregistrés : {output}")
+
+        baseline = load_results(args.baseline)
+        if args.save_baseline:
+            # Les mesures non refaites (autres tailles ou opérations) restent dans la référence
+            if baseline is not None:
+                results["results"] = {**baseline.get("results", {}), **results["results"]}
+            save_results(args.baseline, results)
+            print(f"📌 Référence mise à jour : {args.baseline}")
+            return 0
+
+        if baseline is None:
+            print(f"ℹ️ Aucune référence ({args.baseline}) : python benchmark.py --save-baseline pour l'enregistrer")
+            return 0
+        if baseline.get("machine") != results["machine"]:
+            print("⚠️ Référence mesurée sur une autre machine ou une autre version de Python : "
+                  "les écarts de temps ne sont pas significatifs")
+
+        comparisons = compare_results(results, baseline, dict(args.threshold))
+        regressions = [line for line in comparisons if line["regression"]]
+        print(f"\n📊 Comparaison à la référence ({len(comparisons)} mesures)")
+        for line in comparisons:
+            marker = "❌" if line["regression"] else "✅"
+            print(f"  {marker} {line['benchmark']} {line['metric']} : "
+                  f"{format_value(line['metric'], line['baseline'])} → "
+                  f"{format_value(line['metric'], line['current'])} ({line['change']:+.1%})")
+
+        if regressions:
+            print(f"❌ {len(regressions)} régression(s) au-delà des seuils")
+            return 1
+        print("✅ Aucune régression")
+        return 0
+    except KeyboardInterrupt:
+        print("\n⚠️ Opération annulée par l'utilisateur")
+        return 1
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,18 @@
+# benchmarks/__init__.py
+"""
+Benchmarks du gestionnaire de camps et du générateur de carte sur des données synthétiques
+"""
+
+from .synthetic import generate_camps, write_camps_csv, write_camps_json
+from .suite import BENCHMARK_CASES, compare_results, run_benchmarks
+from .stress import run_stress
+
+__all__ = [
+    'generate_camps',
+    'write_camps_csv',
+    'write_camps_json',
+    'BENCHMARK_CASES',
+    'compare_results',
+    'run_benchmarks',
+    'run_stress'
+]
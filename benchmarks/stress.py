@@ -0,0 +1,134 @@
+# benchmarks/stress.py
+"""
+Test de charge : plusieurs processus modifient en même temps le même fichier de données
+
+Chaque écrivain ouvre le fichier avec son propre CampManager puis, à chaque
+opération, ajoute un camp et incrémente la population d'un camp compteur partagé
+(lecture puis écriture dans une transaction : une mise à jour perdue se voit sur
+le compteur). Il termine par une transaction qui déplace ses camps pairs et
+supprime ses camps multiples de 4, en deux lots (update_camps, remove_camps). Le bilan compare le fichier aux valeurs attendues.
+
+Avec une base SQLite, aucune modification ne doit être perdue. Avec un fichier
+JSON, chaque opération recharge le fichier, modifie puis sauvegarde, comme des
+appels successifs à add_camps.py : les écrivains s'écrasent mutuellement.
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Tuple
+from src.camp_manager import CampManager
+from src.config import *
+
+STRESS_COUNTER = "Compteur"
+STRESS_FORMATS = {"sqlite": "camps.sqlite", "json": "camps.json"}
+
+def _check(ok: bool, operation: str) -> None:
+    if not ok:
+        raise RuntimeError(f"{operation} a échoué")
+
+def _coordinates(writer: int, operation: int, moved: bool = False):
+    """Position (déterministe) d'un camp d'écrivain, décalée d'un degré s'il a été déplacé"""
+    latitude = (writer * 7 + operation) % 170 - 85 + (1.0 if moved else 0.0)
+    longitude = (writer * 31 + operation * 13) % 350 - 175
+    return float(latitude), float(longitude)
+
+def _population(camp) -> int:
+    return int(str(camp.population).replace(" ", ""))
+
+def _writer(filename: str, writer: int, operations: int, start_at: float) -> Tuple[int, float]:
+    """Processus écrivain : retourne le nombre d'opérations refusées et l'heure de fin"""
+    manager = CampManager(quiet=True)
+    reload_each_time = not filename.endswith(".sqlite")
+    failed = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        _check(manager.load(filename), "load")
+        time.sleep(max(0.0, start_at - time.time()))  # Départ commun pour que les écrivains se chevauchent
+
+        for operation in range(operations):
+            if reload_each_time:
+                _check(manager.load(filename), "load")
+            failed += not manager.add_camp(f"W{writer}-{operation}", *_coordinates(writer, operation))
+            with manager.transaction():
+                counter = manager.get_camp_by_name(STRESS_COUNTER)
+                failed += not manager.update_camp(STRESS_COUNTER, population=_population(counter) + 1)
+            failed += not manager.save()
+
+        if reload_each_time:
+            _check(manager.load(filename), "load")
+        moves = {f"W{writer}-{operation}": dict(zip(("latitude", "longitude"),
+                                                     _coordinates(writer, operation, moved=True)))
+                 for operation in range(0, operations, 2)}
+        with manager.transaction():
+            failed += not manager.update_camps(moves, save=False)
+            failed += not manager.remove_camps([f"W{writer}-{operation}" for operation in range(0, operations, 4)],
+                                               save=False)
+        failed += not manager.save()
+    manager.close()
+    return failed, time.time()
+
+def _verify(filename: str, writers: int, operations: int) -> Dict:
+    """Comparer le fichier de données aux valeurs attendues"""
+    manager = CampManager(quiet=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        _check(manager.load(filename), "load")
+
+    expected_names = {f"W{writer}-{operation}" for writer in range(writers)
+                      for operation in range(operations) if operation % 4}
+    names = {camp.name for camp in manager.camps} - {STRESS_COUNTER}
+    misplaced = 0
+    for writer in range(writers):
+        for operation in range(operations):
+            camp = manager.get_camp_by_name(f"W{writer}-{operation}")
+            if camp is not None and (camp.latitude, camp.longitude) != _coordinates(writer, operation, operation % 2 == 0):
+                misplaced += 1
+
+    counter = _population(manager.get_camp_by_name(STRESS_COUNTER))
+    result = {
+        "expected_camps": len(expected_names),
+        "camps": len(names),
+        "missing_camps": len(expected_names - names),
+        "unexpected_camps": len(names - expected_names),
+        "misplaced_camps": misplaced,
+        "expected_counter": writers * operations,
+        "counter": counter,
+        "lost_updates": writers * operations - counter,
+        # Requête par rectangle couvrant le globe : l'index spatial de la base doit contenir tous les camps
+        "indexed_camps": len(manager.camps_in_bbox(-90.0, -180.0, 90.0, 180.0)) - 1
+    }
+    result["ok"] = (not result["missing_camps"] and not result["unexpected_camps"] and not misplaced
+                    and not result["lost_updates"] and result["indexed_camps"] == len(names))
+    manager.close()
+    return result
+
+def run_stress(writers: int = None, operations: int = None, data_format: str = "sqlite") -> Dict:
+    """Lancer les écrivains en parallèle sur un fichier neuf (dossier temporaire) et retourner le bilan"""
+    writers = writers or BENCHMARK_CONFIG["stress_writers"]
+    operations = operations or BENCHMARK_CONFIG["stress_operations"]
+
+    with tempfile.TemporaryDirectory(prefix="hcr_stress_") as work_dir:
+        filename = os.path.join(work_dir, STRESS_FORMATS[data_format])
+        manager = CampManager(quiet=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            _check(manager.add_camp(STRESS_COUNTER, 0.0, 0.0, population=0), "add_camp")
+            _check(manager.save(filename), "save")
+        manager.close()
+
+        with ProcessPoolExecutor(writers) as executor:
+            start_at = time.time() + 0.5
+            outcomes = list(executor.map(_writer, [filename] * writers, range(writers),
+                                         [operations] * writers, [start_at] * writers))
+        seconds = max(finished for _, finished in outcomes) - start_at
+
+        result = _verify(filename, writers, operations)
+        result["failed_operations"] = sum(failed for failed, _ in outcomes)
+        result["ok"] = result["ok"] and not result["failed_operations"]
+
+    # Transactions par écrivain : un ajout et un incrément par opération, plus la transaction finale
+    transactions = writers * (2 * operations + 1)
+    return {"format": data_format, "writers": writers, "operations": operations,
+            "seconds": round(seconds, 3), "transactions_per_second": round(transactions / seconds, 1),
+            **result}
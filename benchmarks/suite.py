@@ -0,0 +1,319 @@
+# benchmarks/suite.py
+"""
+Mesures des opérations principales sur des camps synthétiques et comparaison à une référence
+
+Chaque mesure prépare ses données dans un dossier temporaire (hors data/), puis
+exécute l'opération plusieurs fois : le temps gardé est le plus court, le pic
+mémoire est mesuré par tracemalloc lors d'une exécution supplémentaire (pour ne
+pas ralentir celles qui sont chronométrées).
+"""
+
+import contextlib
+import gc
+import io
+import json
+import multiprocessing
+import os
+import platform
+import re
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from src.camp_manager import CampManager
+from src.config import *
+from src.map_cache import MapBuildCache
+from src.map_generator import MapGenerator
+from src.metrics import _peak_rss, _reset_peak_rss
+from .synthetic import generate_camps, write_camps_csv, write_camps_json
+
+def _dataset(work_dir: str, size: int, seed: int, extension: str) -> str:
+    """Fichier de camps synthétiques (écrit une seule fois par taille et par format)"""
+    filename = os.path.join(work_dir, f"camps_{size}_{seed}.{extension}")
+    if not os.path.exists(filename):
+        writer = write_camps_json if extension == "json" else write_camps_csv
+        writer(filename, generate_camps(size, seed))
+    return filename
+
+def _loaded_manager(work_dir: str, size: int, seed: int) -> CampManager:
+    """Gestionnaire contenant les camps synthétiques"""
+    manager = CampManager()
+    _check(manager.load_from_json(_dataset(work_dir, size, seed, "json")), "load_from_json")
+    return manager
+
+def _check(ok: bool, operation: str) -> None:
+    if not ok:
+        raise RuntimeError(f"{operation} a échoué")
+
+def _bench_load_from_json(work_dir: str, size: int, seed: int) -> Callable:
+    filename = _dataset(work_dir, size, seed, "json")
+    return lambda: _check(CampManager().load_from_json(filename), "load_from_json")
+
+def _bench_load_from_csv(work_dir: str, size: int, seed: int) -> Callable:
+    filename = _dataset(work_dir, size, seed, "csv")
+    return lambda: _check(CampManager().load_from_csv(filename), "load_from_csv")
+
+def _bench_add_remove(work_dir: str, size: int, seed: int) -> Callable:
+    manager = _loaded_manager(work_dir, size, seed)
+    # Camps ajoutés puis supprimés : les noms ne doivent pas exister dans le jeu de données
+    extra = [(f"NEW-{camp[0]}",) + camp[1:] for camp in
+             generate_camps(BENCHMARK_CONFIG["edit_operations"], seed + 1)]
+
+    def run():
+        for camp in extra:
+            _check(manager.add_camp(*camp), "add_camp")
+        for camp in extra:
+            _check(manager.remove_camp(camp[0]), "remove_camp")
+    return run
+
+def _bench_bulk_edit(work_dir: str, size: int, seed: int) -> Callable:
+    manager = _loaded_manager(work_dir, size, seed)
+    extra = [(f"NEW-{camp[0]}",) + camp[1:] for camp in
+             generate_camps(BENCHMARK_CONFIG["edit_operations"], seed + 1)]
+    populations = {camp[0]: {"population": index} for index, camp in enumerate(extra)}
+
+    def run():
+        # Mêmes modifications que add_remove_camp, plus une mise à jour de population, par lots
+        _check(manager.add_camps(extra, save=False), "add_camps")
+        _check(manager.update_camps(populations, save=False), "update_camps")
+        _check(manager.remove_camps(list(populations), save=False), "remove_camps")
+    return run
+
+def _bench_save_to_json(work_dir: str, size: int, seed: int) -> Callable:
+    manager = _loaded_manager(work_dir, size, seed)
+    targets = [os.path.join(work_dir, "saved_a.json"), os.path.join(work_dir, "saved_b.json")]
+
+    def run():
+        # Alterner deux fichiers : chaque sauvegarde réécrit l'instantané complet
+        # (sauvegarder à nouveau le même fichier n'ajouterait qu'un journal vide)
+        targets.reverse()
+        _check(manager.save_to_json(targets[0]), "save_to_json")
+        return targets[0]
+    return run
+
+def _map_generator(work_dir: str, manager: CampManager) -> MapGenerator:
+    """Générateur qui n'écrit que dans work_dir (cache de construction, aucun asset publié)"""
+    generator = MapGenerator(manager)
+    generator.build_cache = MapBuildCache(os.path.join(work_dir, "map_build_cache.json"))
+    # Les camps synthétiques n'ont pas d'assets : assets/ n'est pas analysé, son
+    # manifeste et output/assets ne sont pas modifiés (légende en pastilles de couleur)
+    generator._camp_assets, generator._icon_urls = {}, {}
+    return generator
+
+def _bench_generate_map(work_dir: str, size: int, seed: int) -> Callable:
+    generator = _map_generator(work_dir, _loaded_manager(work_dir, size, seed))
+    output_file = os.path.join(work_dir, "carte.html")
+
+    def run():
+        _check(generator.generate_map(output_file, force=True), "generate_map")
+        return output_file
+    return run
+
+# Identifiants aléatoires que folium donne à chaque élément (map_<uuid4>...)
+_FOLIUM_ID = re.compile(rb"_[0-9a-f]{32}\b")
+
+def _map_files(directory: str) -> Dict[str, bytes]:
+    """Contenu des fichiers produits dans un dossier (chemins relatifs), hors copies compressées
+
+    Les identifiants de folium sont remplacés par leur rang d'apparition : ils
+    changent à chaque génération, même en série.
+    """
+    files = {}
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if name.endswith((".gz", ".br")):
+                continue
+            filename = os.path.join(root, name)
+            with open(filename, 'rb') as file:
+                ids = {}
+                files[os.path.relpath(filename, directory)] = _FOLIUM_ID.sub(
+                    lambda match: b"_%d" % ids.setdefault(match.group(), len(ids)), file.read())
+    return files
+
+def _bench_generate_map_workers(work_dir: str, size: int, seed: int) -> Callable:
+    generator = _map_generator(work_dir, _loaded_manager(work_dir, size, seed))
+    workers = BENCHMARK_CONFIG["map_workers"]
+    # Même nom de fichier dans deux dossiers : les pages font référence à leurs couches par ce nom
+    directories = {count: os.path.join(work_dir, f"carte_workers_{count}") for count in (1, workers)}
+    best = {}
+
+    def generate(count: int) -> float:
+        output_file = os.path.join(directories[count], "carte.html")
+        os.makedirs(directories[count], exist_ok=True)
+        start = time.perf_counter()
+        # Page avec la table des camps, puis page dont les camps sont dans des couches GeoJSON
+        _check(generator.generate_map(output_file, force=True, workers=count), "generate_map")
+        _check(generator.generate_map(output_file.replace(".html", "_couches.html"), force=True,
+                                      group_by="icon_type", workers=count), "generate_map")
+        return time.perf_counter() - start
+
+    def run():
+        for count in (1, workers):
+            best[count] = min(best.get(count, float("inf")), generate(count))
+        if _map_files(directories[1]) != _map_files(directories[workers]):
+            raise RuntimeError(f"generate_map : fichiers différents avec {workers} processus et en série")
+        return {"serial_seconds": round(best[1], 6), "workers_seconds": round(best[workers], 6),
+                "workers": workers, "speedup": round(best[1] / best[workers], 3)}
+    return run
+
+def _streamed_map_rss(work_dir: str, filename: str) -> Dict:
+    """Processus neuf : charger les camps puis générer la carte, retourner le pic de mémoire résidente"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = CampManager(quiet=True)
+        _check(manager.load_from_json(filename), "load_from_json")
+        gc.collect()
+        # Pic remis au niveau actuel (Linux) : seule la génération compte dans la hausse
+        _reset_peak_rss()
+        loaded = _peak_rss()
+        generator = _map_generator(work_dir, manager)
+        _check(generator.generate_map(os.path.join(work_dir, "carte_rss.html"), force=True), "generate_map")
+        peak = _peak_rss()
+    return {"peak_rss_bytes": peak, "rss_growth_bytes": max(0, peak - loaded)}
+
+def _bench_generate_map_rss(work_dir: str, size: int, seed: int) -> Callable:
+    filename = _dataset(work_dir, size, seed, "json")
+
+    def run():
+        # La page est écrite au fil de l'eau : la mémoire ajoutée par la génération
+        # ne doit pas suivre le nombre de camps (pic mesuré dans un processus neuf)
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            measurement = executor.submit(_streamed_map_rss, work_dir, filename).result()
+        if measurement["rss_growth_bytes"] > BENCHMARK_CONFIG["max_map_rss_growth"]:
+            raise RuntimeError(f"generate_map : la mémoire résidente augmente de "
+                               f"{measurement['rss_growth_bytes'] / (1024 * 1024):.1f} Mo pendant la génération "
+                               f"(limite {BENCHMARK_CONFIG['max_map_rss_growth'] / (1024 * 1024):.1f} Mo)")
+        # Budget absolu : part fixe (interpréteur, modules) plus une part par camp chargé
+        budget = BENCHMARK_CONFIG["map_rss_budget_base"] + BENCHMARK_CONFIG["map_rss_budget_per_camp"] * size
+        if measurement["peak_rss_bytes"] > budget:
+            raise RuntimeError(f"generate_map : pic de mémoire résidente de "
+                               f"{measurement['peak_rss_bytes'] / (1024 * 1024):.1f} Mo pour {size} camps "
+                               f"(budget {budget / (1024 * 1024):.1f} Mo)")
+        measurement["rss_bytes_per_camp"] = round(measurement["peak_rss_bytes"] / size, 1)
+        return measurement
+    return run
+
+# Mesures disponibles : nom -> préparation (dossier, taille, graine) retournant l'opération
+# à chronométrer ; l'opération peut retourner le fichier écrit, dont la taille est notée,
+# ou des mesures supplémentaires (dictionnaire)
+BENCHMARK_CASES = {
+    "load_from_json": _bench_load_from_json,
+    "load_from_csv": _bench_load_from_csv,
+    "add_remove_camp": _bench_add_remove,
+    "bulk_edit_camps": _bench_bulk_edit,
+    "save_to_json": _bench_save_to_json,
+    "generate_map": _bench_generate_map,
+    "generate_map_workers": _bench_generate_map_workers,
+    "generate_map_rss": _bench_generate_map_rss
+}
+
+def _measure(prepare: Callable, work_dir: str, size: int, seed: int, repeat: int) -> Dict:
+    """Préparer puis mesurer une opération (sorties des opérations masquées)"""
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            run = prepare(work_dir, size, seed)
+            times = []
+            for _ in range(repeat):
+                gc.collect()
+                start = time.perf_counter()
+                written = run()
+                times.append(time.perf_counter() - start)
+
+            gc.collect()
+            tracemalloc.start()
+            try:
+                run()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+    except RuntimeError as e:
+        lines = output.getvalue().strip().splitlines()
+        raise RuntimeError(f"{e} ({lines[-1]})" if lines else str(e)) from None
+
+    measurement = {"seconds": round(min(times), 6), "peak_bytes": peak}
+    if isinstance(written, dict):
+        measurement.update(written)
+    elif written:
+        measurement["output_bytes"] = os.path.getsize(written)
+    return measurement
+
+def machine_info() -> Dict:
+    """Description de la machine, pour ne comparer que des mesures comparables"""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.machine(),
+        "cpus": os.cpu_count()
+    }
+
+def run_benchmarks(sizes: List[int] = None, cases: List[str] = None, repeat: int = None,
+                   seed: int = None, progress: Callable[[str, int, Dict], None] = None) -> Dict:
+    """Exécuter les mesures pour chaque taille et retourner les résultats (sérialisables en JSON)
+
+    Les résultats sont indexés par "opération/taille". progress est appelé après
+    chaque mesure avec l'opération, la taille et la mesure.
+    """
+    sizes = sizes or BENCHMARK_CONFIG["sizes"]
+    cases = cases or list(BENCHMARK_CASES)
+    repeat = repeat or BENCHMARK_CONFIG["repeat"]
+    seed = BENCHMARK_CONFIG["seed"] if seed is None else seed
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="hcr_benchmark_") as work_dir:
+        for size in sizes:
+            for case in cases:
+                measurement = _measure(BENCHMARK_CASES[case], work_dir, size, seed, repeat)
+                results[f"{case}/{size}"] = measurement
+                if progress:
+                    progress(case, size, measurement)
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "machine": machine_info(),
+        "seed": seed,
+        "repeat": repeat,
+        "results": results
+    }
+
+def compare_results(current: Dict, baseline: Dict, thresholds: Dict[str, float] = None,
+                    min_seconds: float = None) -> List[Dict]:
+    """Comparer chaque mesure à la référence
+
+    Retourne une ligne par mesure présente des deux côtés : valeurs, variation
+    relative et regression (True si la hausse dépasse le seuil de la mesure ;
+    pour les temps, il faut aussi qu'elle dépasse min_seconds).
+    """
+    thresholds = {**BENCHMARK_CONFIG["thresholds"], **(thresholds or {})}
+    if min_seconds is None:
+        min_seconds = BENCHMARK_CONFIG["min_seconds"]
+
+    comparisons = []
+    reference = baseline.get("results", {})
+    for key, measurement in current.get("results", {}).items():
+        for metric, value in measurement.items():
+            base = reference.get(key, {}).get(metric)
+            if base is None or metric not in thresholds:
+                continue
+            change = (value - base) / base if base else 0.0
+            regression = change > thresholds[metric]
+            if metric == "seconds" and value - base < min_seconds:
+                regression = False
+            comparisons.append({"benchmark": key, "metric": metric, "baseline": base, "current": value,
+                                "change": change, "regression": regression})
+    return comparisons
+
+def load_results(filename: str) -> Optional[Dict]:
+    """Lire un fichier de résultats (None s'il n'existe pas)"""
+    try:
+        with open(filename, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+def save_results(filename: str, results: Dict) -> None:
+    """Écrire un fichier de résultats"""
+    os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+    with open(filename, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2, ensure_ascii=False)
@@ -0,0 +1,101 @@
+# benchmarks/synthetic.py
+"""
+Générateur de camps synthétiques pour les benchmarks
+
+Les camps sont regroupés comme les vrais : quelques régions d'accueil, des sites
+dans chaque région (les premiers plus peuplés que les autres), et des camps
+serrés autour de chaque site. La même graine donne toujours les mêmes camps.
+"""
+
+import csv
+import json
+import random
+from typing import Iterable, Iterator, Tuple
+from src.config import *
+
+# Régions d'accueil : (code, latitude, longitude, dispersion des sites en degrés, poids)
+REGIONS = [
+    ("SAH", 15.5, -4.0, 3.0, 3.0),    # Sahel occidental (Mali, Mauritanie, Niger)
+    ("BUR", 13.5, -1.0, 1.5, 1.5),    # Sahel central (Burkina Faso)
+    ("TCH", 13.0, 14.0, 2.0, 2.0),    # Bassin du lac Tchad
+    ("DAR", 13.5, 22.0, 2.0, 2.5),    # Est du Tchad et Darfour
+    ("NIL", 3.5, 31.5, 2.0, 3.0),     # Soudan du Sud et nord de l'Ouganda
+    ("ETH", 8.5, 34.5, 2.0, 2.0),     # Ouest de l'Éthiopie
+    ("COR", 1.5, 41.0, 1.5, 2.0),     # Corne de l'Afrique (Kenya, Somalie)
+    ("GLA", -2.0, 29.0, 1.5, 2.5),    # Grands Lacs (RDC, Rwanda, Burundi)
+    ("AUS", -13.5, 34.0, 2.0, 1.0),   # Afrique australe (Malawi, Mozambique)
+    ("TIN", 27.0, -7.5, 1.0, 0.5),    # Tindouf et Sahara occidental
+    ("LEV", 33.0, 36.5, 1.5, 1.5),    # Levant (Jordanie, Liban, Syrie)
+    ("BGD", 21.2, 92.15, 0.3, 1.0)    # Cox's Bazar
+]
+
+CAMP_SPREAD = 0.03          # Dispersion des camps autour de leur site (degrés)
+CAMPS_PER_SITE = 200        # Nombre moyen de camps par site
+POPULATION_UNKNOWN = 0.15   # Part des camps sans population connue
+RADAR_WEIGHTS = {"VH": 0.8, "VV": 0.2}
+ICON_WEIGHTS = {"blue": 0.5, "green": 0.3, "grey": 0.2}
+
+CSV_HEADER = REQUIRED_FIELDS + OPTIONAL_FIELDS
+
+def generate_camps(count: int, seed: int = None) -> Iterator[Tuple]:
+    """Produire count camps (nom, latitude, longitude, population, radar, icon_type)
+
+    Les camps sont produits un par un : 1 000 000 de camps peuvent être écrits
+    sans être gardés en mémoire.
+    """
+    rng = random.Random(BENCHMARK_CONFIG["seed"] if seed is None else seed)
+
+    # Sites de chaque région, tirés une fois pour toutes
+    site_count = max(1, count // (CAMPS_PER_SITE * len(REGIONS)))
+    sites = [[(rng.gauss(lat, spread), rng.gauss(lon, spread)) for _ in range(site_count)]
+             for _, lat, lon, spread, _ in REGIONS]
+    region_weights = [weight for *_, weight in REGIONS]
+    radars, radar_weights = list(RADAR_WEIGHTS), list(RADAR_WEIGHTS.values())
+    icons, icon_weights = list(ICON_WEIGHTS), list(ICON_WEIGHTS.values())
+
+    for index in range(count):
+        region = rng.choices(range(len(REGIONS)), region_weights)[0]
+        # Tirage biaisé vers les premiers sites : quelques sites concentrent les camps
+        site_lat, site_lon = sites[region][int(site_count * rng.random() ** 2)]
+        latitude = min(max(rng.gauss(site_lat, CAMP_SPREAD), -85.0), 85.0)
+        longitude = min(max(rng.gauss(site_lon, CAMP_SPREAD), -180.0), 180.0)
+
+        if rng.random() < POPULATION_UNKNOWN:
+            population = "N/A"
+        else:
+            population = f"{int(rng.lognormvariate(8.5, 1.2)):,}".replace(",", " ")
+
+        yield (f"{REGIONS[region][0]}-{index:07d}", round(latitude, 6), round(longitude, 6), population,
+               rng.choices(radars, radar_weights)[0], rng.choices(icons, icon_weights)[0])
+
+def write_camps_json(filename: str, camps: Iterable[Tuple]) -> int:
+    """Écrire des camps au format de camps.json, camp par camp ; retourne le nombre de camps"""
+    count = 0
+    with open(filename, 'w', encoding='utf-8') as file:
+        file.write('{\n  "camps": [')
+        for name, latitude, longitude, population, radar, icon_type in camps:
+            camp = {
+                "name": name,
+                "coords": [latitude, longitude],
+                "population": population,
+                "radar": radar,
+                "icon": {"path": get_icon_path(icon_type), "size": ICON_CONFIG[icon_type]["size"]},
+                "icon_type": icon_type
+            }
+            text = json.dumps(camp, indent=2, ensure_ascii=False).replace("\n", "\n    ")
+            file.write(("," if count else "") + "\n    " + text)
+            count += 1
+        metadata = {"total_camps": count, "version": "1.0", "journal_seq": 0}
+        file.write('\n  ],\n  "metadata": ' + json.dumps(metadata, indent=2).replace("\n", "\n  ") + '\n}')
+    return count
+
+def write_camps_csv(filename: str, camps: Iterable[Tuple]) -> int:
+    """Écrire des camps au format du template CSV ; retourne le nombre de camps"""
+    count = 0
+    with open(filename, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_HEADER)
+        for camp in camps:
+            writer.writerow(camp)
+            count += 1
+    return count
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# camp_daemon.py
+"""
+Script pour garder les camps en mémoire et les servir par une API HTTP/JSON locale
+"""
+
+import argparse
+import signal
+import sys
+from src.camp_service import CampClient, CampService, CampServiceServer
+from src.config import *
+
+def stop(signum, frame):
+    """Arrêt demandé par le système (SIGTERM) : même traitement que Ctrl+C"""
+    raise KeyboardInterrupt
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(
+        description='Garder les camps en mémoire et les servir par une API HTTP/JSON locale',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Démarrer le service (add_camps.py l'utilise tant qu'il tourne)
+  python camp_daemon.py
+  
+  # Camps d'une zone, page par page (ETag : 304 si rien n'a changé)
+  curl "http://127.0.0.1:8765/api/bbox?south=-5&west=28&north=5&east=35&limit=100"
+  
+  # Ajouter un camp
+  curl -X POST -H "Content-Type: application/json" http://127.0.0.1:8765/api/camps \\
+       -d '{"name": "Nouveau_Camp", "latitude": 12.3, "longitude": 4.5}'
+        """
+    )
+    
+    parser.add_argument('--host', default=DAEMON_CONFIG["host"], help='Adresse d\'écoute')
+    parser.add_argument('--port', type=int, default=DAEMON_CONFIG["port"], help='Port d\'écoute')
+    parser.add_argument('--file', help='Fichier de données (défaut : fichier actif, binaire ou JSON)')
+    parser.add_argument('--quiet', action='store_true', help='Ne pas afficher chaque requête')
+    
+    args = parser.parse_args()
+    
+    if CampClient.connect() is not None:
+        print(f"❌ Le service des camps est déjà démarré ({DAEMON_STATE_FILE})")
+        return 1
+    
+    service = CampService(args.file)
+    server = None
+    try:
+        service.start()
+        server = CampServiceServer((args.host, args.port), service, quiet=args.quiet)
+        server.write_state()
+        signal.signal(signal.SIGTERM, stop)
+        host, port = server.server_address[:2]
+        print(f"🔌 Service des camps sur http://{host}:{port}/api/ (Ctrl+C pour arrêter)")
+        server.serve_forever()
+        return 0
+    except KeyboardInterrupt:
+        print("\n⚠️ Service arrêté")
+        return 0
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+        return 1
+    finally:
+        if server is not None:
+            server.remove_state()
+            server.server_close()
+        service.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
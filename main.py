@@ -4,10 +4,15 @@
 Script principal pour générer la carte des camps de réfugiés
 """
 
+import argparse
 import sys
 import os
 from src.camp_manager import CampManager
+from src.camp_service import CampClient
 from src.map_generator import MapGenerator
+from src.metrics import metrics
+from src.previews import build_previews
+from src.rasters import build_rasters
 from src.config import *
 
 def load_existing_camps(manager: CampManager):
@@ -26,20 +31,60 @@ def load_existing_camps(manager: CampManager):
             icon_type=camp_data["icon_type"]
         )
 
+def parse_arguments():
+    """Options de mesure et d'affichage"""
+    parser = argparse.ArgumentParser(
+        description='Générer la carte des camps de réfugiés',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Générer la carte
+  python main.py
+  
+  # Mesurer chaque phase (temps, CPU, mémoire) et écrire le rapport JSON
+  python main.py --metrics output/metrics.json
+  
+  # Profiler la phase la plus lente avec cProfile, sans message par camp
+  python main.py --quiet --profile carte.prof
+        """
+    )
+    parser.add_argument('--quiet', action='store_true', help='Ne pas afficher un message par camp')
+    parser.add_argument('--metrics', metavar='FICHIER', help='Écrire les mesures des phases en JSON')
+    parser.add_argument('--profile', metavar='FICHIER',
+                        help='Écrire le profil cProfile de la phase la plus lente (implique la mesure des phases)')
+    return parser.parse_args()
+
 def main():
     """Fonction principale"""
+    args = parse_arguments()
+    if args.metrics or args.profile:
+        metrics.enable(profile=bool(args.profile))
+    try:
+        return generate(args)
+    finally:
+        if metrics.enabled:
+            metrics.finish("main.py", args.metrics, args.profile)
+
+def generate(args) -> int:
+    """Charger les camps, construire les assets et générer la carte"""
     print("🏕️ Générateur de Carte des Camps de Réfugiés")
     print("=" * 50)
     
+    # Si le service des camps tourne, lui faire sauvegarder ses dernières modifications
+    client = CampClient.connect()
+    if client is not None:
+        client.request("POST", "/api/save")
+        client.close()
+    
     # Créer le gestionnaire de camps
-    manager = CampManager()
+    manager = CampManager(quiet=args.quiet)
     
-    # Essayer de charger depuis le fichier JSON, sinon charger les camps existants
-    if not manager.load_from_json():
+    # Essayer de charger le fichier de données (binaire ou JSON), sinon charger les camps existants
+    if not manager.load():
         print("📂 Aucun fichier de données trouvé, chargement des camps par défaut...")
         load_existing_camps(manager)
         # Sauvegarder pour la prochaine fois
-        manager.save_to_json()
+        manager.save()
     
     # Afficher les statistiques
     print(f"\n📊 Statistiques:")
@@ -50,6 +95,14 @@ def main():
             description = ICON_CONFIG[icon_type]['description']
             print(f"   • {description}: {count}")
     
+    # Construire les aperçus des GIFs (vignettes, animations compressées) manquants ou périmés
+    with metrics.phase("build_previews"):
+        build_previews()
+    
+    # Convertir les .tif nouveaux ou modifiés en COG et en tuiles XYZ (avec rasterio)
+    with metrics.phase("build_rasters"):
+        build_rasters()
+    
     # Créer le générateur de carte
     generator = MapGenerator(manager)
     
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# serve.py
+"""
+Script pour servir les cartes générées (output/) et les assets en local
+"""
+
+import argparse
+import json
+import sys
+import threading
+from src.config import *
+from src.server import StaticServer, load_test
+
+def run_load_test(args) -> int:
+    """Mesurer le débit du serveur (démarré dans ce processus si --target n'est pas donné)"""
+    server = None
+    if args.target:
+        host, _, port = args.target.rpartition(":")
+        port = int(port)
+    else:
+        server = StaticServer((args.host, 0), quiet=True)
+        host, port = server.server_address[:2]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    headers = {"Accept-Encoding": args.encoding} if args.encoding else {}
+    print(f"⏱️ {args.requests} requêtes GET {args.load_test} depuis {args.clients} clients simultanés...")
+    result = load_test(host, port, args.load_test, args.clients, args.requests, headers)
+    print(json.dumps(result, indent=2))
+    if server is not None:
+        server.shutdown()
+    return 0 if result["errors"] == 0 else 1
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(
+        description="Servir la carte et les assets en local",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples:
+  # Servir la carte sur http://127.0.0.1:8000/
+  python serve.py
+  
+  # Mesurer le débit : 5000 requêtes depuis 100 clients simultanés
+  python serve.py --load-test /output/carte_camps.html --clients 100 --requests 5000
+        """
+    )
+    
+    parser.add_argument('--host', default=SERVE_CONFIG["host"], help='Adresse d\'écoute')
+    parser.add_argument('--port', type=int, default=SERVE_CONFIG["port"], help='Port d\'écoute')
+    parser.add_argument('--quiet', action='store_true', help='Ne pas afficher chaque requête')
+    
+    bench_group = parser.add_argument_group('Test de charge')
+    bench_group.add_argument('--load-test', metavar='CHEMIN', help='Chemin à demander (ex. /output/carte_camps.html)')
+    bench_group.add_argument('--clients', type=int, default=50, help='Clients simultanés')
+    bench_group.add_argument('--requests', type=int, default=2000, help='Nombre total de requêtes')
+    bench_group.add_argument('--encoding', default='gzip, br', help='En-tête Accept-Encoding envoyé')
+    bench_group.add_argument('--target', metavar='HÔTE:PORT', help='Serveur déjà démarré à tester')
+    
+    args = parser.parse_args()
+    
+    try:
+        if args.load_test:
+            return run_load_test(args)
+        
+        server = StaticServer((args.host, args.port), quiet=args.quiet)
+        host, port = server.server_address[:2]
+        print(f"🌐 Carte servie sur http://{host}:{port}/ (Ctrl+C pour arrêter)")
+        server.serve_forever()
+        return 0
+    except KeyboardInterrupt:
+        print("\n⚠️ Serveur arrêté")
+        return 0
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,9 +8,16 @@ __author__ = "Thomas ESCOBAR"
 __description__ = "Système de gestion et cartographie des camps de réfugiés"
 
 from .camp_manager import Camp, CampManager
-from .map_generator import MapGenerator
 from . import config
 
+def __getattr__(name):
+    # folium n'est importé qu'à la première utilisation de MapGenerator : les scripts
+    # qui ne génèrent pas de carte (add_camps.py) démarrent plus vite
+    if name == "MapGenerator":
+        from .map_generator import MapGenerator
+        return MapGenerator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 __all__ = [
     'Camp',
     'CampManager', 
@@ -0,0 +1,264 @@
+# src/analytics.py
+"""
+Statistiques de changement des camps
+Chaque .tif radar d'un camp est une série mensuelle (une bande par mois).
+Pour chaque mois sont calculés la rétrodiffusion moyenne, son écart au mois
+précédent et la part des pixels ayant changé de plus d'un seuil ; les calculs
+sont vectorisés sur tous les mois à la fois et le raster est lu par blocs de
+lignes. Le résumé JSON de chaque camp sert de cache : à l'arrivée d'un nouveau
+mois, seuls ce mois et le précédent sont relus. Les camps sont analysés en
+parallèle dans un pool de processus.
+
+Comme pour les rasters, rasterio est nécessaire pour lire les .tif.
+"""
+
+import json
+import math
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from .config import *
+from .journal import atomic_write
+from .rasters import png_bytes, tif_sources
+
+try:
+    import numpy as np
+    import rasterio
+    from rasterio.enums import Resampling
+    from rasterio.windows import Window
+except ImportError:
+    rasterio = None
+
+# Palette des vignettes (viridis, interpolée entre ces couleurs)
+PALETTE = [(68, 1, 84), (59, 82, 139), (33, 145, 140), (94, 201, 98), (253, 231, 37)]
+CHART_COLOR = (231, 76, 60)
+MARGIN = 8
+
+# Paramètres dont dépendent les statistiques déjà calculées
+STATISTICS_KEYS = ("decibels", "change_threshold_db")
+
+
+def _month_labels(src) -> List[str]:
+    """Nom de chaque mois (description de la bande, sinon son numéro)"""
+    return [description or f"bande {band}" for band, description in enumerate(src.descriptions, 1)]
+
+
+def _geometry(src, filename: str) -> Dict:
+    return {"file": filename, "width": src.width, "height": src.height,
+            "crs": str(src.crs), "transform": list(src.transform)[:6]}
+
+
+def _to_values(stack: 'np.ma.MaskedArray') -> 'np.ma.MaskedArray':
+    """Valeurs analysées : dB (les puissances nulles ou négatives sont masquées) ou valeurs brutes"""
+    stack = np.ma.masked_invalid(stack.astype(np.float64))
+    if ANALYTICS_CONFIG["decibels"]:
+        stack = 10 * np.ma.log10(np.ma.masked_less_equal(stack, 0))
+    return stack
+
+
+def _month_statistics(src, first: int) -> List[Dict]:
+    """Statistiques des mois first.. (0 : le premier), le mois précédent n'étant relu que pour les écarts
+
+    Les sommes de chaque mois sont accumulées bloc de lignes par bloc de lignes,
+    chaque bloc étant traité pour tous les mois en une seule opération.
+    """
+    start = max(first - 1, 0)
+    bands = list(range(start + 1, src.count + 1))
+    sums, counts = np.zeros(len(bands)), np.zeros(len(bands), np.int64)
+    changed, pairs = np.zeros(len(bands) - 1, np.int64), np.zeros(len(bands) - 1, np.int64)
+    threshold = ANALYTICS_CONFIG["change_threshold_db"]
+
+    for row in range(0, src.height, ANALYTICS_CONFIG["block_rows"]):
+        window = Window(0, row, src.width, min(ANALYTICS_CONFIG["block_rows"], src.height - row))
+        stack = _to_values(src.read(bands, window=window, masked=True))
+        valid = ~np.ma.getmaskarray(stack)
+        values = stack.filled(0)
+        sums += values.sum(axis=(1, 2))
+        counts += valid.sum(axis=(1, 2))
+        # Pixels valides deux mois de suite, et ceux dont la valeur a changé de plus du seuil
+        both = valid[1:] & valid[:-1]
+        pairs += both.sum(axis=(1, 2))
+        changed += ((np.abs(values[1:] - values[:-1]) > threshold) & both).sum(axis=(1, 2))
+
+    means = np.divide(sums, counts, out=np.full(len(bands), np.nan), where=counts > 0)
+    labels = _month_labels(src)
+    months = []
+    for position in range(first - start, len(bands)):
+        mean = float(means[position])
+        month = {"month": labels[start + position], "mean": None if math.isnan(mean) else round(mean, 4),
+                 "delta": None, "changed_fraction": None, "valid_pixels": int(counts[position])}
+        if position > 0:
+            previous = float(means[position - 1])
+            if not (math.isnan(mean) or math.isnan(previous)):
+                month["delta"] = round(mean - previous, 4)
+            if pairs[position - 1]:
+                month["changed_fraction"] = round(float(changed[position - 1] / pairs[position - 1]), 6)
+        months.append(month)
+    return months
+
+
+def _cached_months(cached: Optional[Dict], geometry: Dict, labels: List[str]) -> List[Dict]:
+    """Mois déjà analysés réutilisables : ceux du début de la série, si ni le raster ni les paramètres n'ont changé"""
+    if cached is None or cached["source"] != geometry:
+        return []
+    if cached["config"] != {key: ANALYTICS_CONFIG[key] for key in STATISTICS_KEYS}:
+        return []
+    months = []
+    for month, label in zip(cached["months"], labels):
+        if month["month"] != label:
+            break
+        months.append(month)
+    return months
+
+
+def _panel(src, band: int) -> 'np.ma.MaskedArray':
+    """Valeurs d'un mois réduites à la largeur d'une vignette"""
+    width = min(src.width, ANALYTICS_CONFIG["panel_width"])
+    height = max(1, round(src.height * width / src.width))
+    return _to_values(src.read(band, out_shape=(height, width), resampling=Resampling.average, masked=True))
+
+
+def _colorize(panel: 'np.ma.MaskedArray', low: float, high: float) -> 'np.ndarray':
+    """Vignette RGB (palette viridis, pixels masqués en blanc)"""
+    scaled = np.clip((panel.filled(low) - low) / (high - low), 0, 1)
+    anchors = np.linspace(0, 1, len(PALETTE))
+    rgb = np.dstack([np.interp(scaled, anchors, [color[channel] for color in PALETTE]) for channel in range(3)])
+    rgb[np.ma.getmaskarray(panel)] = 255
+    return rgb.astype(np.uint8)
+
+
+def _chart(months: List[Dict], width: int) -> 'np.ndarray':
+    """Graphique en barres de la part de pixels changés par mois"""
+    height = ANALYTICS_CONFIG["chart_height"]
+    chart = np.full((height, width, 3), 255, np.uint8)
+    chart[-1] = 128
+    fractions = np.array([month["changed_fraction"] or 0.0 for month in months])
+    if not len(fractions) or fractions.max() <= 0:
+        return chart
+    edges = np.linspace(0, width, len(fractions) + 1).astype(int)
+    bars = np.round(fractions / fractions.max() * (height - 2)).astype(int)
+    for left, right, bar in zip(edges[:-1], edges[1:], bars):
+        if bar:
+            chart[height - 1 - bar:height - 1, left:max(left + 1, right - 1)] = CHART_COLOR
+    return chart
+
+
+def _render_results(rows: List[Tuple[str, List[Dict]]]) -> bytes:
+    """Image des résultats : par radar, vignettes du premier mois, du mois médian et du dernier, puis le graphique"""
+    blocks = []
+    for filename, months in rows:
+        with rasterio.open(filename) as src:
+            bands = sorted({1, (src.count + 1) // 2, src.count})
+            panels = [_panel(src, band) for band in bands]
+        # Même échelle de couleurs pour les vignettes d'un radar
+        values = np.ma.concatenate([panel.ravel() for panel in panels]).compressed()
+        low, high = (np.percentile(values, [2, 98]) if values.size else (0.0, 1.0))
+        high = high if high > low else low + 1.0
+        height = max(panel.shape[0] for panel in panels)
+        strip = [np.full((height, MARGIN, 3), 255, np.uint8)]
+        for panel in panels:
+            image = np.full((height, panel.shape[1], 3), 255, np.uint8)
+            image[:panel.shape[0]] = _colorize(panel, low, high)
+            strip += [image, np.full((height, MARGIN, 3), 255, np.uint8)]
+        strip = np.hstack(strip)
+        chart = _chart(months, strip.shape[1] - 2 * MARGIN)
+        chart = np.hstack([np.full((chart.shape[0], MARGIN, 3), 255, np.uint8), chart,
+                           np.full((chart.shape[0], MARGIN, 3), 255, np.uint8)])
+        blocks += [np.full((MARGIN, strip.shape[1], 3), 255, np.uint8), strip,
+                   np.full((MARGIN, strip.shape[1], 3), 255, np.uint8), chart]
+
+    width = max(block.shape[1] for block in blocks)
+    blocks = [np.hstack([block, np.full((block.shape[0], width - block.shape[1], 3), 255, np.uint8)])
+              for block in blocks] + [np.full((MARGIN, width, 3), 255, np.uint8)]
+    return png_bytes(np.vstack(blocks))
+
+
+def load_results_summary(name: str) -> Optional[Dict]:
+    """Résumé JSON des statistiques d'un camp, None s'il n'a pas encore été analysé"""
+    try:
+        with open(os.path.join(BASE_DIR, get_results_summary_path(name)), 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def analyze_camp(name: str, sources: List[Tuple[str, str]], force: bool = False) -> Tuple[str, int, bool]:
+    """Analyser les .tif (fichier, radar) d'un camp, retourner (nom, mois analysés, image écrite)"""
+    summary_file = os.path.join(BASE_DIR, get_results_summary_path(name))
+    image_file = os.path.join(BASE_DIR, get_results_path(name))
+    previous = None if force else load_results_summary(name)
+    summary = {"camp": name, "unit": "dB" if ANALYTICS_CONFIG["decibels"] else "valeur", "radars": {}}
+    analyzed, rows = 0, []
+
+    for filename, radar in sources:
+        source = os.path.join(TIF_DIR, filename)
+        with rasterio.open(source) as src:
+            geometry = _geometry(src, filename)
+            labels = _month_labels(src)
+            cached = (previous or {}).get("radars", {}).get(radar)
+            months = _cached_months(cached, geometry, labels)
+            reused = len(months)
+            if reused < src.count:
+                months = months + _month_statistics(src, reused)
+                analyzed += src.count - reused
+        summary["radars"][radar] = {
+            "source": geometry,
+            "config": {key: ANALYTICS_CONFIG[key] for key in STATISTICS_KEYS},
+            "months": months
+        }
+        rows.append((source, months))
+
+    # Une image de résultats existante qui n'a pas été produite par cette analyse est conservée
+    generated = bool(previous and previous.get("image_generated"))
+    handmade = not force and not generated and os.path.exists(image_file)
+    summary["image_generated"] = not handmade
+    draw = not handmade and (analyzed or previous != summary or not os.path.exists(image_file))
+    if draw:
+        image = _render_results(rows)
+        atomic_write(image_file, lambda file: file.write(image), binary=True)
+    if summary != previous:
+        atomic_write(summary_file, lambda file: json.dump(summary, file, indent=2, ensure_ascii=False))
+    return name, analyzed, bool(draw)
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    """Nombre de processus effectif (None : ANALYTICS_CONFIG["workers"], 0 : un par cœur)"""
+    if workers is None:
+        workers = ANALYTICS_CONFIG["workers"]
+    if workers < 0:
+        raise ValueError(f"Nombre de processus invalide: {workers}")
+    return workers or os.cpu_count() or 1
+
+
+def analyze_camps(names: List[str] = None, workers: int = None, force: bool = False) -> Dict[str, int]:
+    """Analyser les camps ayant des .tif (tous, ou ceux de names), retourner {camp: mois analysés}"""
+    if rasterio is None:
+        print("❌ rasterio n'est pas installé : pip install rasterio")
+        return {}
+    if not os.path.isdir(TIF_DIR):
+        return {}
+    camps: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+    for filename, name, radar in tif_sources():
+        if names is None or name in names:
+            camps[name].append((filename, radar))
+    if not camps:
+        print(f"ℹ️ Aucun .tif à analyser dans {TIF_DIR}")
+        return {}
+
+    workers = min(resolve_workers(workers), len(camps))
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    results = {}
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as executor:
+            futures = [executor.submit(analyze_camp, name, sources, force) for name, sources in sorted(camps.items())]
+            outcomes = [future.result() for future in futures]
+    else:
+        outcomes = [analyze_camp(name, sources, force) for name, sources in sorted(camps.items())]
+
+    for name, analyzed, drawn in outcomes:
+        results[name] = analyzed
+        if analyzed or drawn:
+            print(f"📊 {name} : {analyzed} mois analysé(s)" + (f", image {get_results_path(name)}" if drawn else ""))
+    print(f"✅ {len(camps)} camp(s) à jour, {sum(results.values())} mois analysé(s)")
+    return results
@@ -0,0 +1,160 @@
+# src/assets.py
+"""
+Manifeste des assets
+Les dossiers d'assets sont parcourus en parallèle ; chaque fichier est
+décrit par sa taille, sa date et son empreinte SHA-256, recalculée
+seulement si la taille ou la date a changé. Les assets sont publiés dans
+output/assets/ sous un nom contenant leur empreinte : la carte ne renvoie
+qu'aux fichiers existants, et un fichier publié ne change jamais de contenu.
+"""
+
+import json
+import os
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+from .config import *
+from .journal import atomic_write
+from .previews import file_sha256, load_preview_manifest
+from .rasters import load_raster_manifest
+
+
+def _relative(filename: str) -> str:
+    """Chemin d'un fichier relatif à la racine du projet, avec des /"""
+    return os.path.relpath(filename, BASE_DIR).replace(os.sep, "/")
+
+
+def _list_files(directory: str) -> List[Tuple[str, os.stat_result]]:
+    """Fichiers d'un dossier d'assets (récursivement), hors manifestes"""
+    files = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            filename = os.path.join(root, name)
+            if name.startswith(".") or filename in (ASSET_MANIFEST, PREVIEW_MANIFEST, RASTER_MANIFEST):
+                continue
+            files.append((_relative(filename), os.stat(filename)))
+    return files
+
+
+def _path_pattern(path: str) -> re.Pattern:
+    """Expression reconnaissant les chemins produits par get_*_path, avec les champs {name} et {radar}"""
+    pattern = re.escape(path)
+    pattern = pattern.replace(re.escape("{name}"), r"(?P<name>.+)")
+    pattern = pattern.replace(re.escape("{radar}"), "(?P<radar>" + "|".join(map(re.escape, RADAR_TYPES)) + ")")
+    return re.compile(pattern + r"\Z")
+
+
+class AssetManifest:
+    """Taille, date et empreinte des assets ({chemin relatif: {"size", "mtime_ns", "sha256"}})"""
+
+    def __init__(self, path: str = None):
+        self.path = path or ASSET_MANIFEST
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                self.files: Dict[str, Dict] = json.load(file)
+        except (OSError, ValueError):
+            self.files = {}
+
+    def scan(self, workers: int = None) -> int:
+        """Mettre le manifeste à jour (en parallèle) et l'enregistrer s'il a changé, retourner le nombre de fichiers hachés"""
+        directories = [directory for directory in ASSET_SCAN_DIRS if os.path.isdir(directory)]
+        with ThreadPoolExecutor(workers or ASSET_SCAN_WORKERS) as executor:
+            listed = [entry for files in executor.map(_list_files, directories) for entry in files]
+            files, changed = {}, []
+            for relative, stat in listed:
+                entry = self.files.get(relative)
+                if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                    files[relative] = entry
+                else:
+                    changed.append((relative, stat))
+            hashes = executor.map(file_sha256, [os.path.join(BASE_DIR, relative) for relative, _ in changed])
+            for (relative, stat), sha256 in zip(changed, hashes):
+                files[relative] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}
+
+        if files != self.files:
+            self.files = files
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            atomic_write(self.path, lambda file: json.dump(files, file, indent=2, sort_keys=True, ensure_ascii=False))
+        return len(changed)
+
+    def exists(self, relative: str) -> bool:
+        return relative in self.files
+
+    def published_name(self, relative: str) -> str:
+        """Chemin publié, relatif à output/ : assets/img_TIF/Mbera.gif -> assets/img_TIF/Mbera.3f2a1c9d0e.gif"""
+        stem, extension = os.path.splitext(relative)
+        return f"{stem}.{self.files[relative]['sha256'][:ASSET_HASH_LENGTH]}{extension}"
+
+    def url(self, relative: str) -> Optional[str]:
+        """URL de l'asset publié depuis une carte de output/, None s'il n'existe pas"""
+        if relative not in self.files:
+            return None
+        return quote(self.published_name(relative))
+
+    def publish(self) -> int:
+        """Publier les assets dans output/ (lien physique, ou copie) et supprimer les anciennes versions
+
+        Retourne le nombre de fichiers publiés.
+        """
+        published = {os.path.join(OUTPUT_DIR, self.published_name(relative)): relative for relative in self.files}
+        count = 0
+        for target, relative in published.items():
+            if os.path.exists(target):
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            source = os.path.join(BASE_DIR, relative)
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copy2(source, target)
+            count += 1
+
+        for root, _, names in os.walk(PUBLISHED_ASSETS_DIR):
+            for name in names:
+                filename = os.path.join(root, name)
+                if filename not in published:
+                    os.remove(filename)
+        return count
+
+    def icon_urls(self) -> Dict[str, Optional[str]]:
+        """URL publiée de l'icône de chaque type"""
+        return {icon_type: self.url(get_icon_path(icon_type)) for icon_type in ICON_CONFIG}
+
+    def camp_assets(self) -> Dict[str, Dict]:
+        """URLs publiées des assets existants, par camp
+
+        {nom: {"gif", "results", "thumbnail", "webp", "mp4": url, "tif": {radar: url}}} ;
+        un camp sans aucun asset n'apparaît pas, un asset manquant n'a pas de clé.
+        Le .tif proposé est sa version COG (compressée) quand elle existe.
+        """
+        patterns = {
+            "gif": _path_pattern(get_gif_path("{name}")),
+            "results": _path_pattern(get_results_path("{name}")),
+            "tif": _path_pattern(get_tif_path("{name}", "{radar}"))
+        }
+        camps: Dict[str, Dict] = {}
+        for relative in sorted(self.files):
+            for kind, pattern in patterns.items():
+                match = pattern.match(relative)
+                if match is None:
+                    continue
+                assets = camps.setdefault(match.group("name"), {})
+                if kind == "tif":
+                    assets.setdefault("tif", {})[match.group("radar")] = self.url(relative)
+                else:
+                    assets[kind] = self.url(relative)
+                break
+
+        for name, entry in load_preview_manifest().items():
+            for kind, output in entry["outputs"].items():
+                relative = _relative(os.path.join(PREVIEWS_DIR, output))
+                if relative in self.files:
+                    camps.setdefault(name, {})[kind] = self.url(relative)
+
+        for entry in load_raster_manifest().values():
+            relative = _relative(os.path.join(RASTERS_DIR, entry["cog"]))
+            if relative in self.files:
+                camps.setdefault(entry["name"], {}).setdefault("tif", {})[entry["radar"]] = self.url(relative)
+        return camps
@@ -4,39 +4,124 @@ Gestionnaire des camps de réfugiés
 Gère l'ajout, la suppression, la sauvegarde et le chargement des camps
 """
 
+import gc
 import json
 import csv
-from typing import List, Dict, Optional
+import os
+from collections import abc
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
 from .config import *
+from .csv_importer import CsvBulkImporter, ImportReport
+from .camp_store import (CampStore, ICON_CODES, ICON_TYPES, check_coordinates, check_name,
+                         encode_icon_type, encode_radar)
+from .spatial_index import SpatialIndex, haversine_km, radius_bbox
+from .journal import CampJournal, atomic_write, journal_path_for
+from .metrics import metrics
+from .snapshot import is_snapshot_file, read_snapshot, write_snapshot
+from .storage import CampBackend, backend_for
+
+@contextmanager
+def gc_paused():
+    """Suspendre le ramasse-miettes pendant un chargement massif
+    
+    Les milliers de dictionnaires créés par json.load ou csv déclenchent sinon
+    des collectes complètes répétées, sans rien à libérer.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+# Champs d'un camp, dans l'ordre des arguments de add_camp()
+CAMP_FIELDS = ("name", "latitude", "longitude", "population", "radar", "icon_type")
+
+# Erreurs affichées au plus lorsqu'un lot est refusé (toutes sont retournées dans errors)
+BATCH_ERRORS_SHOWN = 10
+
 
 class Camp:
-    """Représente un camp de réfugiés"""
+    """Représente un camp de réfugiés
+    
+    Un camp est une vue (sans __dict__) sur une ligne d'un CampStore : les
+    attributs sont lus et écrits directement dans les colonnes du stockage.
+    """
+    
+    __slots__ = ("_store", "_row")
     
     def __init__(self, name: str, latitude: float, longitude: float, 
                  population: str = "N/A", radar: str = "VH", icon_type: str = "blue"):
-        self.name = name
-        self.latitude = latitude
-        self.longitude = longitude
-        self.population = population
-        self.radar = radar
-        self.icon_type = icon_type
-        
-        # Validation
-        self._validate()
+        # Un camp créé directement possède son propre stockage d'une ligne
+        # (la validation est faite à l'ajout dans le stockage)
+        self._store = CampStore()
+        self._row = self._store.append(name, latitude, longitude, population, radar, icon_type)
+    
+    @classmethod
+    def _view(cls, store: CampStore, row: int) -> 'Camp':
+        """Créer une vue sur une ligne existante d'un stockage"""
+        camp = cls.__new__(cls)
+        camp._store = store
+        camp._row = row
+        return camp
+    
+    @property
+    def name(self) -> str:
+        return self._store.names[self._row]
+    
+    @name.setter
+    def name(self, value: str) -> None:
+        self._store.names[self._row] = check_name(value)
+    
+    @property
+    def latitude(self) -> float:
+        return self._store.latitudes[self._row]
+    
+    @latitude.setter
+    def latitude(self, value: float) -> None:
+        check_coordinates(self.name, value, 0.0)
+        self._store.latitudes[self._row] = value
+    
+    @property
+    def longitude(self) -> float:
+        return self._store.longitudes[self._row]
+    
+    @longitude.setter
+    def longitude(self, value: float) -> None:
+        check_coordinates(self.name, 0.0, value)
+        self._store.longitudes[self._row] = value
+    
+    @property
+    def population(self) -> str:
+        return self._store.population(self._row)
+    
+    @population.setter
+    def population(self, value: str) -> None:
+        self._store.set_population(self._row, value)
+    
+    @property
+    def radar(self) -> str:
+        return RADAR_TYPES[self._store.radars[self._row]]
+    
+    @radar.setter
+    def radar(self, value: str) -> None:
+        self._store.radars[self._row] = encode_radar(value)
+    
+    @property
+    def icon_type(self) -> str:
+        return ICON_TYPES[self._store.icon_types[self._row]]
+    
+    @icon_type.setter
+    def icon_type(self, value: str) -> None:
+        self._store.icon_types[self._row] = encode_icon_type(value)
     
     def _validate(self):
         """Valider les données du camp"""
-        if not self.name or not self.name.strip():
-            raise ValueError("Le nom du camp est requis")
-        
-        if not isinstance(self.latitude, (int, float)) or not isinstance(self.longitude, (int, float)):
-            raise ValueError(f"Coordonnées invalides pour {self.name}")
-        
-        if self.radar not in RADAR_TYPES:
-            raise ValueError(f"Type de radar invalide: {self.radar}. Valeurs acceptées: {RADAR_TYPES}")
-        
-        if self.icon_type not in ICON_CONFIG:
-            raise ValueError(f"Type d'icône invalide: {self.icon_type}. Valeurs acceptées: {list(ICON_CONFIG.keys())}")
+        # Les valeurs sont vérifiées à l'écriture ; il ne reste qu'à contrôler le nom
+        check_name(self.name)
     
     def to_dict(self) -> Dict:
         """Convertir le camp en dictionnaire"""
@@ -64,29 +149,305 @@ class Camp:
             icon_type=data.get("icon_type", "blue")
         )
     
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Camp):
+            return NotImplemented
+        return self._store is other._store and self._row == other._row
+    
+    def __hash__(self) -> int:
+        return hash((id(self._store), self._row))
+    
     def __str__(self) -> str:
         return f"Camp({self.name}, {self.latitude}, {self.longitude})"
 
 
+class ReadOnlyCamp(Camp):
+    """Camp lu dans une base de données (copie détachée) : ses attributs ne peuvent pas être modifiés
+    
+    Une écriture sur la copie n'atteindrait pas la base ; passer par
+    CampManager.update_camp() ou update_camps().
+    """
+    
+    __slots__ = ()
+    
+    def __setattr__(self, key, value):
+        if key in CAMP_FIELDS:
+            raise AttributeError(f"Camp '{self.name}' lu dans la base : le modifier avec update_camp()")
+        super().__setattr__(key, value)
+
+
+def camp_fields(camp) -> Dict:
+    """Champs d'un camp à ajouter : dictionnaire, Camp ou séquence dans l'ordre de add_camp()"""
+    if isinstance(camp, Camp):
+        return {field: getattr(camp, field) for field in CAMP_FIELDS}
+    if isinstance(camp, abc.Mapping):
+        unknown = set(camp) - set(CAMP_FIELDS)
+        if unknown:
+            raise ValueError(f"Champs inconnus : {', '.join(sorted(map(str, unknown)))}")
+        fields = dict(camp)
+    elif isinstance(camp, (str, bytes)) or not isinstance(camp, abc.Iterable):
+        raise TypeError("Camp attendu sous forme de dictionnaire ou de séquence")
+    else:
+        values = tuple(camp)
+        if len(values) > len(CAMP_FIELDS):
+            raise ValueError(f"{len(values)} valeurs pour {len(CAMP_FIELDS)} champs")
+        fields = dict(zip(CAMP_FIELDS, values))
+    for field in CAMP_FIELDS[:3]:
+        if field not in fields:
+            raise ValueError(f"Champ manquant : {field}")
+    return fields
+
+
+def report_batch_errors(problems: List[Dict], errors: Optional[List[Dict]] = None) -> bool:
+    """Afficher les erreurs d'un lot refusé (et les ajouter à errors si fourni), retourner False"""
+    problems.sort(key=lambda problem: problem["index"])
+    print(f"❌ Lot refusé, aucun camp modifié : {len(problems)} erreur(s)")
+    for problem in problems[:BATCH_ERRORS_SHOWN]:
+        name = f" {problem['name']}" if problem["name"] is not None else ""
+        print(f"   • n°{problem['index']}{name} : {problem['error']}")
+    if len(problems) > BATCH_ERRORS_SHOWN:
+        print(f"   … et {len(problems) - BATCH_ERRORS_SHOWN} autre(s)")
+    if errors is not None:
+        errors.extend(problems)
+    metrics.count("batches_refused")
+    return False
+
+
+def _batch_name(camp) -> Optional[str]:
+    """Nom d'un élément de lot pour les messages d'erreur (None s'il n'en a pas)"""
+    try:
+        if isinstance(camp, abc.Mapping):
+            return camp.get("name")
+        if isinstance(camp, Camp):
+            return camp.name
+        if isinstance(camp, (list, tuple)) and camp:
+            return camp[0]
+    except Exception:
+        pass
+    return None
+
+
+def _batch_error(position: int, name: Optional[str], error) -> Dict:
+    """Erreur d'un élément de lot (position dans le lot, nom du camp, message)"""
+    return {"index": position, "name": name, "error": str(error)}
+
+
+def _stage_update(staged: CampStore, camp: Camp, changes: Dict) -> Camp:
+    """Copier un camp dans staged et lui appliquer les modifications (TypeError/ValueError si invalide)"""
+    copy = Camp._view(staged, staged.append(*(getattr(camp, field) for field in CAMP_FIELDS)))
+    for key, value in changes.items():
+        if key in CAMP_FIELDS:
+            setattr(copy, key, value)
+    copy._validate()
+    return copy
+
+
 class CampManager:
     """Gestionnaire principal des camps"""
     
-    def __init__(self):
-        self.camps: List[Camp] = []
+    def __init__(self, quiet: bool = False):
+        # quiet : ne pas afficher un message par camp ajouté, modifié ou supprimé
+        # (les imports en masse passent sinon une bonne partie de leur temps à écrire)
+        self.quiet = quiet
+        
+        # Les camps sont rangés en colonnes dans un CampStore ; une suppression
+        # marque la ligne comme morte (O(1)) en conservant l'ordre d'insertion.
+        # L'index nom -> ligne est tenu à jour à chaque mutation.
+        self._store = CampStore()
+        self._index: Dict[str, int] = {}
+        self._camps_cache: Optional[List[Camp]] = None
+        self._spatial: Optional[SpatialIndex] = None  # construit à la première requête géographique
+        
+        # Journal des modifications du fichier chargé : les entrées en attente sont
+        # ajoutées au journal par save ; None = réécriture complète nécessaire
+        self._journal: Optional[CampJournal] = None
+        self._snapshot_file: Optional[str] = None
+        self._snapshot_size = 0
+        self._pending: Optional[List[Dict]] = []
+        
+        # Base de données ouverte par load() (SQLite) : les camps restent dans la base,
+        # le stockage et les index en mémoire n'en sont qu'une copie chargée à la demande
+        self._backend: Optional[CampBackend] = None
+        self._mirrored = False
         ensure_directories()
     
+    @property
+    def camps(self) -> List[Camp]:
+        """Liste ordonnée des camps (instantané en lecture seule)"""
+        self._sync()
+        if self._camps_cache is None:
+            store, alive, view = self._store, self._store.alive, self._view
+            self._camps_cache = [view(store, row) for row in range(len(store)) if alive[row]]
+        return self._camps_cache
+    
+    @camps.setter
+    def camps(self, camps: List[Camp]) -> None:
+        """Remplacer l'ensemble des camps (copiés dans un nouveau stockage) et reconstruire les index"""
+        with self.transaction():
+            self._replace_all(camps)
+            if self._backend is not None:
+                self._backend.replace_all(self._store)
+                self._mirrored = True
+        self._pending = None
+    
+    def _replace_all(self, camps: List[Camp]) -> None:
+        """Recopier une liste de camps dans un nouveau stockage"""
+        camps = list(camps)
+        self._reset()
+        self._extend([camp.name for camp in camps], [camp.latitude for camp in camps],
+                     [camp.longitude for camp in camps], [camp.population for camp in camps],
+                     [camp.radar for camp in camps], [camp.icon_type for camp in camps])
+    
+    def _reset(self) -> None:
+        """Repartir d'un stockage vide (les vues existantes restent sur l'ancien)"""
+        self._store = CampStore()
+        self._index = {}
+        self._camps_cache = None
+        self._spatial = None
+    
+    def _append(self, name: str, latitude: float, longitude: float,
+                population: str, radar: str, icon_type: str) -> int:
+        """Valider et ajouter une ligne au stockage, puis l'indexer"""
+        row = self._store.append(name, latitude, longitude, population, radar, icon_type)
+        self._index[self._store.names[row]] = row
+        if self._spatial is not None:
+            self._spatial.insert(row)
+        self._camps_cache = None
+        return row
+    
+    def _extend(self, names: List[str], latitudes: List[float], longitudes: List[float],
+                populations: List, radars: List[str], icon_types: List[str]) -> range:
+        """Valider et ajouter des colonnes entières au stockage, puis les indexer"""
+        rows = self._store.extend(names, latitudes, longitudes, populations, radars, icon_types)
+        self._index_rows(rows)
+        return rows
+    
+    def _index_rows(self, rows: range) -> None:
+        """Indexer des lignes ajoutées à la fin du stockage"""
+        self._index.update(zip(self._store.names[rows.start:rows.stop], rows))
+        if self._spatial is not None:
+            for row in rows:
+                self._spatial.insert(row)
+        self._camps_cache = None
+    
+    def _spatial_index(self) -> SpatialIndex:
+        """Index spatial des lignes vivantes, construit à la demande"""
+        if self._spatial is None:
+            store = self._store
+            self._spatial = SpatialIndex(store.latitudes, store.longitudes, SPATIAL_INDEX_CELL_SIZE)
+            for row in range(len(store)):
+                if store.alive[row]:
+                    self._spatial.insert(row)
+        return self._spatial
+    
+    def _sync(self) -> None:
+        """Charger la copie en mémoire de la base, ou la recharger si un autre processus l'a modifiée"""
+        if self._backend is None:
+            return
+        if self._backend.changed() or not self._mirrored:
+            with gc_paused(), metrics.phase(f"load_from_{self._backend.name}"):
+                store = self._backend.read_all()
+                self._reset()
+                self._store = store
+                self._index = dict(zip(store.names, range(len(store))))
+                self._mirrored = True
+    
+    def _drop_mirror(self) -> None:
+        """Oublier la copie en mémoire de la base (rechargée à la prochaine lecture complète)"""
+        self._reset()
+        self._mirrored = False
+    
+    def _local(self) -> bool:
+        """Les index en mémoire contiennent-ils tous les camps (pas de base, ou copie de la base chargée)"""
+        return self._backend is None or self._mirrored
+    
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Regrouper des modifications
+        
+        Avec une base, elles sont écrites dans une seule transaction : toutes ou
+        aucune, et aucun autre processus ne peut modifier la base entre une
+        lecture et une écriture faites dans le bloc. Sans base, le bloc n'a pas
+        d'effet particulier (la sauvegarde reste à la charge de l'appelant).
+        """
+        if self._backend is None:
+            yield
+            return
+        with self._backend.transaction():
+            # La copie en mémoire n'est mise à jour que si elle est complète et récente
+            if self._mirrored and self._backend.changed():
+                self._drop_mirror()
+            try:
+                yield
+            except BaseException:
+                self._drop_mirror()
+                raise
+    
+    def _exists(self, name: str) -> bool:
+        """Un camp de ce nom existe-t-il (dans la base s'il y en a une)"""
+        if self._local():
+            return name in self._index
+        return self._backend.get(name) is not None
+    
+    def _view(self, store: CampStore, row: int) -> Camp:
+        """Camp retourné aux appelants : en lecture seule s'il y a une base (ReadOnlyCamp)"""
+        return (Camp if self._backend is None else ReadOnlyCamp)._view(store, row)
+    
+    def _views(self, store: CampStore) -> List[Camp]:
+        """Vues sur toutes les lignes d'un résultat de requête"""
+        return [self._view(store, row) for row in range(len(store))]
+    
+    def _compact(self) -> None:
+        """Supprimer les lignes mortes quand elles deviennent majoritaires"""
+        self._replace_all(self.camps)
+    
+    def _record(self, entry: Dict) -> None:
+        """Mémoriser une modification à ajouter au journal lors de la prochaine sauvegarde"""
+        if self._pending is None:
+            return
+        self._pending.append(entry)
+        if len(self._pending) > JOURNAL_COMPACT_ENTRIES:
+            # Trop de modifications : un instantané complet sera plus court
+            self._pending = None
+    
+    def _record_many(self, count: int, entries: Iterable[Dict]) -> None:
+        """Mémoriser un lot de count modifications (entries n'est parcouru que si le journal les garde)"""
+        if count > JOURNAL_COMPACT_ENTRIES:
+            self._pending = None
+        else:
+            for entry in entries:
+                self._record(entry)
+    
+    def _journal_camp(self, row: int) -> Dict:
+        """Représentation d'un camp dans le journal"""
+        camp = Camp._view(self._store, row)
+        return {"name": camp.name, "coords": [camp.latitude, camp.longitude],
+                "population": camp.population, "radar": camp.radar, "icon_type": camp.icon_type}
+    
     def add_camp(self, name: str, latitude: float, longitude: float, 
                  population: str = "N/A", radar: str = "VH", icon_type: str = "blue") -> bool:
         """Ajouter un nouveau camp"""
         try:
-            # Vérifier si le camp existe déjà
-            if self.get_camp_by_name(name):
-                print(f"⚠️ Le camp '{name}' existe déjà. Utilisez update_camp() pour le modifier.")
-                return False
-            
-            camp = Camp(name, latitude, longitude, population, radar, icon_type)
-            self.camps.append(camp)
-            print(MESSAGES["success"]["camp_added"].format(name=name))
+            with self.transaction():
+                # Vérifier si le camp existe déjà
+                if self._exists(name):
+                    print(f"⚠️ Le camp '{name}' existe déjà. Utilisez update_camp() pour le modifier.")
+                    return False
+                
+                if self._local():
+                    store, row = self._store, self._append(name, latitude, longitude, population, radar, icon_type)
+                else:
+                    # Base sans copie en mémoire : valider le camp dans un stockage d'une ligne
+                    store = CampStore()
+                    row = store.append(name, latitude, longitude, population, radar, icon_type)
+                
+                if self._backend is None:
+                    self._record({"op": "add", "camp": self._journal_camp(row)})
+                else:
+                    self._backend.insert(store, [row])
+            metrics.count("camps_added")
+            if not self.quiet:
+                print(MESSAGES["success"]["camp_added"].format(name=name))
             return True
             
         except ValueError as e:
@@ -94,43 +455,281 @@ class CampManager:
             return False
     
     def get_camp_by_name(self, name: str) -> Optional[Camp]:
-        """Trouver un camp par son nom"""
-        for camp in self.camps:
-            if camp.name == name:
-                return camp
-        return None
-    
-    def update_camp(self, name: str, **kwargs) -> bool:
-        """Mettre à jour un camp existant"""
-        camp = self.get_camp_by_name(name)
-        if not camp:
-            print(f"❌ Camp '{name}' introuvable")
-            return False
+        """Trouver un camp par son nom
         
+        Avec une base, le camp est une copie en lecture seule (ReadOnlyCamp) :
+        le modifier avec update_camp().
+        """
+        if self._backend is not None:
+            store = self._backend.get(name)
+            return self._view(store, 0) if store is not None else None
+        return self._find(name)
+    
+    def _find(self, name: str) -> Optional[Camp]:
+        """Camp à modifier : vue sur la copie en mémoire si elle est complète, sinon lu dans la base"""
+        if not self._local():
+            store = self._backend.get(name)
+            return Camp._view(store, 0) if store is not None else None
+        row = self._index.get(name)
+        if row is None:
+            return None
+        return Camp._view(self._store, row)
+    
+    def update_camp(self, name: str, /, **kwargs) -> bool:
+        """Mettre à jour un camp existant (name=... dans kwargs pour le renommer)"""
         try:
-            for key, value in kwargs.items():
-                if hasattr(camp, key):
-                    setattr(camp, key, value)
-            
-            camp._validate()  # Revalider après modification
-            print(f"✅ Camp '{name}' mis à jour")
+            with self.transaction():
+                camp = self._find(name)
+                if not camp:
+                    print(f"❌ Camp '{name}' introuvable")
+                    return False
+                
+                new_name = kwargs.get("name", name)
+                if new_name != name and self._exists(new_name):
+                    print(f"⚠️ Le camp '{new_name}' existe déjà. Renommage impossible.")
+                    return False
+                
+                self._apply_update(camp, kwargs)
+                if self._backend is None:
+                    self._record({"op": "update", "name": name, "changes": self._journal_camp(camp._row)})
+                else:
+                    self._backend.update(name, camp._store, camp._row)
+            metrics.count("camps_updated")
+            if not self.quiet:
+                print(f"✅ Camp '{name}' mis à jour")
             return True
             
-        except ValueError as e:
+        except (TypeError, ValueError) as e:
             print(MESSAGES["error"]["general_error"].format(error=str(e)))
             return False
     
+    def _apply_update(self, camp: Camp, changes: Dict, staged: Optional[Camp] = None) -> None:
+        """Appliquer des modifications à un camp et tenir les index à jour (ValueError si invalide)
+        
+        Les nouvelles valeurs sont d'abord validées sur une copie du camp (staged,
+        déjà préparée par update_camps) : une valeur invalide laisse le camp et ses
+        index intacts.
+        """
+        if staged is None:
+            staged = _stage_update(CampStore(), camp, changes)
+        name = camp.name
+        old_coords = (camp.latitude, camp.longitude)
+        indexed = camp._store is self._store  # Sinon camp lu dans la base, hors des index
+        for key in changes:
+            if key in CAMP_FIELDS:
+                setattr(camp, key, getattr(staged, key))
+        
+        # Réindexer le camp en cas de renommage
+        if indexed and camp.name != name:
+            self._index[camp.name] = self._index.pop(name)
+        
+        # Déplacer le camp dans l'index spatial si ses coordonnées ont changé
+        if indexed and self._spatial is not None and (camp.latitude, camp.longitude) != old_coords:
+            self._spatial.remove(camp._row, *old_coords)
+            self._spatial.insert(camp._row)
+    
     def remove_camp(self, name: str) -> bool:
         """Supprimer un camp"""
-        camp = self.get_camp_by_name(name)
-        if camp:
-            self.camps.remove(camp)
-            print(MESSAGES["info"]["camp_removed"].format(name=name))
+        with self.transaction():
+            removed = self._remove(name)
+        if removed:
+            self._record({"op": "remove", "name": name})
+            metrics.count("camps_removed")
+            if not self.quiet:
+                print(MESSAGES["info"]["camp_removed"].format(name=name))
             return True
         else:
             print(f"❌ Camp '{name}' introuvable")
             return False
     
+    def _remove(self, name: str) -> bool:
+        """Supprimer un camp de la base éventuelle, marquer sa ligne comme supprimée et le retirer des index"""
+        if self._backend is not None:
+            if not self._backend.delete(name):
+                return False
+            if not self._mirrored:
+                return True
+        row = self._index.pop(name, None)
+        if row is None:
+            return False
+        self._store.alive[row] = 0
+        if self._spatial is not None:
+            self._spatial.remove(row)
+        self._camps_cache = None
+        if len(self._store) > 2 * len(self._index) + 64:
+            self._compact()
+        return True
+    
+    def add_camps(self, camps: Iterable, save: bool = True, errors: List[Dict] = None) -> bool:
+        """Ajouter un lot de camps : tous ou aucun
+        
+        Chaque camp est un dictionnaire (clés de CAMP_FIELDS), un Camp ou une
+        séquence dans l'ordre des arguments de add_camp(). Tout le lot est validé
+        avant la moindre modification : à la première erreur (valeur invalide, nom
+        en double ou déjà existant), rien n'est ajouté, les erreurs sont affichées
+        (et ajoutées à errors si fourni) et la méthode retourne False. Sinon les
+        camps sont ajoutés et indexés en un bloc, puis sauvegardés une seule fois
+        (save=False : sauvegarde à la charge de l'appelant).
+        """
+        with gc_paused(), metrics.phase("add_camps"), self.transaction():
+            staged = CampStore()
+            problems, positions = [], {}
+            for position, camp in enumerate(camps):
+                name = _batch_name(camp)
+                try:
+                    fields = camp_fields(camp)
+                    staged.append(**fields)
+                except (TypeError, ValueError) as e:
+                    problems.append(_batch_error(position, name, e))
+                    continue
+                name = fields["name"]
+                if name in positions:
+                    problems.append(_batch_error(position, name, "Nom en double dans le lot"))
+                else:
+                    positions[name] = position
+            for name in self._existing(positions):
+                problems.append(_batch_error(positions[name], name, "Le camp existe déjà"))
+            if problems:
+                return report_batch_errors(problems, errors)
+            
+            if self._local():
+                rows = self._store.append_store(staged)
+                self._index_rows(rows)
+                if self._backend is None:
+                    self._record_many(len(rows), ({"op": "add", "camp": self._journal_camp(row)} for row in rows))
+            if self._backend is not None:
+                self._backend.insert(staged, range(len(staged)))
+        
+        metrics.count("camps_added", len(staged))
+        print(f"✅ {len(staged)} camps ajoutés")
+        return self.save() if save else True
+    
+    def update_camps(self, updates, save: bool = True, errors: List[Dict] = None) -> bool:
+        """Modifier un lot de camps : tous ou aucun
+        
+        updates associe à chaque nom les champs à modifier, sous forme de
+        dictionnaire ({"Camp A": {"population": 12000}}) ou de couples (nom,
+        champs) ; un champ name renomme le camp. Comme pour add_camps(), tout le
+        lot est validé d'abord (camp introuvable ou modifié deux fois, champ
+        inconnu, valeur invalide, nouveau nom déjà pris) et n'est appliqué que
+        s'il ne contient aucune erreur, puis sauvegardé une seule fois.
+        """
+        items = updates.items() if isinstance(updates, abc.Mapping) else updates
+        with gc_paused(), metrics.phase("update_camps"), self.transaction():
+            problems, parsed = [], []
+            for position, item in enumerate(items):
+                try:
+                    name, changes = item
+                    if not isinstance(name, str) or not isinstance(changes, abc.Mapping):
+                        raise TypeError
+                except (TypeError, ValueError):
+                    problems.append(_batch_error(position, None, "Couple (nom, champs) attendu"))
+                    continue
+                unknown = set(changes) - set(CAMP_FIELDS)
+                if unknown:
+                    problems.append(_batch_error(position, name, f"Champs inconnus : {', '.join(sorted(map(str, unknown)))}"))
+                    continue
+                parsed.append((position, name, changes))
+            
+            # Camps modifiés et noms visés par les renommages, lus en une fois
+            current = self._lookup({name for _, name, _ in parsed}
+                                   | {changes["name"] for _, _, changes in parsed if "name" in changes})
+            
+            # Chaque camp est modifié sur une copie de sa ligne pour valider les nouvelles valeurs
+            staged, plan, targets, new_names = CampStore(), [], set(), set()
+            for position, name, changes in parsed:
+                camp = current.get(name)
+                if camp is None:
+                    problems.append(_batch_error(position, name, "Camp introuvable"))
+                    continue
+                if name in targets:
+                    problems.append(_batch_error(position, name, "Camp modifié deux fois dans le lot"))
+                    continue
+                targets.add(name)
+                new_name = changes.get("name", name)
+                if new_name != name and new_name in current:
+                    problems.append(_batch_error(position, name, f"Le camp '{new_name}' existe déjà"))
+                    continue
+                if new_name in new_names:
+                    problems.append(_batch_error(position, name, f"Nom '{new_name}' déjà utilisé dans le lot"))
+                    continue
+                try:
+                    copy = _stage_update(staged, camp, changes)
+                except (TypeError, ValueError) as e:
+                    problems.append(_batch_error(position, name, e))
+                    continue
+                new_names.add(new_name)
+                plan.append((name, camp, copy._row, changes))
+            if problems:
+                return report_batch_errors(problems, errors)
+            
+            if self._local():
+                if len(plan) > len(self._index) // 4:
+                    # Beaucoup de camps modifiés : index spatial reconstruit en une fois à la prochaine requête
+                    self._spatial = None
+                for name, camp, row, changes in plan:
+                    self._apply_update(camp, changes, Camp._view(staged, row))
+                if self._backend is None:
+                    self._record_many(len(plan), ({"op": "update", "name": name,
+                                                   "changes": self._journal_camp(camp._row)}
+                                                  for name, camp, _, _ in plan))
+            if self._backend is not None:
+                self._backend.update_many(staged, [(name, row) for name, _, row, _ in plan])
+        
+        metrics.count("camps_updated", len(plan))
+        print(f"✅ {len(plan)} camps mis à jour")
+        return self.save() if save else True
+    
+    def remove_camps(self, names: Iterable[str], save: bool = True, errors: List[Dict] = None) -> bool:
+        """Supprimer un lot de camps : tous ou aucun (un camp introuvable ou cité deux fois refuse le lot)"""
+        names = list(names)
+        with metrics.phase("remove_camps"), self.transaction():
+            existing = self._existing(name for name in names if isinstance(name, str))
+            problems, seen = [], set()
+            for position, name in enumerate(names):
+                if not isinstance(name, str):
+                    problems.append(_batch_error(position, None, "Nom de camp attendu"))
+                    continue
+                if name in seen:
+                    problems.append(_batch_error(position, name, "Nom en double dans le lot"))
+                elif name not in existing:
+                    problems.append(_batch_error(position, name, "Camp introuvable"))
+                seen.add(name)
+            if problems:
+                return report_batch_errors(problems, errors)
+            
+            if self._backend is not None:
+                self._backend.delete_many(names)
+            if self._local():
+                alive = self._store.alive
+                for name in names:
+                    row = self._index.pop(name)
+                    alive[row] = 0
+                    if self._spatial is not None:
+                        self._spatial.remove(row)
+                self._camps_cache = None
+                if len(self._store) > 2 * len(self._index) + 64:
+                    self._compact()
+                if self._backend is None:
+                    self._record_many(len(names), ({"op": "remove", "name": name} for name in names))
+        
+        metrics.count("camps_removed", len(names))
+        print(f"✅ {len(names)} camps supprimés")
+        return self.save() if save else True
+    
+    def _existing(self, names: Iterable[str]) -> set:
+        """Noms de camps existants parmi names (une seule lecture de la base s'il y en a une)"""
+        if self._local():
+            return {name for name in names if name in self._index}
+        return set(self._backend.get_many(names).names)
+    
+    def _lookup(self, names: Iterable[str]) -> Dict[str, Camp]:
+        """Camps existants parmi names, par nom : vues sur la copie en mémoire, sinon lus dans la base"""
+        if self._local():
+            return {name: Camp._view(self._store, self._index[name]) for name in names if name in self._index}
+        store = self._backend.get_many(names)
+        return {store.names[row]: Camp._view(store, row) for row in range(len(store))}
+    
     def list_camps(self) -> None:
         """Afficher la liste des camps"""
         if not self.camps:
@@ -148,54 +747,241 @@ class CampManager:
     
     def get_camps_count(self) -> int:
         """Retourner le nombre de camps"""
-        return len(self.camps)
+        if self._backend is not None:
+            return self._backend.count()
+        return len(self._index)
+    
+    def content_hash(self) -> str:
+        """Empreinte de l'ensemble des camps, sans parcourir les camps un à un"""
+        self._sync()
+        return self._store.digest()
     
     def get_camps_by_icon_type(self, icon_type: str) -> List[Camp]:
         """Retourner les camps d'un type d'icône donné"""
-        return [camp for camp in self.camps if camp.icon_type == icon_type]
+        if self._backend is not None:
+            return self._views(self._backend.query_field("icon_type", icon_type))
+        code = ICON_CODES.get(icon_type)
+        store = self._store
+        return [Camp._view(store, row) for row in range(len(store))
+                if store.alive[row] and store.icon_types[row] == code]
     
-    def save_to_json(self, filename: str = None) -> bool:
-        """Sauvegarder les camps au format JSON"""
+    def camps_in_bbox(self, south: float, west: float, north: float, east: float) -> List[Camp]:
+        """Retourner les camps situés dans un rectangle géographique (ordre de la liste)"""
+        if self._backend is not None:
+            return self._views(self._backend.query_bbox(south, west, north, east))
+        return [Camp._view(self._store, row) for row in self._spatial_index().query_bbox(south, west, north, east)]
+    
+    def camps_within_km(self, latitude: float, longitude: float, radius_km: float) -> List[Camp]:
+        """Retourner les camps situés à moins de radius_km d'un point, du plus proche au plus lointain"""
+        if self._backend is not None:
+            # Rectangle englobant sélectionné par la base, distance exacte calculée ici
+            store = self._backend.query_bbox(*radius_bbox(latitude, longitude, radius_km))
+            found = sorted((haversine_km(latitude, longitude, store.latitudes[row], store.longitudes[row]), row)
+                           for row in range(len(store)))
+            return [self._view(store, row) for distance, row in found if distance <= radius_km]
+        return [Camp._view(self._store, row) for _, row in self._spatial_index().query_radius(latitude, longitude, radius_km)]
+    
+    def nearest(self, latitude: float, longitude: float, k: int = 1) -> List[Camp]:
+        """Retourner les k camps les plus proches d'un point, du plus proche au plus lointain"""
+        self._sync()  # Avec une base : index spatial de la copie en mémoire
+        return [self._view(self._store, row) for _, row in self._spatial_index().nearest(latitude, longitude, k)]
+    
+    def save(self, filename: str = None) -> bool:
+        """Sauvegarder les camps dans le fichier de données actif (JSON, binaire ou base selon l'extension)
+        
+        Pour le fichier chargé, seules les modifications sont ajoutées à son journal
+        (coût indépendant du nombre de camps) ; l'instantané complet n'est réécrit
+        que lorsque le journal devient trop long, ou pour un autre fichier. Une base
+        ouverte par load() n'a rien à sauvegarder : chaque modification y est déjà
+        écrite ; une autre base reçoit une copie complète des camps.
+        """
         if filename is None:
-            filename = CAMPS_JSON_FILE
+            filename = (self._backend.path if self._backend is not None else
+                        self._snapshot_file or get_camps_data_file())
+        backend_class = backend_for(filename)
         
         try:
+            if self._backend is not None and self._backend.path == os.path.abspath(filename):
+                pass
+            elif backend_class is not None:
+                self._sync()
+                with metrics.phase(f"save_to_{backend_class.name}"):
+                    backend = backend_class(filename, create=True)
+                    try:
+                        backend.replace_all(self._store)
+                    finally:
+                        backend.close()
+            else:
+                self._sync()
+                with metrics.phase("save_to_snapshot" if is_snapshot_file(filename) else "save_to_json"):
+                    if (self._journal is not None and self._pending is not None
+                            and self._snapshot_file == os.path.abspath(filename)):
+                        journal_size = self._journal.size()
+                        self._journal.append(self._pending)
+                        self._pending = []
+                        metrics.count("bytes_written", self._journal.size() - journal_size)
+                        if (self._journal.entry_count > JOURNAL_COMPACT_ENTRIES
+                                or self._journal.size() > max(self._snapshot_size, JOURNAL_MIN_COMPACT_BYTES)):
+                            self._write_snapshot(filename)
+                    else:
+                        self._write_snapshot(filename)
+            
+            print(MESSAGES["success"]["data_saved"].format(file=filename))
+            return True
+            
+        except Exception as e:
+            print(MESSAGES["error"]["general_error"].format(error=str(e)))
+            return False
+    
+    def save_to_json(self, filename: str = None) -> bool:
+        """Sauvegarder les camps au format JSON"""
+        return self.save(filename or CAMPS_JSON_FILE)
+    
+    def save_to_snapshot(self, filename: str = None) -> bool:
+        """Sauvegarder les camps au format binaire"""
+        return self.save(filename or CAMPS_SNAPSHOT_FILE)
+    
+    def _write_snapshot(self, filename: str) -> None:
+        """Écrire l'instantané complet de façon atomique puis vider son journal
+        
+        L'instantané mémorise le numéro de la dernière entrée de journal qu'il
+        contient : si l'écriture est interrompue avant le vidage du journal, ces
+        entrées sont ignorées au prochain chargement.
+        """
+        filename = os.path.abspath(filename)
+        if self._journal is not None and self._snapshot_file == filename:
+            journal = self._journal
+        else:
+            journal = CampJournal(journal_path_for(filename), fsync=JOURNAL_FSYNC)
+            for _ in journal.replay(0):
+                pass  # Lire seulement le dernier numéro de séquence existant
+        
+        if is_snapshot_file(filename):
+            write_snapshot(self._store, filename, journal.last_seq)
+        else:
             data = {
                 "camps": [camp.to_dict() for camp in self.camps],
                 "metadata": {
-                    "total_camps": len(self.camps),
-                    "version": "1.0"
+                    "total_camps": len(self._index),
+                    "version": "1.0",
+                    "journal_seq": journal.last_seq
                 }
             }
+            atomic_write(filename, lambda file: json.dump(data, file, indent=2, ensure_ascii=False))
+        journal.reset()
+        
+        self._journal = journal
+        self._snapshot_file = filename
+        self._snapshot_size = os.path.getsize(filename)
+        metrics.count("bytes_written", self._snapshot_size)
+        self._pending = []
+    
+    def load(self, filename: str = None, trusted: bool = False) -> bool:
+        """Charger les camps depuis le fichier de données actif (base SQLite, binaire ou JSON)"""
+        if filename is None:
+            filename = get_camps_data_file()
+        if backend_for(filename) is not None:
+            return self.load_from_backend(filename)
+        if is_snapshot_file(filename):
+            return self.load_from_snapshot(filename, trusted)
+        return self.load_from_json(filename)
+    
+    def load_from_backend(self, filename: str = None) -> bool:
+        """Ouvrir une base de camps : les camps restent dans la base, lus et modifiés à la demande"""
+        if filename is None:
+            filename = CAMPS_SQLITE_FILE
+        
+        try:
+            backend_class = backend_for(filename)
+            if backend_class is None:
+                raise ValueError(f"Aucun moteur de stockage pour {filename}")
+            backend = backend_class(filename)
             
-            with open(filename, 'w', encoding='utf-8') as file:
-                json.dump(data, file, indent=2, ensure_ascii=False)
-            
-            print(MESSAGES["success"]["data_saved"].format(file=filename))
+            self.close()
+            self._backend = backend
+            self._journal = None
+            self._snapshot_file = None
+            self._pending = None
+            count = backend.count()
+            metrics.count("camps_loaded", count)
+            print(MESSAGES["success"]["camps_loaded"].format(count=count, file=filename))
             return True
             
+        except FileNotFoundError:
+            print(MESSAGES["error"]["file_not_found"].format(file=filename))
+            return False
         except Exception as e:
             print(MESSAGES["error"]["general_error"].format(error=str(e)))
             return False
     
+    def close(self) -> None:
+        """Fermer la base ouverte par load() (sans effet pour un fichier JSON ou binaire)"""
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+            self._drop_mirror()
+            self._pending = []
+    
     def load_from_json(self, filename: str = None) -> bool:
-        """Charger les camps depuis un fichier JSON"""
+        """Charger les camps depuis un fichier JSON, puis rejouer son journal"""
         if filename is None:
             filename = CAMPS_JSON_FILE
         
         try:
-            with open(filename, 'r', encoding='utf-8') as file:
-                data = json.load(file)
+            with gc_paused(), metrics.phase("load_from_json"):
+                with open(filename, 'r', encoding='utf-8') as file:
+                    data = json.load(file)
+                
+                # Remplir directement les colonnes, sans objet Camp intermédiaire
+                camps_data = data.get("camps", [])
+                self.close()
+                self._reset()
+                self._extend(
+                    [camp_data["name"] for camp_data in camps_data],
+                    [camp_data["coords"][0] for camp_data in camps_data],
+                    [camp_data["coords"][1] for camp_data in camps_data],
+                    [camp_data.get("population", "N/A") for camp_data in camps_data],
+                    [camp_data.get("radar", "VH") for camp_data in camps_data],
+                    [camp_data.get("icon_type", "blue") for camp_data in camps_data]
+                )
+                snapshot_seq = data.get("metadata", {}).get("journal_seq", 0)
+                del data, camps_data
+                
+                replayed = self._replay_journal(filename, snapshot_seq)
             
-            self.camps = []
-            camps_data = data.get("camps", [])
+            self._print_loaded(filename, replayed)
+            return True
             
-            for camp_data in camps_data:
-                camp = Camp.from_dict(camp_data)
-                self.camps.append(camp)
+        except FileNotFoundError:
+            print(MESSAGES["error"]["file_not_found"].format(file=filename))
+            return False
+        except Exception as e:
+            print(MESSAGES["error"]["general_error"].format(error=str(e)))
+            return False
+    
+    def load_from_snapshot(self, filename: str = None, trusted: bool = False) -> bool:
+        """Charger les camps depuis un fichier binaire, puis rejouer son journal
+        
+        Les colonnes sont recopiées telles quelles depuis le fichier ; seule la somme
+        de contrôle est vérifiée (sauf trusted=True), sans revalider chaque camp.
+        """
+        if filename is None:
+            filename = CAMPS_SNAPSHOT_FILE
+        
+        try:
+            with gc_paused(), metrics.phase("load_from_snapshot"):
+                store, snapshot_seq = read_snapshot(filename, trusted)
+                index = dict(zip(store.names, range(len(store))))
+                if len(index) != len(store):
+                    raise ValueError(f"Noms de camps en double dans {filename}")
+                
+                self.close()
+                self._reset()
+                self._store = store
+                self._index = index
+                replayed = self._replay_journal(filename, snapshot_seq)
             
-            count = len(self.camps)
-            print(MESSAGES["success"]["camps_loaded"].format(count=count, file=filename))
+            self._print_loaded(filename, replayed)
             return True
             
         except FileNotFoundError:
@@ -205,43 +991,92 @@ class CampManager:
             print(MESSAGES["error"]["general_error"].format(error=str(e)))
             return False
     
+    def _print_loaded(self, filename: str, replayed: int) -> None:
+        """Afficher le bilan d'un chargement"""
+        metrics.count("camps_loaded", len(self._index))
+        if replayed:
+            print(f"📜 {replayed} modifications rejouées depuis {self._journal.path}")
+        print(MESSAGES["success"]["camps_loaded"].format(count=len(self._index), file=filename))
+    
+    def _replay_journal(self, filename: str, snapshot_seq: int) -> int:
+        """Appliquer les entrées du journal postérieures à l'instantané, retourner leur nombre"""
+        journal = CampJournal(journal_path_for(filename), last_seq=snapshot_seq, fsync=JOURNAL_FSYNC)
+        replayed = 0
+        for entry in journal.replay(snapshot_seq):
+            try:
+                self._apply_journal_entry(entry)
+                replayed += 1
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"⚠️ Entrée de journal {entry.get('seq')} ignorée : {e}")
+        
+        self._journal = journal
+        self._snapshot_file = os.path.abspath(filename)
+        self._snapshot_size = os.path.getsize(filename)
+        self._pending = []
+        return replayed
+    
+    def _apply_journal_entry(self, entry: Dict) -> None:
+        """Rejouer une entrée du journal, sans affichage"""
+        op = entry["op"]
+        if op == "add":
+            camp = entry["camp"]
+            if camp["name"] in self._index:
+                raise ValueError(f"le camp '{camp['name']}' existe déjà")
+            self._append(camp["name"], camp["coords"][0], camp["coords"][1],
+                         camp["population"], camp["radar"], camp["icon_type"])
+        elif op == "update":
+            camp = self._find(entry["name"])
+            if camp is None:
+                raise KeyError(entry["name"])
+            changes = dict(entry["changes"])
+            latitude, longitude = changes.pop("coords")
+            self._apply_update(camp, dict(changes, latitude=latitude, longitude=longitude))
+        elif op == "remove":
+            if not self._remove(entry["name"]):
+                raise KeyError(entry["name"])
+        else:
+            raise ValueError(f"opération inconnue : {op}")
+    
     def load_from_csv(self, filename: str) -> bool:
         """Charger les camps depuis un fichier CSV"""
+        return self.import_csv(filename) is not None
+    
+    def import_csv(self, filename: str, report_file: str = None,
+                   chunk_size: int = None) -> Optional[ImportReport]:
+        """Importer un CSV en flux, par blocs validés en une fois
+        
+        Les lignes invalides ou en double sont rejetées (et écrites dans report_file
+        au format JSON si fourni) ; les lignes valides sont ajoutées. La sauvegarde
+        reste à la charge de l'appelant, en une seule fois à la fin. Avec une base,
+        les lignes valides y sont écrites en une seule transaction.
+        """
         try:
-            added_count = 0
+            with gc_paused(), metrics.phase("import_csv"), self.transaction():
+                self._sync()
+                report = CsvBulkImporter(self, chunk_size).run(filename, report_file)
+                if self._backend is not None:
+                    self._backend.insert(self._store, range(len(self._store) - report.imported, len(self._store)))
+            metrics.count("camps_imported", report.imported)
+            metrics.count("rows_rejected", report.rejected)
             
-            with open(filename, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                
-                for row in reader:
-                    # Nettoyer les données
-                    name = row.get('name', '').strip()
-                    if not name:
-                        continue
-                    
-                    try:
-                        latitude = float(row.get('latitude', 0))
-                        longitude = float(row.get('longitude', 0))
-                        population = row.get('population', 'N/A').strip()
-                        radar = row.get('radar', 'VH').strip()
-                        icon_type = row.get('icon_type', 'blue').strip()
-                        
-                        if self.add_camp(name, latitude, longitude, population, radar, icon_type):
-                            added_count += 1
-                            
-                    except (ValueError, TypeError) as e:
-                        print(f"⚠️ Erreur ligne {name}: {e}")
-                        continue
+            # Les lignes importées sont les dernières du stockage
+            self._record_many(report.imported, ({"op": "add", "camp": self._journal_camp(row)}
+                                                for row in range(len(self._store) - report.imported, len(self._store))))
             
-            print(f"✅ {added_count} camps ajoutés depuis {filename}")
-            return True
+            print(f"✅ {report.imported} camps ajoutés depuis {filename}")
+            if report.rejected:
+                details = ", ".join(f"{reason}: {count}" for reason, count in report.rejected_by_reason.items())
+                print(f"⚠️ {report.rejected} lignes rejetées ({details})")
+                if report_file:
+                    print(f"📝 Rapport des rejets : {report_file}")
+            return report
             
         except FileNotFoundError:
             print(MESSAGES["error"]["file_not_found"].format(file=filename))
-            return False
+            return None
         except Exception as e:
             print(MESSAGES["error"]["general_error"].format(error=str(e)))
-            return False
+            return None
     
     def create_csv_template(self, filename: str = None) -> bool:
         """Créer un fichier CSV template"""
@@ -0,0 +1,642 @@
+# src/camp_service.py
+"""
+Service des camps
+Un processus de longue durée (python camp_daemon.py) garde le CampManager en
+mémoire et répond à une API HTTP/JSON locale : ajout, modification,
+suppression, liste paginée et requête par rectangle, qu'une page de carte
+peut appeler à chaque déplacement. Les réponses de lecture portent un ETag
+qui change à chaque modification des camps (304 si rien n'a changé). Les
+modifications sont sauvegardées en arrière-plan, regroupées sur
+DAEMON_CONFIG["save_delay"] secondes. add_camps.py passe par le service
+quand il est démarré : une commande coûte un aller-retour au lieu d'un
+rechargement complet des données.
+"""
+
+import http.client
+import ipaddress
+import json
+import os
+import secrets
+import tempfile
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+from .camp_manager import CAMP_FIELDS, Camp, CampManager, report_batch_errors
+from .config import *
+from .journal import atomic_write
+
+BBOX_RESULTS_CACHED = 32
+
+# Opérations par lot : clé du corps JSON, type attendu, méthode de CampService
+BATCH_OPERATIONS = {
+    "add": ("camps", list, "add_many"),
+    "update": ("updates", (dict, list), "update_many"),
+    "remove": ("names", list, "remove_many")
+}
+
+
+class ServiceError(Exception):
+    """Erreur d'une requête, avec son code HTTP (et le détail des erreurs d'un lot refusé)"""
+
+    def __init__(self, status: int, message: str, errors: List[Dict] = None):
+        super().__init__(message)
+        self.status = status
+        self.errors = errors
+
+
+def camp_json(camp: Camp) -> Dict:
+    """Représentation d'un camp dans l'API"""
+    return {field: getattr(camp, field) for field in CAMP_FIELDS}
+
+
+def camp_row(camp: Camp) -> list:
+    """Ligne compacte [lat, lon, nom, population, radar, icône], comme celles de campTable"""
+    return [camp.latitude, camp.longitude, camp.name, camp.population, camp.radar, camp.icon_type]
+
+
+class CampService:
+    """Camps gardés en mémoire, modifiés sous verrou et sauvegardés en arrière-plan"""
+
+    def __init__(self, filename: str = None):
+        self.filename = os.path.abspath(filename or get_camps_data_file())
+        self.manager = CampManager(quiet=True)
+        self.lock = threading.RLock()
+        # L'ETag combine un identifiant du processus et le numéro de version :
+        # un redémarrage du service invalide aussi les réponses gardées par les clients
+        self.instance = secrets.token_hex(4)
+        self.version = 0
+        # Résultats des derniers rectangles demandés : les pages suivantes d'une même
+        # requête ne refont pas la recherche (vidés à chaque modification des camps)
+        self._bbox_results: OrderedDict = OrderedDict()
+        self._dirty = threading.Event()
+        self._stopping = threading.Event()
+        self._saver = threading.Thread(target=self._save_loop, name="camp-saver", daemon=True)
+
+    def start(self) -> None:
+        """Charger les camps (s'il y a un fichier) et démarrer la sauvegarde en arrière-plan"""
+        if os.path.exists(self.filename) and not self.manager.load(self.filename):
+            raise ValueError(f"Impossible de charger {self.filename}")
+        self._saver.start()
+
+    def close(self) -> None:
+        """Arrêter la sauvegarde en arrière-plan après une dernière sauvegarde"""
+        self._stopping.set()
+        self._dirty.set()
+        if self._saver.is_alive():
+            self._saver.join()
+        self.flush()
+        self.manager.close()
+
+    def etag(self) -> str:
+        return f'"{self.instance}-{self.version}"'
+
+    def _changed(self) -> None:
+        self.version += 1
+        self._bbox_results.clear()
+        self._dirty.set()
+
+    def _save_loop(self) -> None:
+        while not self._stopping.is_set():
+            self._dirty.wait()
+            # Regrouper les modifications rapprochées en une seule sauvegarde
+            self._stopping.wait(DAEMON_CONFIG["save_delay"])
+            self.flush()
+
+    def flush(self) -> bool:
+        """Sauvegarder maintenant les modifications en attente"""
+        with self.lock:
+            if not self._dirty.is_set():
+                return True
+            self._dirty.clear()
+            if self.manager.save(self.filename):
+                return True
+            self._dirty.set()  # Nouvel essai à la prochaine modification ou à l'arrêt
+            return False
+
+    # ----- Lectures -----
+
+    def status(self) -> Dict:
+        with self.lock:
+            return {"camps": self.manager.get_camps_count(), "version": self.version,
+                    "file": self.filename, "pid": os.getpid()}
+
+    def get(self, name: str) -> Dict:
+        with self.lock:
+            camp = self.manager.get_camp_by_name(name)
+            if camp is None:
+                raise ServiceError(404, f"Camp '{name}' introuvable")
+            return camp_json(camp)
+
+    def list(self, offset: int, limit: int, rows: bool = False) -> Dict:
+        """Page de la liste des camps (ordre d'ajout)"""
+        with self.lock:
+            return self._page(self.manager.camps, offset, limit, rows)
+
+    def bbox(self, south: float, west: float, north: float, east: float,
+             offset: int, limit: int, rows: bool = False) -> Dict:
+        """Page des camps situés dans un rectangle"""
+        key = (south, west, north, east)
+        with self.lock:
+            camps = self._bbox_results.get(key)
+            if camps is None:
+                camps = self.manager.camps_in_bbox(south, west, north, east)
+                self._bbox_results[key] = camps
+                if len(self._bbox_results) > BBOX_RESULTS_CACHED:
+                    self._bbox_results.popitem(last=False)
+            return self._page(camps, offset, limit, rows)
+
+    def _page(self, camps: List[Camp], offset: int, limit: int, rows: bool) -> Dict:
+        page = camps[offset:offset + limit]
+        following = offset + len(page)
+        return {
+            "total": len(camps),
+            "offset": offset,
+            "limit": limit,
+            "next_offset": following if following < len(camps) else None,
+            "version": self.version,
+            "camps": [camp_row(camp) if rows else camp_json(camp) for camp in page]
+        }
+
+    # ----- Modifications -----
+
+    def add(self, fields: Dict) -> Dict:
+        unknown = set(fields) - set(CAMP_FIELDS)
+        if unknown:
+            raise ServiceError(400, f"Champs inconnus : {', '.join(sorted(unknown))}")
+        try:
+            camp = Camp(**fields)  # Valide tous les champs sans toucher aux données
+        except (TypeError, ValueError) as e:
+            raise ServiceError(400, str(e))
+        with self.lock:
+            if self.manager.get_camp_by_name(camp.name) is not None:
+                raise ServiceError(409, f"Le camp '{camp.name}' existe déjà")
+            if not self.manager.add_camp(*(getattr(camp, field) for field in CAMP_FIELDS)):
+                raise ServiceError(400, f"Camp '{camp.name}' refusé")
+            self._changed()
+            return camp_json(self.manager.get_camp_by_name(camp.name))
+
+    def update(self, name: str, changes: Dict) -> Dict:
+        unknown = set(changes) - set(CAMP_FIELDS)
+        if unknown:
+            raise ServiceError(400, f"Champs inconnus : {', '.join(sorted(unknown))}")
+        with self.lock:
+            camp = self.manager.get_camp_by_name(name)
+            if camp is None:
+                raise ServiceError(404, f"Camp '{name}' introuvable")
+            new_name = changes.get("name", name)
+            if new_name != name and self.manager.get_camp_by_name(new_name) is not None:
+                raise ServiceError(409, f"Le camp '{new_name}' existe déjà")
+            try:
+                Camp(**{**camp_json(camp), **changes})  # Valider avant de modifier
+            except (TypeError, ValueError) as e:
+                raise ServiceError(400, str(e))
+            if not self.manager.update_camp(name, **changes):
+                raise ServiceError(400, f"Camp '{name}' non modifié")
+            self._changed()
+            return camp_json(self.manager.get_camp_by_name(new_name))
+
+    def remove(self, name: str) -> Dict:
+        with self.lock:
+            if not self.manager.remove_camp(name):
+                raise ServiceError(404, f"Camp '{name}' introuvable")
+            self._changed()
+            return {"removed": name}
+
+    def add_many(self, camps: List) -> Dict:
+        """Ajouter un lot de camps, tous ou aucun"""
+        with self.lock:
+            self._run_batch(self.manager.add_camps, camps)
+            return {"added": len(camps)}
+
+    def update_many(self, updates) -> Dict:
+        """Modifier un lot de camps ({nom: champs} ou liste de couples), tous ou aucun"""
+        with self.lock:
+            self._run_batch(self.manager.update_camps, updates)
+            return {"updated": len(updates)}
+
+    def remove_many(self, names: List[str]) -> Dict:
+        """Supprimer un lot de camps, tous ou aucun"""
+        with self.lock:
+            self._run_batch(self.manager.remove_camps, names)
+            return {"removed": len(names)}
+
+    def _run_batch(self, method, batch) -> None:
+        errors = []
+        if not method(batch, save=False, errors=errors):
+            raise ServiceError(400, f"Lot refusé : {len(errors)} erreur(s), aucun camp modifié", errors)
+        if batch:
+            self._changed()
+
+    def import_csv(self, filename: str, with_report: bool = False) -> Dict:
+        """Importer un CSV lu par le service (même machine)
+
+        with_report : joindre le rapport des rejets à la réponse. Le client l'écrit
+        lui-même : le service n'écrit aucun fichier choisi par le client.
+        """
+        report_file = None
+        if with_report:
+            descriptor, report_file = tempfile.mkstemp(prefix="hcr_rejets_", suffix=".json")
+            os.close(descriptor)
+        try:
+            with self.lock:
+                report = self.manager.import_csv(filename, report_file=report_file)
+                if report is None:
+                    raise ServiceError(400, f"Import impossible : {filename}")
+                if report.imported:
+                    self._changed()
+            result = {"imported": report.imported, "rejected": report.rejected,
+                      "rejected_by_reason": dict(report.rejected_by_reason)}
+            if report_file:
+                with open(report_file, 'r', encoding='utf-8') as file:
+                    result["report"] = json.load(file)
+            return result
+        finally:
+            if report_file:
+                os.remove(report_file)
+
+
+class CampRequestHandler(BaseHTTPRequestHandler):
+    """API JSON du service des camps
+
+    GET    /api/status
+    GET    /api/camps?offset=&limit=&format=rows
+    GET    /api/camps/{nom}
+    GET    /api/bbox?south=&west=&north=&east=&offset=&limit=&format=rows
+    POST   /api/camps            (camp en JSON)
+    PATCH  /api/camps/{nom}      (champs modifiés en JSON)
+    DELETE /api/camps/{nom}
+    POST   /api/import           ({"file": ..., "report": true pour joindre le rapport des rejets})
+    POST   /api/batch/add        ({"camps": [...]}, tous ou aucun)
+    POST   /api/batch/update     ({"updates": {nom: champs}})
+    POST   /api/batch/remove     ({"names": [...]})
+    POST   /api/save
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "HCRCamps/1.0"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def do_GET(self) -> None:
+        self._dispatch(self._get)
+
+    def do_POST(self) -> None:
+        self._dispatch(self._post)
+
+    def do_PATCH(self) -> None:
+        self._dispatch(self._patch)
+
+    def do_DELETE(self) -> None:
+        self._dispatch(self._delete)
+
+    def _dispatch(self, handler) -> None:
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+        try:
+            if not self._host_allowed():
+                raise ServiceError(403, "En-tête Host refusé")
+            if parts[0] != "api" or len(parts) < 2:
+                raise ServiceError(404, "Ressource inconnue")
+            handler(parts[1:], parse_qs(url.query))
+        except ServiceError as e:
+            payload = {"error": str(e)}
+            if e.errors is not None:
+                payload["errors"] = e.errors
+            self._send_json(e.status, payload)
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+
+    def _get(self, parts: List[str], query: Dict) -> None:
+        service: CampService = self.server.service
+        etag = service.etag()
+        # Lecture de la version avant la réponse : au pire, l'ETag est plus ancien que
+        # la réponse et le client la redemandera une fois de trop
+        if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            self._send_json(304, None, etag)
+            return
+
+        rows = _query_value(query, "format", str, "") == "rows"
+        if parts == ["status"]:
+            payload = service.status()
+        elif parts == ["camps"]:
+            payload = service.list(*_page_arguments(query), rows)
+        elif len(parts) == 2 and parts[0] == "camps":
+            payload = service.get(parts[1])
+        elif parts == ["bbox"]:
+            bbox = [_query_value(query, key, float) for key in ("south", "west", "north", "east")]
+            payload = service.bbox(*bbox, *_page_arguments(query), rows)
+        else:
+            raise ServiceError(404, "Ressource inconnue")
+        self._send_json(200, payload, etag)
+
+    def _post(self, parts: List[str], query: Dict) -> None:
+        service: CampService = self.server.service
+        if parts == ["camps"]:
+            self._send_json(201, service.add(self._read_json()), service.etag())
+        elif parts == ["import"]:
+            body = self._read_json()
+            if not isinstance(body.get("file"), str):
+                raise ServiceError(400, "Champ manquant : file")
+            self._send_json(200, service.import_csv(body["file"], bool(body.get("report"))), service.etag())
+        elif len(parts) == 2 and parts[0] == "batch" and parts[1] in BATCH_OPERATIONS:
+            key, expected, method = BATCH_OPERATIONS[parts[1]]
+            batch = self._read_json().get(key)
+            if not isinstance(batch, expected):
+                raise ServiceError(400, f"Champ manquant ou invalide : {key}")
+            self._send_json(200, getattr(service, method)(batch), service.etag())
+        elif parts == ["save"]:
+            if not service.flush():
+                raise ServiceError(500, f"Sauvegarde impossible : {service.filename}")
+            self._send_json(200, {"saved": service.filename})
+        else:
+            raise ServiceError(404, "Ressource inconnue")
+
+    def _patch(self, parts: List[str], query: Dict) -> None:
+        if len(parts) != 2 or parts[0] != "camps":
+            raise ServiceError(404, "Ressource inconnue")
+        service: CampService = self.server.service
+        self._send_json(200, service.update(parts[1], self._read_json()), service.etag())
+
+    def _delete(self, parts: List[str], query: Dict) -> None:
+        if len(parts) != 2 or parts[0] != "camps":
+            raise ServiceError(404, "Ressource inconnue")
+        service: CampService = self.server.service
+        self._send_json(200, service.remove(parts[1]), service.etag())
+
+    def _host_allowed(self) -> bool:
+        """L'en-tête Host désigne-t-il l'adresse d'écoute du service
+
+        Protection contre le DNS rebinding : une page d'un autre site dont le nom
+        pointe vers 127.0.0.1 envoie son propre nom dans Host. Sont acceptés
+        l'adresse d'écoute, localhost et les adresses de bouclage si le service
+        écoute en local, et toute adresse IP s'il écoute sur toutes les interfaces.
+        """
+        host, port = self.server.server_address[:2]
+        try:
+            requested = urlsplit("//" + self.headers.get("Host", ""))
+            name, requested_port = requested.hostname, requested.port
+        except ValueError:
+            return False
+        if name is None or (requested_port or 80) != port:
+            return False
+        if name == host:
+            return True
+        try:
+            bound = ipaddress.ip_address(host)
+        except ValueError:
+            return False
+        if name == "localhost":
+            return bound.is_loopback or bound.is_unspecified
+        try:
+            address = ipaddress.ip_address(name)
+        except ValueError:
+            return False
+        return bound.is_unspecified or (bound.is_loopback and address.is_loopback)
+
+    def _read_json(self) -> Dict:
+        """Corps JSON d'une modification
+
+        Le type application/json est exigé : un navigateur ne peut pas envoyer une telle
+        requête depuis une autre page sans accord préalable (que le service ne donne pas).
+        """
+        if self.headers.get_content_type() != "application/json":
+            raise ServiceError(415, "Corps attendu en application/json")
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise ServiceError(400, "JSON invalide")
+        if not isinstance(body, dict):
+            raise ServiceError(400, "Objet JSON attendu")
+        return body
+
+    def _send_json(self, status: int, payload: Optional[Dict], etag: str = None) -> None:
+        body = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        # Lectures possibles depuis la carte servie par serve.py (autre port)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Expose-Headers", "ETag")
+        if payload is not None:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _query_value(query: Dict, key: str, cast, default=None):
+    """Valeur d'un paramètre de requête convertie (ServiceError 400 si absente ou invalide)"""
+    values = query.get(key)
+    if not values:
+        if default is None:
+            raise ServiceError(400, f"Paramètre manquant : {key}")
+        return default
+    try:
+        return cast(values[0])
+    except ValueError:
+        raise ServiceError(400, f"Paramètre invalide : {key}")
+
+
+def _page_arguments(query: Dict) -> Tuple[int, int]:
+    offset = _query_value(query, "offset", int, 0)
+    limit = _query_value(query, "limit", int, DAEMON_CONFIG["page_size"])
+    if offset < 0 or not 0 < limit <= DAEMON_CONFIG["max_page_size"]:
+        raise ServiceError(400, f"Pagination invalide (limit entre 1 et {DAEMON_CONFIG['max_page_size']})")
+    return offset, limit
+
+
+class CampServiceServer(ThreadingHTTPServer):
+    """Serveur de l'API, un fil par connexion"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: CampService, quiet: bool = False):
+        super().__init__(address, CampRequestHandler)
+        self.service = service
+        self.quiet = quiet
+
+    def write_state(self) -> None:
+        """Annoncer le service à add_camps.py"""
+        host, port = self.server_address[:2]
+        state = {"host": host, "port": port, "pid": os.getpid(), "file": self.service.filename}
+        atomic_write(DAEMON_STATE_FILE, lambda file: json.dump(state, file))
+
+    def remove_state(self) -> None:
+        try:
+            os.remove(DAEMON_STATE_FILE)
+        except FileNotFoundError:
+            pass
+
+
+class CampClient:
+    """Client de l'API du service (connexion persistante)"""
+
+    def __init__(self, host: str, port: int, timeout: float = 30):
+        self.host, self.port = host, port
+        self._connection = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    @classmethod
+    def connect(cls) -> Optional['CampClient']:
+        """Client du service s'il est démarré (fichier d'état présent et service joignable), sinon None"""
+        try:
+            with open(DAEMON_STATE_FILE, 'r', encoding='utf-8') as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            return None
+        client = cls(state["host"], state["port"], timeout=DAEMON_CONFIG["connect_timeout"])
+        try:
+            status, _ = client.request("GET", "/api/status")
+        except (OSError, http.client.HTTPException):
+            return None  # Fichier d'état laissé par un service arrêté
+        if status != 200:
+            return None
+        client._connection.timeout = 30
+        if client._connection.sock is not None:
+            client._connection.sock.settimeout(30)
+        return client
+
+    def request(self, method: str, path: str, payload: Dict = None) -> Tuple[int, Optional[Dict]]:
+        """Envoyer une requête, retourner (code HTTP, corps JSON)"""
+        body = None if payload is None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            self._connection.request(method, path, body, headers)
+            response = self._connection.getresponse()
+        except (ConnectionError, http.client.RemoteDisconnected):
+            # Connexion persistante fermée par le serveur : une seule nouvelle tentative
+            self._connection.close()
+            self._connection.request(method, path, body, headers)
+            response = self._connection.getresponse()
+        data = response.read()
+        return response.status, (json.loads(data) if data else None)
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+class RemoteCampManager:
+    """Mêmes méthodes que CampManager pour add_camps.py, exécutées par le service
+
+    Les modifications sont sauvegardées par le service : save() n'a rien à faire.
+    """
+
+    def __init__(self, client: CampClient, quiet: bool = False):
+        self.client = client
+        self.quiet = quiet
+
+    @classmethod
+    def connect(cls, quiet: bool = False) -> Optional['RemoteCampManager']:
+        client = CampClient.connect()
+        return cls(client, quiet) if client is not None else None
+
+    def _call(self, method: str, path: str, payload: Dict = None) -> Tuple[bool, Dict]:
+        status, body = self.client.request(method, path, payload)
+        if status >= 500:
+            raise RuntimeError((body or {}).get("error", f"Erreur du service ({status})"))
+        return status < 400, body or {}
+
+    def load(self, filename: str = None, trusted: bool = False) -> bool:
+        _, status = self._call("GET", "/api/status")
+        print(f"🔌 Service des camps : {status['camps']} camps ({self.client.host}:{self.client.port})")
+        return True
+
+    def save(self, filename: str = None) -> bool:
+        return True
+
+    def get_camps_count(self) -> int:
+        return self._call("GET", "/api/status")[1]["camps"]
+
+    @property
+    def camps(self) -> List[Camp]:
+        """Liste ordonnée des camps, lue page par page"""
+        camps, offset = [], 0
+        while offset is not None:
+            _, page = self._call("GET", f"/api/camps?offset={offset}&limit={DAEMON_CONFIG['max_page_size']}&format=rows")
+            camps.extend(Camp(name, latitude, longitude, population, radar, icon_type)
+                         for latitude, longitude, name, population, radar, icon_type in page["camps"])
+            offset = page["next_offset"]
+        return camps
+
+    def list_camps(self) -> None:
+        """Afficher la liste des camps (même présentation que CampManager)"""
+        CampManager.list_camps(SimpleNamespace(camps=self.camps))
+
+    def add_camp(self, name: str, latitude: float, longitude: float,
+                 population: str = "N/A", radar: str = "VH", icon_type: str = "blue") -> bool:
+        ok, body = self._call("POST", "/api/camps", {"name": name, "latitude": latitude, "longitude": longitude,
+                                                     "population": population, "radar": radar,
+                                                     "icon_type": icon_type})
+        if not ok:
+            print(f"⚠️ {body.get('error')}")
+        elif not self.quiet:
+            print(MESSAGES["success"]["camp_added"].format(name=name))
+        return ok
+
+    def update_camp(self, name: str, /, **kwargs) -> bool:
+        ok, body = self._call("PATCH", f"/api/camps/{quote(name, safe='')}", kwargs)
+        if not ok:
+            print(f"❌ {body.get('error')}")
+        elif not self.quiet:
+            print(f"✅ Camp '{name}' mis à jour")
+        return ok
+
+    def remove_camp(self, name: str) -> bool:
+        ok, body = self._call("DELETE", f"/api/camps/{quote(name, safe='')}")
+        if not ok:
+            print(f"❌ {body.get('error')}")
+        elif not self.quiet:
+            print(MESSAGES["info"]["camp_removed"].format(name=name))
+        return ok
+
+    def add_camps(self, camps, save: bool = True, errors: List[Dict] = None) -> bool:
+        camps = [camp_json(camp) if isinstance(camp, Camp) else camp for camp in camps]
+        return self._batch("add", {"camps": camps}, "camps ajoutés", errors)
+
+    def update_camps(self, updates, save: bool = True, errors: List[Dict] = None) -> bool:
+        items = updates.items() if isinstance(updates, dict) else updates
+        return self._batch("update", {"updates": [list(item) for item in items]}, "camps mis à jour", errors)
+
+    def remove_camps(self, names, save: bool = True, errors: List[Dict] = None) -> bool:
+        return self._batch("remove", {"names": list(names)}, "camps supprimés", errors)
+
+    def _batch(self, operation: str, payload: Dict, done: str, errors: Optional[List[Dict]]) -> bool:
+        ok, body = self._call("POST", f"/api/batch/{operation}", payload)
+        if ok:
+            print(f"✅ {next(iter(body.values()))} {done}")
+        elif "errors" in body:
+            report_batch_errors(body["errors"], errors)
+        else:
+            print(f"❌ {body.get('error')}")
+        return ok
+
+    def import_csv(self, filename: str, report_file: str = None, chunk_size: int = None):
+        payload = {"file": os.path.abspath(filename), "report": report_file is not None}
+        ok, body = self._call("POST", "/api/import", payload)
+        if not ok:
+            print(f"❌ {body.get('error')}")
+            return None
+        # Rapport des rejets reçu avec la réponse, écrit ici
+        report = body.pop("report", None)
+        if report_file and report is not None:
+            atomic_write(report_file, lambda file: json.dump(report, file, indent=2, ensure_ascii=False))
+        print(f"✅ {body['imported']} camps ajoutés depuis {filename}")
+        if body["rejected"]:
+            details = ", ".join(f"{reason}: {count}" for reason, count in body["rejected_by_reason"].items())
+            print(f"⚠️ {body['rejected']} lignes rejetées ({details})")
+            if report_file:
+                print(f"📝 Rapport des rejets : {report_file}")
+        return SimpleNamespace(**body)
+
+    def load_from_csv(self, filename: str) -> bool:
+        return self.import_csv(filename) is not None
+
+    def create_csv_template(self, filename: str = None) -> bool:
+        return CampManager().create_csv_template(filename)
@@ -0,0 +1,207 @@
+# src/camp_store.py
+"""
+Stockage en colonnes des camps de réfugiés
+Chaque champ est rangé dans un tableau compact (coordonnées en float64,
+radar et type d'icône en codes entiers, noms internés) et un camp n'est
+qu'un numéro de ligne dans ces tableaux
+"""
+
+import hashlib
+import sys
+from array import array
+from typing import Dict, List, Tuple, Union
+from .config import *
+
+# Codes entiers des énumérations (index dans les listes de configuration)
+RADAR_CODES = {radar: code for code, radar in enumerate(RADAR_TYPES)}
+ICON_TYPES = list(ICON_CONFIG.keys())
+ICON_CODES = {icon_type: code for code, icon_type in enumerate(ICON_TYPES)}
+
+# Valeurs spéciales de la colonne population
+POPULATION_NA = -1     # "N/A"
+POPULATION_RAW = -2    # Texte libre ou entier conservé tel quel dans raw_populations
+
+_POPULATION_MAX = 2 ** 63 - 1
+
+
+def format_population(value: int) -> str:
+    """Formater une population avec des espaces comme séparateurs de milliers (21 394)"""
+    return f"{value:,}".replace(",", " ")
+
+
+def parse_population(population) -> Tuple[int, Union[str, int]]:
+    """Encoder une population en (entier, valeur brute)
+
+    Un texte qui se reformate à l'identique est rangé dans la colonne ; un entier
+    est conservé tel quel (relu comme entier, et non comme "50 000"), comme le
+    texte libre.
+    """
+    if population == "N/A":
+        return POPULATION_NA, None
+    if isinstance(population, int) and not isinstance(population, bool):
+        return POPULATION_RAW, population
+    if isinstance(population, str):
+        digits = population.replace(" ", "")
+        if digits.isascii() and digits.isdigit():
+            value = int(digits)
+            if value <= _POPULATION_MAX and format_population(value) == population:
+                return value, None
+    return POPULATION_RAW, str(population)
+
+
+def check_name(name) -> str:
+    """Valider et interner un nom de camp"""
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("Le nom du camp est requis")
+    return sys.intern(name)
+
+
+def check_coordinates(name: str, latitude, longitude) -> None:
+    """Valider le type des coordonnées"""
+    if not isinstance(latitude, (int, float)) or not isinstance(longitude, (int, float)):
+        raise ValueError(f"Coordonnées invalides pour {name}")
+
+
+def encode_radar(radar: str) -> int:
+    """Code entier d'un type de radar"""
+    code = RADAR_CODES.get(radar)
+    if code is None:
+        raise ValueError(f"Type de radar invalide: {radar}. Valeurs acceptées: {RADAR_TYPES}")
+    return code
+
+
+def encode_icon_type(icon_type: str) -> int:
+    """Code entier d'un type d'icône"""
+    code = ICON_CODES.get(icon_type)
+    if code is None:
+        raise ValueError(f"Type d'icône invalide: {icon_type}. Valeurs acceptées: {ICON_TYPES}")
+    return code
+
+
+class CampStore:
+    """Tableaux en colonnes contenant les camps ; une ligne supprimée est marquée dans alive"""
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.latitudes = array('d')
+        self.longitudes = array('d')
+        self.populations = array('q')
+        self.radars = array('B')
+        self.icon_types = array('B')
+        self.alive = bytearray()
+        self.raw_populations: Dict[int, Union[str, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def append(self, name: str, latitude: float, longitude: float,
+               population="N/A", radar: str = "VH", icon_type: str = "blue") -> int:
+        """Valider et ajouter une ligne, retourner son numéro"""
+        name = check_name(name)
+        check_coordinates(name, latitude, longitude)
+        radar_code = encode_radar(radar)
+        icon_code = encode_icon_type(icon_type)
+        population_code, raw_population = parse_population(population)
+
+        row = len(self.names)
+        self.names.append(name)
+        self.latitudes.append(latitude)
+        self.longitudes.append(longitude)
+        self.populations.append(population_code)
+        self.radars.append(radar_code)
+        self.icon_types.append(icon_code)
+        self.alive.append(1)
+        if raw_population is not None:
+            self.raw_populations[row] = raw_population
+        return row
+
+    def extend(self, names: List[str], latitudes: List[float], longitudes: List[float],
+               populations: List, radars: List[str], icon_types: List[str]) -> range:
+        """Valider et ajouter des colonnes entières, retourner les numéros des nouvelles lignes
+        
+        La validation est faite colonne par colonne ; en cas d'erreur, la ligne fautive
+        est revalidée seule pour lever le même message que append() et rien n'est ajouté.
+        """
+        start = len(self.names)
+        try:
+            interned = [sys.intern(name) if type(name) is str and name.strip() else check_name(name)
+                        for name in names]
+            latitude_column = array('d', latitudes)
+            longitude_column = array('d', longitudes)
+            radar_column = array('B', [RADAR_CODES[radar] for radar in radars])
+            icon_column = array('B', [ICON_CODES[icon_type] for icon_type in icon_types])
+            if not all(isinstance(value, (int, float)) for value in latitudes) or \
+               not all(isinstance(value, (int, float)) for value in longitudes):
+                raise TypeError
+        except (TypeError, KeyError, ValueError):
+            self._raise_first_error(names, latitudes, longitudes, radars, icon_types)
+            raise
+        
+        parsed = {}
+        population_column = array('q')
+        for offset, population in enumerate(populations):
+            key = (type(population), population)
+            if key not in parsed:
+                parsed[key] = parse_population(population)
+            value, raw_population = parsed[key]
+            population_column.append(value)
+            if raw_population is not None:
+                self.raw_populations[start + offset] = raw_population
+        
+        self.names.extend(interned)
+        self.latitudes.extend(latitude_column)
+        self.longitudes.extend(longitude_column)
+        self.populations.extend(population_column)
+        self.radars.extend(radar_column)
+        self.icon_types.extend(icon_column)
+        self.alive.extend(b"\x01" * len(interned))
+        return range(start, len(self.names))
+
+    def append_store(self, other: 'CampStore') -> range:
+        """Ajouter toutes les lignes d'un autre stockage (déjà validées), retourner leurs numéros"""
+        start = len(self.names)
+        self.names.extend(other.names)
+        self.latitudes.extend(other.latitudes)
+        self.longitudes.extend(other.longitudes)
+        self.populations.extend(other.populations)
+        self.radars.extend(other.radars)
+        self.icon_types.extend(other.icon_types)
+        self.alive.extend(other.alive)
+        self.raw_populations.update((start + row, value) for row, value in other.raw_populations.items())
+        return range(start, len(self.names))
+
+    @staticmethod
+    def _raise_first_error(names, latitudes, longitudes, radars, icon_types) -> None:
+        """Lever l'erreur de validation de la première ligne invalide"""
+        for name, latitude, longitude, radar, icon_type in zip(names, latitudes, longitudes, radars, icon_types):
+            name = check_name(name)
+            check_coordinates(name, latitude, longitude)
+            encode_radar(radar)
+            encode_icon_type(icon_type)
+
+    def digest(self) -> str:
+        """Empreinte du contenu des colonnes (change à chaque ajout, modification ou suppression)"""
+        digest = hashlib.blake2b(digest_size=16)
+        for column in (self.latitudes, self.longitudes, self.populations, self.radars, self.icon_types, self.alive):
+            digest.update(column)
+        digest.update("\x00".join(self.names).encode('utf-8'))
+        digest.update(repr(sorted(self.raw_populations.items())).encode('utf-8'))
+        return digest.hexdigest()
+
+    def population(self, row: int) -> Union[str, int]:
+        """Population d'une ligne : texte, ou entier si elle a été donnée sous cette forme"""
+        value = self.populations[row]
+        if value == POPULATION_NA:
+            return "N/A"
+        if value == POPULATION_RAW:
+            return self.raw_populations[row]
+        return format_population(value)
+
+    def set_population(self, row: int, population) -> None:
+        """Modifier la population d'une ligne"""
+        value, raw_population = parse_population(population)
+        self.populations[row] = value
+        if raw_population is None:
+            self.raw_populations.pop(row, None)
+        else:
+            self.raw_populations[row] = raw_population
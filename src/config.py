@@ -13,6 +13,8 @@ OUTPUT_DIR = os.path.join(BASE_DIR, "output")
 
 # Fichiers de données
 CAMPS_JSON_FILE = os.path.join(DATA_DIR, "camps.json")
+CAMPS_SNAPSHOT_FILE = os.path.join(DATA_DIR, "camps.hcrs")  # Format binaire (python add_camps.py --migrate binary)
+CAMPS_SQLITE_FILE = os.path.join(DATA_DIR, "camps.sqlite")  # Base SQLite (python add_camps.py --migrate sqlite)
 CAMPS_TEMPLATE_CSV = os.path.join(DATA_DIR, "camps_template.csv")
 
 # Dossiers des assets
@@ -20,36 +22,228 @@ ICONS_DIR = os.path.join(ASSETS_DIR, "icons")
 IMG_TIF_DIR = os.path.join(ASSETS_DIR, "img_TIF")
 TIF_DIR = os.path.join(ASSETS_DIR, "TIF")
 RESULTS_DIR = os.path.join(ASSETS_DIR, "results")  # Nouveau dossier pour les images de résultats
+PREVIEWS_DIR = os.path.join(ASSETS_DIR, "previews")  # Aperçus générés à partir des GIFs (voir APERÇUS)
+PREVIEW_MANIFEST = os.path.join(PREVIEWS_DIR, "manifest.json")
+ASSET_MANIFEST = os.path.join(ASSETS_DIR, "asset_manifest.json")  # Taille, date et empreinte de chaque asset
+PUBLISHED_ASSETS_DIR = os.path.join(OUTPUT_DIR, "assets")  # Assets publiés avec leur empreinte dans le nom
+RASTERS_DIR = os.path.join(ASSETS_DIR, "rasters")  # GeoTIFFs optimisés (COG) produits à partir des .tif (voir RASTERS RADAR)
+RASTER_MANIFEST = os.path.join(RASTERS_DIR, "manifest.json")
+TILES_DIR = os.path.join(OUTPUT_DIR, "tiles")  # Tuiles XYZ des rasters, une arborescence {z}/{x}/{y}.png par .tif
 
 # Fichier de sortie
 OUTPUT_HTML = os.path.join(OUTPUT_DIR, "carte_camps.html")
+MAP_BUILD_CACHE_FILE = os.path.join(OUTPUT_DIR, ".map_build_cache.json")  # Empreintes des dernières cartes générées
 
 # ==================== CONFIGURATION DE LA CARTE ====================
 MAP_CONFIG = {
     "center_location": [0, 20],  # Centré sur l'Afrique
     "zoom_start": 4,
-    "popup_max_width": 250
+    "popup_max_width": 250,
+    "viewport_size": [1280, 800],  # Taille d'écran supposée (px) pour estimer la zone visible
+    "render_mode": "auto",          # "markers" (un marqueur HTML par camp), "canvas", "cluster" ou "auto"
+    "fast_render_threshold": 1000,  # En mode "auto", nombre de camps à partir duquel le rendu rapide est utilisé
+    "fast_render_mode": "cluster",  # Rendu rapide choisi en mode "auto" ("canvas" ou "cluster")
+    "render_workers": 1,            # Processus sérialisant les camps (1 : en série, 0 : un par cœur)
+    "render_chunk_size": 20000,     # Nombre de camps par bloc envoyé à un processus
+    "minify": True,                 # Retirer l'indentation et les lignes vides des pages produites
+    "precompress": ["gzip", "br"]   # Copies compressées (.gz, .br avec le module brotli) servies par serve.py
 }
 
+# ==================== COUCHES PAR CATÉGORIE ====================
+# Avec generate_map(group_by=...), chaque catégorie est écrite dans un fichier GeoJSON ;
+# seules les catégories visibles au chargement sont incluses dans la page, les autres
+# sont téléchargées lorsqu'elles sont cochées dans le sélecteur de couches.
+CATEGORY_LAYERS = {
+    "icon_type": {"visible": ["blue", "green"]},
+    "radar": {"visible": ["VH"]}
+}
+
+# ==================== CARTES PAR RÉGION ====================
+# generate_region_maps() écrit une carte par région (output/region_<nom>.html) ne contenant
+# que les camps de la région, et une page d'ensemble légère qui renvoie vers chacune.
+# Les régions sont des rectangles [sud, ouest, nord, est] ; un camp hors de toute région
+# est placé dans la région "autres".
+REGIONS_OVERVIEW_HTML = os.path.join(OUTPUT_DIR, "carte_regions.html")
+REGION_FILE_PREFIX = "region_"
+REGION_SHARDS = {
+    "afrique_du_nord": {"label": "Afrique du Nord", "bbox": [20.0, -18.0, 38.0, 37.0]},
+    "sahel": {"label": "Sahel", "bbox": [10.0, -18.0, 20.0, 28.0]},
+    "afrique_de_l_ouest": {"label": "Afrique de l'Ouest (côte)", "bbox": [4.0, -18.0, 10.0, 8.0]},
+    "afrique_centrale": {"label": "Afrique centrale", "bbox": [-12.0, 8.0, 10.0, 28.0]},
+    "afrique_de_l_est": {"label": "Afrique de l'Est", "bbox": [-12.0, 28.0, 20.0, 52.0]},
+    "afrique_australe": {"label": "Afrique australe", "bbox": [-35.0, 10.0, -12.0, 41.0]}
+}
+
+# ==================== APERÇUS ====================
+# Les GIFs de assets/img_TIF sont convertis en une vignette fixe (affichée dans la popup)
+# et, si les outils sont installés, en animations compressées (affichées dans le modal) :
+# WebP animé avec Pillow, MP4 avec ffmpeg. Sans Pillow, la vignette est la première
+# image du GIF, à sa taille d'origine.
+PREVIEW_CONFIG = {
+    "thumbnail_width": 240,  # Largeur des vignettes en pixels (avec Pillow)
+    "thumbnail_quality": 80,  # Qualité WebP des vignettes
+    "webp_quality": 70,       # Qualité du WebP animé
+    "mp4_crf": 28             # Compression du MP4 (ffmpeg -crf : plus haut = plus petit)
+}
+
+# ==================== MANIFESTE DES ASSETS ====================
+# Avant chaque génération, les dossiers d'assets sont parcourus (en parallèle, seuls les
+# fichiers nouveaux ou modifiés sont hachés) et chaque asset est publié dans output/assets/
+# sous un nom contenant son empreinte (Mbera.3f2a1c9d0e.gif) : la carte ne renvoie qu'aux
+# fichiers existants et les assets publiés peuvent être mis en cache sans limite de durée.
+ASSET_SCAN_DIRS = [ICONS_DIR, IMG_TIF_DIR, TIF_DIR, RESULTS_DIR, PREVIEWS_DIR, RASTERS_DIR]
+ASSET_SCAN_WORKERS = 8
+ASSET_HASH_LENGTH = 10  # Caractères de l'empreinte SHA-256 gardés dans les noms publiés
+
+# ==================== RASTERS RADAR ====================
+# Avec rasterio (optionnel), chaque FBRcollectionMonthly{radar}_{nom}.tif est converti en
+# GeoTIFF optimisé pour le cloud (COG : tuilé, compressé, avec pyramide d'aperçus), proposé
+# au téléchargement à la place du .tif d'origine, et découpé en tuiles PNG XYZ affichées
+# sur la carte dans une couche activable : seules les tuiles visibles sont téléchargées.
+RASTER_CONFIG = {
+    "band": -1,                # Bande affichée (mois de la collection), -1 : la dernière
+    "percentiles": [2, 98],    # Étirement des niveaux de gris entre ces centiles des valeurs
+    "min_zoom": 8,             # Zoom en dessous duquel la couche n'est pas affichée
+    "max_zoom": None,          # Zoom des tuiles les plus fines (None : d'après la résolution du raster)
+    "max_zoom_limit": 16,      # Zoom maximal quand il est calculé d'après la résolution
+    "tile_size": 256,
+    "block_size": 512,         # Taille des blocs du COG (pixels)
+    "compression": "DEFLATE",
+    "opacity": 0.8             # Opacité de la couche sur la carte
+}
+
+# ==================== STATISTIQUES DE CHANGEMENT ====================
+# python analyze_camps.py lit la série mensuelle de chaque .tif radar (une bande par mois),
+# calcule par mois la rétrodiffusion moyenne, son écart au mois précédent et la part de
+# pixels ayant changé de plus de change_threshold_db, puis écrit {nom}_results.png et
+# {nom}_results.json dans assets/results. Les mois déjà analysés ne sont pas relus.
+ANALYTICS_CONFIG = {
+    "decibels": True,            # Valeurs des .tif en puissance linéaire, converties en dB
+    "change_threshold_db": 3.0,  # Écart (dB) à partir duquel un pixel est compté comme changé
+    "block_rows": 512,           # Lignes lues à la fois (la mémoire ne dépend pas de la taille du raster)
+    "panel_width": 240,          # Largeur (px) des vignettes du premier, du mois médian et du dernier mois
+    "chart_height": 60,          # Hauteur (px) du graphique des pixels changés par mois
+    "workers": 0                 # Processus analysant les camps en parallèle (0 : un par cœur)
+}
+
+# ==================== SERVEUR LOCAL ====================
+# python serve.py sert output/ et assets/ : variantes précompressées (.br, .gz) si elles
+# existent, sinon compression faite une seule fois et gardée en mémoire, ETags (empreinte
+# du contenu), requêtes conditionnelles et requêtes partielles (Range) pour reprendre les
+# téléchargements des .tif. Les assets publiés et les tuiles, dont le nom contient
+# l'empreinte, sont mis en cache par le navigateur sans limite de durée.
+SERVE_CONFIG = {
+    "host": "127.0.0.1",
+    "port": 8000,
+    "roots": [OUTPUT_DIR, ASSETS_DIR],              # Seuls dossiers servis
+    "immutable_dirs": [PUBLISHED_ASSETS_DIR, TILES_DIR],
+    "compress_extensions": [".html", ".js", ".css", ".json", ".geojson", ".svg", ".txt", ".csv"],
+    "compress_max_bytes": 32 * 1024 * 1024,         # Taille maximale d'un fichier compressé à la volée
+    "memory_cache_bytes": 64 * 1024 * 1024          # Mémoire des réponses compressées gardées
+}
+
+# ==================== SERVICE DES CAMPS ====================
+# python camp_daemon.py garde les camps en mémoire et répond à une API HTTP/JSON locale
+# (ajout, modification, suppression, liste et requêtes par rectangle paginées avec ETag).
+# Les modifications sont ajoutées au journal en arrière-plan, regroupées sur save_delay
+# secondes. add_camps.py passe par le service tant qu'il est démarré (fichier d'état).
+DAEMON_STATE_FILE = os.path.join(DATA_DIR, "camps.daemon.json")
+DAEMON_CONFIG = {
+    "host": "127.0.0.1",      # Adresse d'écoute (locale : l'API n'est pas authentifiée)
+    "port": 8765,
+    "save_delay": 0.5,        # Délai (s) de regroupement des sauvegardes après une modification
+    "page_size": 500,         # Camps par page par défaut
+    "max_page_size": 10000,   # Camps par page au maximum
+    "connect_timeout": 0.5    # Délai (s) de détection du service par add_camps.py
+}
+
+# ==================== BENCHMARKS ====================
+# python benchmark.py mesure chargement, import CSV, ajouts/suppressions, sauvegarde et
+# génération de la carte sur des camps synthétiques (graine fixe), puis compare les
+# résultats à benchmarks/baseline.json : une mesure dépassant la référence de plus que
+# son seuil (fraction) est signalée comme régression et le script sort en erreur.
+BENCHMARKS_DIR = os.path.join(BASE_DIR, "benchmarks")
+BENCHMARK_BASELINE = os.path.join(BENCHMARKS_DIR, "baseline.json")
+BENCHMARK_RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+BENCHMARK_CONFIG = {
+    "sizes": [1000, 10000, 100000],  # Nombres de camps mesurés (jusqu'à 1 000 000)
+    "seed": 42,                      # Graine du générateur : mêmes camps à chaque exécution
+    "repeat": 3,                     # Exécutions par mesure, la plus rapide est gardée
+    "edit_operations": 1000,         # Ajouts puis suppressions par mesure de add_camp/remove_camp (et des lots)
+    "stress_writers": 4,             # Processus écrivant en même temps (python benchmark.py --stress)
+    "stress_operations": 200,        # Opérations par processus écrivain
+    "map_workers": 4,                # Processus de generate_map_workers (comparé à la génération en série)
+    "max_map_rss_growth": 128 * 1024 * 1024,  # Hausse maximale de la mémoire résidente pendant generate_map (octets)
+    "map_rss_budget_base": 96 * 1024 * 1024,  # Budget du pic de mémoire résidente de generate_map_rss : part fixe (octets)
+    "map_rss_budget_per_camp": 1536,          # ... plus cette part par camp chargé (octets, ~1,6 Go pour 1M camps)
+    "thresholds": {
+        "seconds": 0.25,             # Temps : +25 % au-delà de la référence
+        "peak_bytes": 0.20,          # Pic mémoire Python (tracemalloc)
+        "peak_rss_bytes": 0.20,      # Pic de mémoire résidente du processus (generate_map_rss)
+        "output_bytes": 0.05         # Taille du fichier écrit (camps.json, page HTML)
+    },
+    "min_seconds": 0.01              # Écart de temps ignoré en dessous (bruit de mesure)
+}
+
+# ==================== INDEX SPATIAL ====================
+SPATIAL_INDEX_CELL_SIZE = 1.0  # Taille des cellules de la grille (degrés)
+
 # ==================== ICÔNES ====================
 ICON_CONFIG = {
     "blue": {
         "path": os.path.join(ICONS_DIR, "blue_house.png"),
         "size": 30,
+        "color": "#2980b9",  # Couleur des points en rendu canvas
         "description": "Site mapping data"
     },
     "green": {
         "path": os.path.join(ICONS_DIR, "green_house.png"),
         "size": 30,
+        "color": "#27ae60",
         "description": "OpenStreetMap data"
     },
     "grey": {
         "path": os.path.join(ICONS_DIR, "grey_house.png"),
         "size": 30,
+        "color": "#7f8c8d",
         "description": "No data"
     }
 }
 
+# ==================== IMPORT CSV ====================
+CSV_IMPORT_CHUNK_SIZE = 50000  # Nombre de lignes validées et ajoutées en un bloc
+
+# ==================== DOSSIER D'ARRIVÉE ====================
+# python watch_inbox.py surveille ce dossier : les fichiers CSV ou JSON déposés sont
+# importés (mêmes contrôles que --from-csv), sauvegardés une fois par lot, puis rangés
+# dans processed/ ou failed/ avec leur rapport. La carte est régénérée une seule fois
+# après une rafale de dépôts.
+INBOX_DIR = os.path.join(DATA_DIR, "inbox")
+INBOX_CONFIG = {
+    "extensions": [".csv", ".json"],   # Fichiers importés (les autres sont ignorés)
+    "poll_interval": 1.0,              # Délai (s) entre deux examens du dossier
+    "settle_time": 2.0,                # Fichier lu seulement s'il n'a pas changé depuis ce délai (copie en cours)
+    "parallel_files": 4,               # Fichiers lus en même temps
+    "regenerate_delay": 5.0,           # Carte régénérée après ce délai sans nouvel import...
+    "regenerate_max_delay": 60.0,      # ... ou au plus tard ce délai après le premier import non publié
+    "processed_dir": "processed",      # Sous-dossiers (dans INBOX_DIR) des fichiers traités
+    "failed_dir": "failed"
+}
+
+# ==================== JOURNAL DES MODIFICATIONS ====================
+JOURNAL_COMPACT_ENTRIES = 1000        # Au-delà, le journal est replié dans camps.json
+JOURNAL_MIN_COMPACT_BYTES = 1 << 20   # Le journal peut dépasser l'instantané jusqu'à cette taille
+JOURNAL_FSYNC = True                  # Forcer l'écriture sur disque à chaque sauvegarde
+
+# ==================== BASE SQLITE ====================
+# Avec data/camps.sqlite, les camps restent dans la base (mode WAL) : chaque
+# modification est une transaction et plusieurs processus peuvent écrire en
+# même temps sans écraser les modifications des autres
+SQLITE_CONFIG = {
+    "busy_timeout": 30.0,    # Attente maximale du verrou d'écriture (secondes)
+    "synchronous": "FULL" if JOURNAL_FSYNC else "NORMAL"  # FULL : écriture sur disque à chaque transaction
+}
+
 # ==================== TYPES DE RADAR ====================
 RADAR_TYPES = ["VH", "VV"]
 
@@ -102,7 +296,8 @@ MESSAGES = {
     },
     "info": {
         "no_camps": "ℹ️ Aucun camp enregistré",
-        "camp_removed": "✅ Camp '{name}' supprimé"
+        "camp_removed": "✅ Camp '{name}' supprimé",
+        "map_up_to_date": "✅ Carte déjà à jour, aucun changement depuis la dernière génération : {file}"
     }
 }
 
@@ -113,6 +308,16 @@ def ensure_directories():
     for directory in directories:
         os.makedirs(directory, exist_ok=True)
 
+# Fichiers de données possibles, par ordre de priorité
+CAMPS_DATA_FILES = [CAMPS_SQLITE_FILE, CAMPS_SNAPSHOT_FILE, CAMPS_JSON_FILE]
+
+def get_camps_data_file() -> str:
+    """Fichier de données actif : la base SQLite si elle existe, sinon le format binaire, sinon le JSON"""
+    for filename in CAMPS_DATA_FILES[:-1]:
+        if os.path.exists(filename):
+            return filename
+    return CAMPS_JSON_FILE
+
 def get_icon_path(icon_type: str) -> str:
     """Retourner le chemin relatif de l'icône pour la carte HTML"""
     return f"assets/icons/{icon_type}_house.png"
@@ -123,4 +328,12 @@ def get_gif_path(camp_name: str) -> str:
 
 def get_tif_path(camp_name: str, radar: str) -> str:
     """Retourner le chemin relatif du fichier TIF pour la carte HTML"""
-    return f"assets/TIF/FBRcollectionMonthly{radar}_{camp_name}.tif"
\ No newline at end of file
+    return f"assets/TIF/FBRcollectionMonthly{radar}_{camp_name}.tif"
+
+def get_results_path(camp_name: str) -> str:
+    """Retourner le chemin relatif de l'image de résultats pour la carte HTML"""
+    return f"assets/results/{camp_name}_results.png"
+
+def get_results_summary_path(camp_name: str) -> str:
+    """Retourner le chemin relatif du résumé JSON des statistiques de changement d'un camp"""
+    return f"assets/results/{camp_name}_results.json"
\ No newline at end of file
@@ -0,0 +1,251 @@
+# src/csv_importer.py
+"""
+Import massif de camps depuis un fichier CSV
+Le fichier est lu en flux par blocs de lignes ; chaque bloc est validé colonne
+par colonne puis ajouté en une fois au stockage. Les lignes rejetées sont
+écrites au fil de l'eau dans un rapport JSON. Des camps lus dans un fichier
+JSON passent par les mêmes contrôles (run_records).
+"""
+
+import csv
+import json
+import math
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple
+from .config import *
+from .camp_store import ICON_CODES, RADAR_CODES
+from .metrics import metrics
+
+CSV_COLUMNS = ['name', 'latitude', 'longitude', 'population', 'radar', 'icon_type']
+CSV_DEFAULTS = ('', '0', '0', 'N/A', 'VH', 'blue')  # Valeurs des colonnes absentes
+
+# Codes de rejet (stables, destinés aux traitements automatiques) et messages associés
+REJECTION_REASONS = {
+    "missing_name": "Nom du camp manquant",
+    "invalid_latitude": "Latitude non numérique",
+    "invalid_longitude": "Longitude non numérique",
+    "latitude_out_of_range": "Latitude hors de [-90, 90]",
+    "longitude_out_of_range": "Longitude hors de [-180, 180]",
+    "invalid_radar": f"Type de radar invalide (valeurs acceptées : {RADAR_TYPES})",
+    "invalid_icon_type": f"Type d'icône invalide (valeurs acceptées : {list(ICON_CONFIG.keys())})",
+    "duplicate_in_file": "Nom déjà présent plus haut dans le fichier",
+    "duplicate_in_store": "Un camp de ce nom existe déjà",
+}
+
+
+class ImportReport:
+    """Bilan d'un import : compteurs et rejets, écrits en flux dans un fichier JSON optionnel"""
+
+    def __init__(self, source: str, report_file: Optional[str] = None):
+        self.source = source
+        self.report_file = report_file
+        self.rows_read = 0
+        self.imported = 0
+        self.rejected_by_reason: Dict[str, int] = {}
+        self._stream: Optional[TextIO] = None
+        self._first_rejection = True
+
+    @property
+    def rejected(self) -> int:
+        return sum(self.rejected_by_reason.values())
+
+    def open(self) -> None:
+        """Commencer l'écriture du rapport"""
+        if self.report_file is None:
+            return
+        self._stream = open(self.report_file, 'w', encoding='utf-8')
+        self._stream.write('{"source": %s, "rejections": [' % json.dumps(self.source, ensure_ascii=False))
+
+    def reject(self, line: int, name: str, reason: str, value: str = None) -> None:
+        """Enregistrer une ligne rejetée"""
+        self.rejected_by_reason[reason] = self.rejected_by_reason.get(reason, 0) + 1
+        if self._stream is None:
+            return
+        entry = {"line": line, "name": name, "reason": reason, "message": REJECTION_REASONS[reason]}
+        if value is not None:
+            entry["value"] = value
+        self._stream.write(("\n  " if self._first_rejection else ",\n  ") + json.dumps(entry, ensure_ascii=False))
+        self._first_rejection = False
+
+    def summary(self) -> Dict:
+        """Compteurs de l'import"""
+        return {
+            "rows_read": self.rows_read,
+            "imported": self.imported,
+            "rejected": self.rejected,
+            "rejected_by_reason": dict(self.rejected_by_reason)
+        }
+
+    def close(self) -> None:
+        """Terminer le rapport (le fichier reste un document JSON valide)"""
+        if self._stream is None:
+            return
+        self._stream.write('\n], "summary": %s}\n' % json.dumps(self.summary(), ensure_ascii=False))
+        self._stream.close()
+        self._stream = None
+
+
+def _parse_coordinate(text: str) -> Optional[float]:
+    """Convertir une coordonnée, None si elle n'est pas un nombre fini"""
+    try:
+        value = float(text)
+    except ValueError:
+        return None
+    return value if math.isfinite(value) else None
+
+
+def _parse_coordinates(texts: List[str]) -> List[Optional[float]]:
+    """Convertir une colonne de coordonnées (conversion groupée, puis valeur par valeur en cas d'erreur)"""
+    try:
+        values = list(map(float, texts))
+    except ValueError:
+        return [_parse_coordinate(text) for text in texts]
+    if all(map(math.isfinite, values)):
+        return values
+    return [value if math.isfinite(value) else None for value in values]
+
+
+def _record_row(record: Dict) -> List[str]:
+    """Ligne CSV équivalente à un enregistrement JSON (ValueError s'il n'est pas un objet)"""
+    if not isinstance(record, dict):
+        raise ValueError(f"Objet JSON attendu pour chaque camp, reçu : {type(record).__name__}")
+    values = dict(record)
+    coords = values.pop("coords", None)
+    if isinstance(coords, (list, tuple)) and len(coords) == 2:
+        values.setdefault("latitude", coords[0])
+        values.setdefault("longitude", coords[1])
+    # Nom et coordonnées obligatoires dans chaque enregistrement (vides : rejetés)
+    defaults = ('', '', '') + CSV_DEFAULTS[3:]
+    return [default if values.get(column) is None else str(values[column]).strip()
+            for column, default in zip(CSV_COLUMNS, defaults)]
+
+
+class CsvBulkImporter:
+    """Importer un CSV par blocs dans un CampManager"""
+
+    def __init__(self, manager, chunk_size: int = None):
+        self.manager = manager
+        self.chunk_size = chunk_size or CSV_IMPORT_CHUNK_SIZE
+        self._first_row = 0
+
+    def run(self, filename: str, report_file: str = None) -> ImportReport:
+        """Importer le fichier ; lève FileNotFoundError si le fichier est absent"""
+        with open(filename, 'r', encoding='utf-8', newline='') as file:
+            reader = csv.reader(file)
+            header = [column.strip() for column in next(reader, [])]
+            # line_num est lu après chaque ligne : numéro de la dernière ligne physique de l'enregistrement
+            return self._import(filename, header, ((reader.line_num, row) for row in reader), report_file)
+
+    def run_records(self, source: str, records: List[Dict], report_file: str = None) -> ImportReport:
+        """Importer des camps déjà lus (fichier JSON) avec les contrôles du CSV
+        
+        Chaque enregistrement est un dictionnaire aux clés de CSV_COLUMNS, ou au
+        format de camps.json (coordonnées dans "coords") ; ses valeurs sont converties
+        en texte comme des cellules CSV. Le numéro de ligne des rejets est le rang de
+        l'enregistrement (à partir de 1).
+        """
+        return self._import(source, CSV_COLUMNS, enumerate(map(_record_row, records), 1), report_file)
+
+    def _import(self, source: str, header: List[str], rows: Iterable[Tuple[int, List[str]]],
+                report_file: Optional[str]) -> ImportReport:
+        """Valider et ajouter des lignes numérotées, par blocs"""
+        positions = [header.index(column) if column in header else None for column in CSV_COLUMNS]
+        report = ImportReport(source, report_file)
+        report.open()
+        try:
+            # Lignes ajoutées par cet import : distingue doublons internes et existants
+            self._first_row = len(self.manager._store)
+            chunk: List[List[str]] = []
+            lines: List[int] = []
+            for line, row in rows:
+                if not row or (len(row) == 1 and not row[0].strip()):
+                    continue  # Ligne vide
+                chunk.append(row)
+                lines.append(line)
+                if len(chunk) >= self.chunk_size:
+                    self._import_chunk(chunk, lines, positions, report)
+                    chunk, lines = [], []
+            if chunk:
+                self._import_chunk(chunk, lines, positions, report)
+        finally:
+            report.close()
+        return report
+
+    def _import_chunk(self, chunk: List[List[str]], lines: List[int],
+                      positions: List[Optional[int]], report: ImportReport) -> None:
+        """Valider un bloc colonne par colonne et ajouter ses lignes valides"""
+        report.rows_read += len(chunk)
+        with metrics.phase("validation"):
+            names, lat_texts, lon_texts, populations, radars, icon_types = self._columns(chunk, positions)
+            latitudes = _parse_coordinates(lat_texts)
+            longitudes = _parse_coordinates(lon_texts)
+
+            index = self.manager._index
+            clean = (all(names) and None not in latitudes and None not in longitudes
+                     and -90.0 <= min(latitudes) and max(latitudes) <= 90.0
+                     and -180.0 <= min(longitudes) and max(longitudes) <= 180.0
+                     and RADAR_CODES.keys() >= set(radars) and ICON_CODES.keys() >= set(icon_types)
+                     and len(set(names)) == len(names) and index.keys().isdisjoint(names))
+
+            if clean:
+                # Cas courant : tout le bloc est valide, pas de contrôle ligne par ligne
+                valid = range(len(chunk))
+            else:
+                valid = self._validate_rows(names, latitudes, longitudes, radars, icon_types,
+                                            lat_texts, lon_texts, lines, report)
+                names, latitudes, longitudes, populations, radars, icon_types = (
+                    [column[i] for i in valid]
+                    for column in (names, latitudes, longitudes, populations, radars, icon_types))
+
+        if valid:
+            self.manager._extend(names, latitudes, longitudes, populations, radars, icon_types)
+            report.imported += len(valid)
+
+    @staticmethod
+    def _columns(chunk: List[List[str]], positions: List[Optional[int]]) -> List[List[str]]:
+        """Transposer un bloc de lignes en colonnes nettoyées (valeurs par défaut si absentes)"""
+        width = max(position for position in positions if position is not None) + 1 \
+            if any(position is not None for position in positions) else 0
+        complete = all(len(row) >= width for row in chunk)
+        transposed = list(zip(*chunk)) if complete else None
+
+        columns = []
+        for position, default in zip(positions, CSV_DEFAULTS):
+            if position is None:
+                columns.append([default] * len(chunk))
+            elif complete:
+                columns.append(list(map(str.strip, transposed[position])))
+            else:
+                columns.append([row[position].strip() if position < len(row) else default for row in chunk])
+        return columns
+
+    def _validate_rows(self, names, latitudes, longitudes, radars, icon_types,
+                       lat_texts, lon_texts, lines, report: ImportReport) -> List[int]:
+        """Contrôler chaque ligne d'un bloc, rejeter les invalides et retourner les positions valides"""
+        index = self.manager._index
+        seen = set()
+        valid = []
+        for offset, name in enumerate(names):
+            latitude, longitude = latitudes[offset], longitudes[offset]
+            line = lines[offset]
+            if not name:
+                report.reject(line, name, "missing_name")
+            elif latitude is None:
+                report.reject(line, name, "invalid_latitude", lat_texts[offset])
+            elif longitude is None:
+                report.reject(line, name, "invalid_longitude", lon_texts[offset])
+            elif not -90.0 <= latitude <= 90.0:
+                report.reject(line, name, "latitude_out_of_range", lat_texts[offset])
+            elif not -180.0 <= longitude <= 180.0:
+                report.reject(line, name, "longitude_out_of_range", lon_texts[offset])
+            elif radars[offset] not in RADAR_CODES:
+                report.reject(line, name, "invalid_radar", radars[offset])
+            elif icon_types[offset] not in ICON_CODES:
+                report.reject(line, name, "invalid_icon_type", icon_types[offset])
+            elif name in seen or index.get(name, -1) >= self._first_row:
+                report.reject(line, name, "duplicate_in_file")
+            elif name in index:
+                report.reject(line, name, "duplicate_in_store")
+            else:
+                seen.add(name)
+                valid.append(offset)
+        return valid
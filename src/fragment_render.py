@@ -0,0 +1,160 @@
+# src/fragment_render.py
+"""
+Rendu des fragments de camps par blocs
+Les lignes de campTable et les entités GeoJSON des couches sont sérialisées
+par blocs de camps, en série ou dans un pool de processus pour les grandes
+cartes, et chaque bloc est écrit dans le fichier de sortie dès qu'il est
+prêt, dans l'ordre : le texte produit est identique octet pour octet quel
+que soit le nombre de processus, et la mémoire utilisée ne dépend que de la
+taille des blocs.
+"""
+
+import json
+import os
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, TextIO
+from .camp_manager import Camp
+from .camp_store import CampStore, ICON_TYPES
+from .config import *
+from .map_layers import script_json
+from .metrics import metrics
+
+# Stockage des camps dans un processus du pool (transmis une fois, à son démarrage)
+_worker_store: Optional[CampStore] = None
+
+
+def _init_worker(store: CampStore) -> None:
+    global _worker_store
+    _worker_store = store
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    """Nombre de processus effectif (None : MAP_CONFIG["render_workers"], 0 : un par cœur)"""
+    if workers is None:
+        workers = MAP_CONFIG["render_workers"]
+    if workers == 0:
+        return os.cpu_count() or 1
+    if workers < 0:
+        raise ValueError(f"Nombre de processus invalide: {workers}")
+    return workers
+
+
+def store_rows(store: CampStore, rows) -> List[list]:
+    """Lignes compactes [lat, lon, nom, population, radar, icône] de lignes d'un stockage"""
+    names, latitudes, longitudes = store.names, store.latitudes, store.longitudes
+    radars, icon_types, population = store.radars, store.icon_types, store.population
+    return [[latitudes[row], longitudes[row], names[row], population(row),
+             RADAR_TYPES[radars[row]], ICON_TYPES[icon_types[row]]] for row in rows]
+
+
+def _timed(texts: Iterator[str]) -> Iterator[str]:
+    """Compter la production de chaque bloc (en série ou attente du pool) dans la phase fragment_rendering"""
+    texts = iter(texts)
+    while True:
+        with metrics.phase("fragment_rendering"):
+            text = next(texts, None)
+        if text is None:
+            return
+        yield text
+
+
+def _render_chunk(kind: str, rows: array, indexes: Optional[array], store: CampStore = None) -> str:
+    """Sérialiser un bloc de camps, sans les crochets du tableau JSON
+
+    kind : "rows" (lignes de campTable, suivies de leur index si indexes est fourni)
+    ou "features" (entités GeoJSON, properties.index étant la position du camp dans la carte).
+    """
+    table = store_rows(store or _worker_store, rows)
+    if kind == "rows":
+        if indexes is not None:
+            for row, index in zip(table, indexes):
+                row.append(index)
+        return script_json(table)[1:-1]
+    features = [{
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [longitude, latitude]},
+        "properties": {"index": index, "name": name, "population": population,
+                       "radar": radar, "icon_type": icon_type}
+    } for (latitude, longitude, name, population, radar, icon_type), index in zip(table, indexes)]
+    return json.dumps(features, ensure_ascii=False, separators=(",", ":"))[1:-1]
+
+
+class FragmentRenderer:
+    """Sérialise les camps d'une carte par blocs, en série ou dans un pool de processus
+
+    S'utilise comme gestionnaire de contexte : le pool (s'il y a lieu) est créé
+    à l'entrée et réutilisé par tous les fragments de la carte.
+    """
+
+    def __init__(self, camps: List[Camp], workers: int = None, chunk_size: int = None):
+        self.workers = resolve_workers(workers)
+        self.chunk_size = chunk_size or MAP_CONFIG["render_chunk_size"]
+        store = camps[0]._store if camps else CampStore()
+        if all(camp._store is store for camp in camps):
+            self.store = store
+            self.rows = array('q', [camp._row for camp in camps])
+        else:
+            # Camps issus de stockages différents : les recopier dans un stockage commun
+            self.store = CampStore()
+            self.store.extend([camp.name for camp in camps], [camp.latitude for camp in camps],
+                              [camp.longitude for camp in camps], [camp.population for camp in camps],
+                              [camp.radar for camp in camps], [camp.icon_type for camp in camps])
+            self.rows = array('q', range(len(camps)))
+        self._pool = None
+
+    def __enter__(self) -> 'FragmentRenderer':
+        if self.workers > 1 and len(self.rows) > self.chunk_size:
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.store,))
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _chunk_texts(self, kind: str, indexes: Optional[List[int]]) -> Iterator[str]:
+        """Textes des blocs non vides, dans l'ordre ; au plus deux blocs par processus sont en attente"""
+        if indexes is None:
+            rows, positions = self.rows, None
+        else:
+            positions = array('q', indexes)
+            rows = array('q', [self.rows[index] for index in indexes])
+        chunks = ((rows[start:start + self.chunk_size],
+                   positions[start:start + self.chunk_size] if positions is not None else None)
+                  for start in range(0, len(rows), self.chunk_size))
+        if self._pool is None:
+            texts = (_render_chunk(kind, chunk_rows, chunk_positions, self.store)
+                     for chunk_rows, chunk_positions in chunks)
+        else:
+            texts = self._pooled_texts(kind, chunks)
+        metrics.count("camps_rendered", len(rows))
+        return (text for text in _timed(texts) if text)
+
+    def _pooled_texts(self, kind: str, chunks) -> Iterator[str]:
+        pending = deque()
+        for chunk_rows, chunk_positions in chunks:
+            pending.append(self._pool.submit(_render_chunk, kind, chunk_rows, chunk_positions))
+            if len(pending) >= 2 * self.workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def _write_array(self, file: TextIO, kind: str, indexes: Optional[List[int]]) -> None:
+        file.write("[")
+        for position, text in enumerate(self._chunk_texts(kind, indexes)):
+            if position:
+                file.write(",")
+            file.write(text)
+        file.write("]")
+
+    def write_rows(self, file: TextIO, indexes: List[int] = None) -> None:
+        """Écrire les lignes de campTable (toutes, ou celles des positions indexes suivies de leur index), prêtes pour un <script>"""
+        self._write_array(file, "rows", indexes)
+
+    def write_features(self, file: TextIO, indexes: List[int]) -> None:
+        """Écrire la FeatureCollection GeoJSON des camps aux positions indexes"""
+        file.write('{"type":"FeatureCollection","features":')
+        self._write_array(file, "features", indexes)
+        file.write("}")
@@ -0,0 +1,279 @@
+# src/inbox_watcher.py
+"""
+Surveillance du dossier d'arrivée
+Les partenaires déposent des fichiers CSV ou JSON dans INBOX_DIR. La boucle
+asyncio d'InboxWatcher examine le dossier toutes les INBOX_CONFIG["poll_interval"]
+secondes ; les fichiers prêts au même moment forment un lot. Ils sont lus en
+parallèle (threads, chacun dans un gestionnaire temporaire, avec les contrôles
+de l'import CSV), ajoutés aux camps et sauvegardés une seule fois, puis rangés
+dans processed/ ou failed/ avec un rapport JSON. La carte n'est régénérée que
+lorsque les dépôts se calment : une rafale de 50 fichiers ne coûte qu'une
+génération.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from .camp_manager import CampManager
+from .config import *
+from .csv_importer import CsvBulkImporter, REJECTION_REASONS
+from .journal import atomic_write
+
+
+class InboxFile:
+    """Fichier déposé : camps valides (dans un gestionnaire temporaire), rejets et résultat"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.staging: Optional[CampManager] = None
+        self.rows_read = 0
+        self.imported = 0
+        self.rejections: List[Dict] = []
+        self.error: Optional[str] = None
+
+    @property
+    def failed(self) -> bool:
+        """Fichier illisible, refusé, ou dont aucune ligne n'a pu être importée"""
+        return self.error is not None or (self.imported == 0 and bool(self.rejections))
+
+    def report(self, destination: str) -> Dict:
+        """Rapport JSON écrit à côté du fichier rangé"""
+        rejected_by_reason: Dict[str, int] = {}
+        for rejection in self.rejections:
+            rejected_by_reason[rejection["reason"]] = rejected_by_reason.get(rejection["reason"], 0) + 1
+        return {
+            "source": self.path,
+            "file": destination,
+            "status": "failed" if self.failed else "processed",
+            "processed_at": datetime.now().isoformat(timespec="seconds"),
+            "error": self.error,
+            "rows_read": self.rows_read,
+            "imported": self.imported,
+            "rejected": len(self.rejections),
+            "rejected_by_reason": rejected_by_reason,
+            "rejections": self.rejections
+        }
+
+
+def read_inbox_file(path: str) -> InboxFile:
+    """Lire et valider un fichier déposé sans toucher aux camps (exécuté dans un thread)
+
+    Un CSV est lu comme par add_camps.py --from-csv ; un JSON contient une liste
+    de camps, ou un objet dont la clé "camps" en contient une (format de camps.json).
+    """
+    inbox_file = InboxFile(path)
+    staging = CampManager(quiet=True)
+    importer = CsvBulkImporter(staging)
+    descriptor, rejections_file = tempfile.mkstemp(prefix="hcr_inbox_", suffix=".json")
+    os.close(descriptor)
+    try:
+        if path.lower().endswith(".json"):
+            with open(path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            records = data.get("camps") if isinstance(data, dict) else data
+            if not isinstance(records, list):
+                raise ValueError("Liste de camps attendue (ou objet avec une clé \"camps\")")
+            report = importer.run_records(path, records, rejections_file)
+        else:
+            report = importer.run(path, rejections_file)
+        with open(rejections_file, 'r', encoding='utf-8') as file:
+            inbox_file.rejections = json.load(file)["rejections"]
+        inbox_file.rows_read = report.rows_read
+        inbox_file.staging = staging
+    except Exception as e:
+        inbox_file.error = str(e)
+    finally:
+        os.remove(rejections_file)
+    return inbox_file
+
+
+class InboxWatcher:
+    """Importer les fichiers déposés dans un dossier et régénérer la carte après chaque rafale"""
+
+    def __init__(self, manager: CampManager, inbox_dir: str = None,
+                 regenerate: Callable[[], bool] = None):
+        # regenerate : génération de la carte (None : les camps sont seulement importés)
+        self.manager = manager
+        self.inbox_dir = os.path.abspath(inbox_dir or INBOX_DIR)
+        self.processed_dir = os.path.join(self.inbox_dir, INBOX_CONFIG["processed_dir"])
+        self.failed_dir = os.path.join(self.inbox_dir, INBOX_CONFIG["failed_dir"])
+        self.regenerate = regenerate
+
+        # Premier et dernier import non encore publiés sur la carte (horloge monotone)
+        self._first_change: Optional[float] = None
+        self._last_change: Optional[float] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._stuck = set()  # Fichiers importés mais impossibles à déplacer : ignorés ensuite
+
+        self.stats = {"batches": 0, "processed_files": 0, "failed_files": 0, "camps_added": 0, "regenerations": 0}
+
+    def ready_files(self, settle: bool = True) -> List[str]:
+        """Fichiers à importer, du plus ancien au plus récent
+
+        settle : ignorer les fichiers modifiés depuis moins de INBOX_CONFIG["settle_time"]
+        secondes (copie probablement en cours). Les fichiers cachés sont ignorés.
+        """
+        now = time.time()
+        files = []
+        with os.scandir(self.inbox_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith(".") or entry.path in self._stuck or not entry.is_file():
+                    continue
+                if os.path.splitext(entry.name)[1].lower() not in INBOX_CONFIG["extensions"]:
+                    continue
+                modified = entry.stat().st_mtime
+                if settle and now - modified < INBOX_CONFIG["settle_time"]:
+                    continue
+                files.append((modified, entry.name, entry.path))
+        return [path for _, _, path in sorted(files)]
+
+    async def run(self, once: bool = False) -> None:
+        """Surveiller le dossier jusqu'à l'arrêt (Ctrl+C)
+
+        once : traiter les fichiers présents (sans attendre qu'ils se stabilisent),
+        régénérer la carte s'il y a lieu, puis s'arrêter.
+        """
+        for directory in (self.inbox_dir, self.processed_dir, self.failed_dir):
+            os.makedirs(directory, exist_ok=True)
+        self._lock = asyncio.Lock()
+        regeneration: Optional[asyncio.Task] = None
+        attempted = set()
+
+        while True:
+            files = self.ready_files(settle=not once)
+            if once:
+                # Un seul essai par fichier (un lot non sauvegardé laisse ses fichiers en place)
+                files = [path for path in files if path not in attempted]
+                attempted.update(files)
+            if files:
+                await self._ingest(files)
+            elif once:
+                if regeneration is not None:
+                    await regeneration
+                if self._first_change is not None and self.regenerate is not None:
+                    await self._regenerate()
+                return
+
+            # La génération tourne en tâche de fond : les dépôts suivants sont lus pendant ce temps
+            if (regeneration is None or regeneration.done()) and self._regeneration_due():
+                regeneration = asyncio.create_task(self._regenerate())
+            if not once:
+                await asyncio.sleep(INBOX_CONFIG["poll_interval"])
+
+    def _regeneration_due(self) -> bool:
+        """Rafale terminée (aucun import depuis regenerate_delay) ou publication trop retardée"""
+        if self._first_change is None or self.regenerate is None:
+            return False
+        now = time.monotonic()
+        return (now - self._last_change >= INBOX_CONFIG["regenerate_delay"]
+                or now - self._first_change >= INBOX_CONFIG["regenerate_max_delay"])
+
+    async def _ingest(self, paths: List[str]) -> None:
+        """Lire un lot de fichiers en parallèle, puis l'appliquer aux camps"""
+        print(f"\n📥 Lot de {len(paths)} fichier(s)")
+        limit = asyncio.Semaphore(INBOX_CONFIG["parallel_files"])
+
+        async def read(path: str) -> InboxFile:
+            async with limit:
+                return await asyncio.to_thread(read_inbox_file, path)
+
+        batch = await asyncio.gather(*(read(path) for path in paths))
+        async with self._lock:
+            try:
+                await asyncio.to_thread(self._commit, batch)
+            except Exception as e:
+                # Transaction annulée : les fichiers restent dans le dossier pour un nouvel essai
+                print(MESSAGES["error"]["general_error"].format(error=str(e)))
+
+    def _commit(self, batch: List[InboxFile]) -> None:
+        """Ajouter les camps du lot, sauvegarder une seule fois, puis ranger les fichiers"""
+        added = 0
+        with self.manager.transaction():
+            for inbox_file in batch:
+                if inbox_file.error is None:
+                    added += self._add_camps(inbox_file)
+
+        if added:
+            if not self.manager.save():
+                # Modifications non sauvegardées : les oublier, les fichiers restent pour un nouvel essai
+                print("⚠️ Lot non sauvegardé, nouvel essai au prochain examen du dossier")
+                self.manager.load()
+                return
+            now = time.monotonic()
+            self._first_change = self._first_change or now
+            self._last_change = now
+
+        for inbox_file in batch:
+            self._file_away(inbox_file)
+        failed = sum(inbox_file.failed for inbox_file in batch)
+        self.stats["batches"] += 1
+        self.stats["processed_files"] += len(batch) - failed
+        self.stats["failed_files"] += failed
+        self.stats["camps_added"] += added
+        print(f"📦 Lot traité : {added} camps ajoutés, "
+              f"{sum(len(inbox_file.rejections) for inbox_file in batch)} lignes rejetées, "
+              f"{failed} fichier(s) en échec")
+
+    def _add_camps(self, inbox_file: InboxFile) -> int:
+        """Ajouter les camps valides d'un fichier, rejeter ceux qui existent déjà ; retourner le nombre ajouté"""
+        camps = inbox_file.staging.camps
+        existing = self.manager._existing(camp.name for camp in camps)
+        inbox_file.rejections.extend(
+            {"line": None, "name": camp.name, "reason": "duplicate_in_store",
+             "message": REJECTION_REASONS["duplicate_in_store"]}
+            for camp in camps if camp.name in existing)
+        camps = [camp for camp in camps if camp.name not in existing]
+        inbox_file.staging = None
+
+        errors = []
+        if camps and not self.manager.add_camps(camps, save=False, errors=errors):
+            inbox_file.error = f"Lot refusé : {errors[0]['error']}"
+            return 0
+        inbox_file.imported = len(camps)
+        return len(camps)
+
+    def _file_away(self, inbox_file: InboxFile) -> None:
+        """Déplacer un fichier dans processed/ ou failed/ et écrire son rapport à côté"""
+        directory = self.failed_dir if inbox_file.failed else self.processed_dir
+        # Préfixe horodaté : un même nom de fichier peut être déposé plusieurs fois
+        destination = os.path.join(directory, f"{datetime.now():%Y%m%d-%H%M%S}_{os.path.basename(inbox_file.path)}")
+        try:
+            shutil.move(inbox_file.path, destination)
+            report = inbox_file.report(destination)
+            atomic_write(f"{destination}.report.json",
+                         lambda file: json.dump(report, file, indent=2, ensure_ascii=False))
+        except OSError as e:
+            self._stuck.add(inbox_file.path)
+            print(MESSAGES["error"]["general_error"].format(error=str(e)))
+            return
+
+        name = os.path.basename(inbox_file.path)
+        if inbox_file.error is not None:
+            print(f"❌ {name} : {inbox_file.error}")
+        elif inbox_file.failed:
+            print(f"❌ {name} : aucune ligne importée ({len(inbox_file.rejections)} rejetées)")
+        else:
+            print(f"   📄 {name} : {inbox_file.imported} camps ajoutés, {len(inbox_file.rejections)} lignes rejetées")
+
+    async def _regenerate(self) -> None:
+        """Régénérer la carte (dans un thread), les imports attendant la fin de la génération"""
+        async with self._lock:
+            self._first_change = self._last_change = None
+            print("\n🗺️ Régénération de la carte...")
+            if await asyncio.to_thread(self.regenerate):
+                self.stats["regenerations"] += 1
+            else:
+                print("❌ Erreur lors de la génération de la carte")
+
+    def finish(self) -> None:
+        """À l'arrêt : régénérer la carte si des camps importés n'y figurent pas encore"""
+        if self._first_change is not None and self.regenerate is not None:
+            self._first_change = self._last_change = None
+            print("\n🗺️ Régénération de la carte avant l'arrêt...")
+            if self.regenerate():
+                self.stats["regenerations"] += 1
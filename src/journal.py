@@ -0,0 +1,120 @@
+# src/journal.py
+"""
+Journal des modifications des camps
+Chaque ajout, modification ou suppression est ajouté en fin de fichier
+(une ligne JSON numérotée) au lieu de réécrire tout le fichier de données ;
+le journal est replié périodiquement dans un instantané écrit de façon atomique.
+"""
+
+import json
+import os
+from typing import Dict, Iterator, List
+
+
+def journal_path_for(snapshot_file: str) -> str:
+    """Chemin du journal associé à un fichier d'instantané
+
+    data/camps.json -> data/camps.journal ; les autres formats gardent leur
+    extension (data/camps.hcrs -> data/camps.hcrs.journal) pour ne pas partager de journal.
+    """
+    root, extension = os.path.splitext(snapshot_file)
+    return (root if extension == ".json" else snapshot_file) + ".journal"
+
+
+def _fsync_directory(directory: str) -> None:
+    """Rendre durable un renommage dans un dossier (sans effet là où ce n'est pas supporté)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(filename: str, write, binary: bool = False) -> None:
+    """Écrire un fichier via un fichier temporaire renommé : le fichier final est soit l'ancien, soit le nouveau"""
+    directory = os.path.dirname(os.path.abspath(filename))
+    temp_file = f"{filename}.tmp-{os.getpid()}"
+    try:
+        with (open(temp_file, 'wb') if binary else open(temp_file, 'w', encoding='utf-8')) as file:
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_file, filename)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+    _fsync_directory(directory)
+
+
+class CampJournal:
+    """Fichier journal en ajout seul, une entrée JSON par ligne avec un numéro de séquence croissant"""
+
+    def __init__(self, path: str, last_seq: int = 0, fsync: bool = True):
+        self.path = path
+        self.last_seq = last_seq
+        self.entry_count = 0
+        self.fsync = fsync
+
+    def replay(self, after_seq: int) -> Iterator[Dict]:
+        """Lire les entrées postérieures à after_seq
+
+        Une dernière ligne incomplète (écriture interrompue) est ignorée puis
+        retirée du fichier, afin que les ajouts suivants repartent d'une ligne propre.
+        """
+        self.last_seq = max(self.last_seq, after_seq)
+        self.entry_count = 0
+        if not os.path.exists(self.path):
+            return
+
+        valid_size = 0
+        with open(self.path, 'rb') as file:
+            for raw_line in file:
+                if not raw_line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(raw_line)
+                except ValueError:
+                    break
+                valid_size += len(raw_line)
+                self.entry_count += 1
+                seq = entry.get("seq", 0)
+                if seq > after_seq:
+                    self.last_seq = max(self.last_seq, seq)
+                    yield entry
+
+        if valid_size < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as file:
+                file.truncate(valid_size)
+
+    def append(self, entries: List[Dict]) -> int:
+        """Ajouter des entrées (numérotées à la volée) en une seule écriture, retourner le dernier numéro"""
+        if not entries:
+            return self.last_seq
+        lines = []
+        for entry in entries:
+            self.last_seq += 1
+            lines.append(json.dumps({"seq": self.last_seq, **entry}, ensure_ascii=False))
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write("\n".join(lines) + "\n")
+            file.flush()
+            if self.fsync:
+                os.fsync(file.fileno())
+        self.entry_count += len(entries)
+        return self.last_seq
+
+    def size(self) -> int:
+        """Taille du journal en octets"""
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def reset(self) -> None:
+        """Vider le journal après son repli dans un instantané (la numérotation continue)"""
+        atomic_write(self.path, lambda file: None)
+        self.entry_count = 0
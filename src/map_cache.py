@@ -0,0 +1,105 @@
+# src/map_cache.py
+"""
+Cache de génération des cartes
+Chaque carte générée est associée à une empreinte de toutes ses entrées
+(contenu des camps, paramètres, configuration de style, code du générateur) ;
+si l'empreinte n'a pas changé et que les fichiers produits sont intacts,
+la carte n'est ni reconstruite ni réécrite.
+"""
+
+import ast
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import Dict, List
+import folium
+from .config import *
+from .journal import atomic_write
+
+# Module d'entrée du générateur : lui et les modules du paquet qu'il importe
+# (directement ou non) déterminent le contenu des cartes
+_GENERATOR_ENTRY = "map_generator.py"
+
+
+def generator_sources() -> List[str]:
+    """Fichiers des modules importés par le générateur (imports relatifs, transitivement), triés"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    sources, pending = set(), [_GENERATOR_ENTRY]
+    while pending:
+        source = pending.pop()
+        if source in sources:
+            continue
+        sources.add(source)
+        with open(os.path.join(directory, source), 'rb') as file:
+            tree = ast.parse(file.read(), source)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom) and node.level == 1:
+                # from .module import ... ou from . import module
+                names = [node.module] if node.module else [alias.name for alias in node.names]
+                pending.extend(f"{name.split('.')[0]}.py" for name in names
+                               if os.path.exists(os.path.join(directory, f"{name.split('.')[0]}.py")))
+    return sorted(sources)
+
+
+def _file_state(filename: str) -> List[int]:
+    """Taille et date de modification d'un fichier produit"""
+    stat = os.stat(filename)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+@lru_cache(maxsize=None)
+def generator_version() -> str:
+    """Empreinte du code du générateur (et des modules qu'il importe) et de la version de folium"""
+    digest = hashlib.blake2b(folium.__version__.encode('utf-8'), digest_size=16)
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for source in generator_sources():
+        digest.update(source.encode('utf-8'))
+        with open(os.path.join(directory, source), 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+class MapBuildCache:
+    """Empreintes des cartes déjà générées, conservées dans un fichier JSON"""
+
+    def __init__(self, path: str = None):
+        self.path = path or MAP_BUILD_CACHE_FILE
+
+    @staticmethod
+    def fingerprint(*inputs) -> str:
+        """Empreinte d'un ensemble d'entrées sérialisables en JSON, avec la configuration de style"""
+        payload = json.dumps({
+            "inputs": inputs,
+            "generator": generator_version(),
+            "config": [MAP_CONFIG, POPUP_STYLE, LEGEND_STYLE, ICON_CONFIG, DATA_SOURCES,
+                       CATEGORY_LAYERS, RADAR_TYPES]
+        }, sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def is_up_to_date(self, output_file: str, fingerprint: str) -> bool:
+        """La carte a-t-elle déjà été générée avec ces entrées, et ses fichiers sont-ils inchangés"""
+        entry = self._load().get(os.path.abspath(output_file))
+        if entry is None or entry.get("fingerprint") != fingerprint:
+            return False
+        try:
+            return all(_file_state(filename) == state for filename, state in entry["files"].items())
+        except OSError:
+            return False
+
+    def record(self, output_file: str, fingerprint: str, files: List[str]) -> None:
+        """Mémoriser l'empreinte d'une carte et l'état des fichiers produits"""
+        builds = self._load()
+        builds[os.path.abspath(output_file)] = {
+            "fingerprint": fingerprint,
+            "files": {os.path.abspath(filename): _file_state(filename) for filename in files}
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        atomic_write(self.path, lambda file: json.dump(builds, file, indent=2))
@@ -3,182 +3,291 @@
 Générateur de carte interactive pour les camps de réfugiés
 """
 
+import html
+import math
+import shutil
+from collections import Counter
 import folium
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from .camp_manager import Camp, CampManager
 from .config import *
+from .fragment_render import FragmentRenderer
+from .map_cache import MapBuildCache
+from .metrics import metrics
+from .assets import AssetManifest
+from .map_layers import (COMPRESSED_SUFFIXES, STREAM_SLOT, RawElement, StreamedElement, add_camp_layer,
+                         add_category_layers, add_raster_overlays, minify_markup, resolve_render_mode,
+                         script_json, write_precompressed, write_streamed_page)
+from .rasters import raster_overlays
 
 class MapGenerator:
     """Générateur de carte interactive"""
     
     def __init__(self, camp_manager: CampManager):
         self.camp_manager = camp_manager
+        self.build_cache = MapBuildCache()
+        self._camp_assets: Optional[Dict[str, Dict]] = None
+        self._icon_urls: Dict[str, Optional[str]] = {}
     
-    def _create_popup_html(self, camp: Camp, modal_id: str) -> str:
-        """Créer le HTML de la popup pour un camp"""
-        return f'''
-        <div style="font-family: {POPUP_STYLE['font_family']}; 
-                    text-align: {POPUP_STYLE['text_align']}; 
-                    display: inline-block; 
-                    padding: {POPUP_STYLE['padding']};
-                    min-width: 200px;">
-            <h3 style="color: {POPUP_STYLE['title_color']}; margin: 0 0 10px 0;"><strong>{camp.name}</strong></h3>
-            <p style="font-size: {POPUP_STYLE['font_size']}; color: {POPUP_STYLE['text_color']}; margin: 5px 0;">
-                Population: <strong>{camp.population}</strong> à la fin de 2023
-            </p>
-            <p style="font-size: {POPUP_STYLE['font_size']}; color: {POPUP_STYLE['text_color']}; margin: 5px 0;">
-                Latitude: <strong>{camp.latitude:.6f}</strong>
-            </p>
-            <p style="font-size: {POPUP_STYLE['font_size']}; color: {POPUP_STYLE['text_color']}; margin: 5px 0;">
-                Longitude: <strong>{camp.longitude:.6f}</strong>
-            </p>
-            <div style="text-align: center; margin: 15px 0;">
-                <a href="#" onclick="openModal('{modal_id}');">
-                    <img src="../{get_gif_path(camp.name)}" 
-                         style="width: auto; height: auto; max-width: 100%; cursor: pointer; border: 1px solid #ddd;"
-                         alt="Aperçu {camp.name}">
-                </a>    
-            </div>
-            
-            <div style="text-align: center; margin: 15px 0;">
-                <div style="margin-bottom: 8px;">
-                    <a href="#" onclick="openModal('{modal_id}_results');" 
-                       style="font-size: {POPUP_STYLE['font_size']}; color: white; 
-                              text-decoration: none; background: #e74c3c; 
-                              padding: 8px 15px; border-radius: 4px; 
-                              display: inline-block; width: 150px; text-align: center;">
-                        📊 Voir les résultats
-                    </a>
-                </div>
-                <div>
-                    <a href=../{get_tif_path(camp.name, camp.radar)}
-                       download 
-                       style="font-size: {POPUP_STYLE['font_size']}; color: white; 
-                              text-decoration: none; background: #3498db; 
-                              padding: 8px 15px; border-radius: 4px;
-                              display: inline-block; width: 150px; text-align: center;">
-                        📥 Télécharger le .tif
-                    </a>
-                </div>
+    def _published_assets(self) -> Dict[str, Dict]:
+        """Mettre à jour le manifeste des assets et les publier dans output/ (une fois par générateur)
+        
+        Retourne les URLs des assets existants par camp ; les URLs des icônes sont gardées dans _icon_urls.
+        """
+        if self._camp_assets is None:
+            manifest = AssetManifest()
+            with metrics.phase("publish_assets"):
+                manifest.scan()
+                published = manifest.publish()
+            if published:
+                print(f"📦 {published} asset(s) publié(s) dans {PUBLISHED_ASSETS_DIR}")
+            self._camp_assets = manifest.camp_assets()
+            self._icon_urls = manifest.icon_urls()
+        return self._camp_assets
+    
+    def _create_stylesheet(self) -> str:
+        """Créer la feuille de style (minifiée) des popups, modals, légende et statistiques
+        
+        Les valeurs viennent de POPUP_STYLE et LEGEND_STYLE ; les modèles n'utilisent que des classes.
+        """
+        panel = {"background-color": "white", "border-radius": "8px", "box-shadow": "0 2px 10px rgba(0,0,0,0.3)"}
+        rules = {
+            ".hcr-popup": {"font-family": POPUP_STYLE["font_family"], "text-align": POPUP_STYLE["text_align"],
+                           "display": "inline-block", "padding": POPUP_STYLE["padding"], "min-width": "200px"},
+            ".hcr-popup h3": {"color": POPUP_STYLE["title_color"], "margin": "0 0 10px 0"},
+            ".hcr-popup p": {"font-size": POPUP_STYLE["font_size"], "color": POPUP_STYLE["text_color"], "margin": "5px 0"},
+            ".hcr-center": {"text-align": "center", "margin": "15px 0"},
+            ".hcr-preview": {"width": "auto", "height": "auto", "max-width": "100%", "cursor": "pointer",
+                             "border": "1px solid #ddd"},
+            ".hcr-button-row": {"margin-bottom": "8px"},
+            ".hcr-button": {"font-size": POPUP_STYLE["font_size"], "color": "white", "text-decoration": "none",
+                            "padding": "8px 15px", "border-radius": "4px", "display": "inline-block",
+                            "width": "150px", "text-align": "center"},
+            ".hcr-results": {"background": "#e74c3c"},
+            ".hcr-download": {"background": "#3498db"},
+            ".hcr-modal": {"display": "none", "position": "fixed", "top": "0", "left": "0", "width": "100%",
+                           "height": "100%", "background-color": "rgba(0,0,0,0.8)", "z-index": "9999",
+                           "cursor": "pointer"},
+            ".hcr-modal-close": {"position": "absolute", "top": "20px", "right": "30px", "color": "white",
+                                 "font-size": "40px", "cursor": "pointer", "z-index": "10000"},
+            ".hcr-modal-body": {"display": "flex", "align-items": "center", "justify-content": "center",
+                                "height": "100%", "padding": "20px"},
+            ".hcr-modal-content": {"text-align": "center", "max-width": "90%", "max-height": "90%", "color": "white"},
+            ".hcr-modal-content h2": {"margin-top": "20px"},
+            ".hcr-media": {"max-width": "100%", "max-height": "80vh", "object-fit": "contain"},
+            ".hcr-legend": {"position": LEGEND_STYLE["position"], "bottom": LEGEND_STYLE["bottom"],
+                            "left": LEGEND_STYLE["left"], "width": LEGEND_STYLE["width"],
+                            "height": LEGEND_STYLE["height"], "background-color": LEGEND_STYLE["background_color"],
+                            "border": LEGEND_STYLE["border"], "z-index": LEGEND_STYLE["z_index"],
+                            "font-size": LEGEND_STYLE["font_size"], "padding": LEGEND_STYLE["padding"],
+                            "border-radius": panel["border-radius"], "box-shadow": panel["box-shadow"]},
+            ".hcr-legend h4,.hcr-stats h4": {"margin": "0 0 10px 0", "color": "#2C3E50"},
+            ".hcr-legend-item": {"margin": "5px 0"},
+            ".hcr-legend-icon": {"width": "20px", "height": "20px", "vertical-align": "middle", "margin-right": "8px"},
+            ".hcr-legend-dot": {"display": "inline-block", "border-radius": "50%"},
+            ".hcr-sources": {"margin-top": "15px", "padding-top": "10px", "border-top": "1px solid #ddd"},
+            ".hcr-sources p": {"margin": "5px 0", "font-size": "12px"},
+            ".hcr-sources a": {"color": "#3498db"},
+            ".hcr-stats": dict(panel, **{"position": "fixed", "top": "10px", "right": "10px",
+                                          "border": "2px solid #3498db", "padding": "15px", "z-index": "9999",
+                                          "font-family": "Arial", "font-size": "14px"}),
+            ".hcr-regions": {"max-height": "80%", "overflow-y": "auto"},
+            ".hcr-stats p": {"margin": "5px 0"},
+            ".hcr-stats .hcr-stats-item": {"margin": "3px 0"},
+            ".hcr-stats hr": {"border": "1px solid #ddd", "margin": "10px 0"}
+        }
+        css = "".join(selector + "{" + ";".join(f"{key}:{value}" for key, value in declarations.items()) + "}"
+                      for selector, declarations in rules.items())
+        return f"<style>{css}</style>"
+    
+    def _create_popup_html(self) -> str:
+        """Créer le modèle HTML de la popup ({name}, {population}... remplis par le navigateur)
+        
+        {preview}, {results_link} et {tif_link} sont remplis avec les modèles de
+        _create_popup_links_html, ou laissés vides si l'asset du camp n'existe pas.
+        """
+        name, population, latitude, longitude = "{name}", "{population}", "{latitude}", "{longitude}"
+        preview, results_link, tif_link = "{preview}", "{results_link}", "{tif_link}"
+        return minify_markup(f'''
+        <div class="hcr-popup">
+            <h3><strong>{name}</strong></h3>
+            <p>Population: <strong>{population}</strong> à la fin de 2023</p>
+            <p>Latitude: <strong>{latitude}</strong></p>
+            <p>Longitude: <strong>{longitude}</strong></p>
+            {preview}
+            <div class="hcr-center">
+                {results_link}
+                {tif_link}
             </div>
         </div>
-        '''
+        ''')
     
-    def _create_modal_html(self, camp: Camp, modal_id: str) -> str:
-        """Créer le HTML du modal pour un camp"""
-        return f'''
-        <div id="{modal_id}" style="display:none; position:fixed; top:0; left:0; 
-                                   width:100%; height:100%; background-color: rgba(0,0,0,0.8); 
-                                   z-index: 9999; cursor: pointer;" 
-             onclick="closeModal('{modal_id}');">
-            <span onclick="closeModal('{modal_id}');" 
-                  style="position:absolute; top:20px; right:30px; color:white; 
-                         font-size:40px; cursor:pointer; z-index: 10000;">&times;</span>
-            <div style="display:flex; align-items:center; justify-content:center; 
-                        height:100%; padding:20px;">
-                <div style="text-align:center; max-width:90%; max-height:90%;">
-                    <img src="../{get_gif_path(camp.name)}" 
-                         style="max-width:100%; max-height:80vh; object-fit:contain;"
-                         alt="{camp.name}">
-                    <h2 style="color:white; margin-top:20px;">{camp.name}</h2>
-                    <p style="color:white;">Population: {camp.population} | Radar: {camp.radar}</p>
+    def _create_popup_links_html(self) -> Dict[str, str]:
+        """Créer les modèles des parties de la popup qui renvoient vers un asset du camp"""
+        name, modal_id, thumbnail, tif = "{name}", "{modal_id}", "{thumbnail}", "{tif}"
+        return {
+            "preview": minify_markup(f'''
+            <div class="hcr-center">
+                <a href="#" onclick="openModal('{modal_id}');">
+                    <img src="{thumbnail}" loading="lazy" class="hcr-preview" alt="Aperçu {name}">
+                </a>
+            </div>'''),
+            "results_link": minify_markup(f'''
+            <div class="hcr-button-row">
+                <a href="#" onclick="openModal('{modal_id}_results');" class="hcr-button hcr-results">
+                    📊 Voir les résultats
+                </a>
+            </div>'''),
+            "tif_link": minify_markup(f'''
+            <div>
+                <a href="{tif}" download class="hcr-button hcr-download">📥 Télécharger le .tif</a>
+            </div>''')
+        }
+    
+    def _create_modal_frame_html(self, content: str) -> str:
+        """Créer le cadre commun des modals (fond, bouton de fermeture) autour de content"""
+        modal_id = "{modal_id}"
+        return minify_markup(f'''
+        <div id="{modal_id}" class="hcr-modal" onclick="closeModal('{modal_id}');">
+            <span onclick="closeModal('{modal_id}');" class="hcr-modal-close">&times;</span>
+            <div class="hcr-modal-body">
+                <div class="hcr-modal-content">
+                    {content}
                 </div>
             </div>
         </div>
-        '''
+        ''')
+    
+    def _create_modal_html(self) -> str:
+        """Créer le modèle HTML du modal (animation) d'un camp ; {animation} est un des modèles de _create_animation_templates"""
+        name, population, radar, animation = "{name}", "{population}", "{radar}", "{animation}"
+        return self._create_modal_frame_html(f'''
+                    {animation}
+                    <h2>{name}</h2>
+                    <p>Population: {population} | Radar: {radar}</p>
+        ''')
 
-    def _create_results_modal_html(self, camp: Camp, modal_id: str) -> str:
-        """Créer le HTML du modal pour les résultats"""
-        return f'''
-        <div id="{modal_id}" style="display:none; position:fixed; top:0; left:0; 
-                                   width:100%; height:100%; background-color: rgba(0,0,0,0.8); 
-                                   z-index: 9999; cursor: pointer;" 
-             onclick="closeModal('{modal_id}');">
-            <span onclick="closeModal('{modal_id}');" 
-                  style="position:absolute; top:20px; right:30px; color:white; 
-                         font-size:40px; cursor:pointer; z-index: 10000;">&times;</span>
-            <div style="display:flex; align-items:center; justify-content:center; 
-                        height:100%; padding:20px;">
-                <div style="text-align:center; max-width:90%; max-height:90%;">
-                    <img src="../assets/results/{camp.name}_results.png" 
-                         style="max-width:100%; max-height:80vh; object-fit:contain;"
-                         alt="Résultats {camp.name}">
-                    <h2 style="color:white; margin-top:20px;">Résultats d'analyse - {camp.name}</h2>
-                    <p style="color:white;">Population: {camp.population} | Radar: {camp.radar}</p>
-                </div>
-            </div>
-        </div>
-        '''
-        """Créer le HTML du modal pour un camp"""
+    def _create_animation_templates(self) -> Dict[str, str]:
+        """Créer les modèles de l'animation du modal : MP4, WebP animé ou GIF d'origine selon les aperçus du camp"""
+        name, gif, thumbnail, webp, mp4 = "{name}", "{gif}", "{thumbnail}", "{webp}", "{mp4}"
+        image = f'<img src="{gif}" class="hcr-media" alt="{name}">'
+        return {
+            "image": image,
+            "picture": f'<picture><source srcset="{webp}" type="image/webp">{image}</picture>',
+            "video": f'<video src="{mp4}" poster="{thumbnail}" autoplay loop muted playsinline class="hcr-media"></video>'
+        }
+    
+    def _create_results_modal_html(self) -> str:
+        """Créer le modèle HTML du modal des résultats d'un camp"""
+        name, population, radar, results = "{name}", "{population}", "{radar}", "{results}"
+        return self._create_modal_frame_html(f'''
+                    <img src="{results}" class="hcr-media" alt="Résultats {name}">
+                    <h2>Résultats d'analyse - {name}</h2>
+                    <p>Population: {population} | Radar: {radar}</p>
+        ''')
+    
+    def _create_camp_data_html(self, table_json: str = "[]", camp_assets: Dict[str, Dict] = None) -> str:
+        """Créer la table compacte des camps, les assets existants par camp et les modèles partagés (popup, modals)
+        
+        table_json est la table sérialisée, ou STREAM_SLOT si elle est écrite au fil de
+        l'eau (StreamedElement) ; par défaut elle est créée vide et remplie au
+        chargement des couches par catégorie.
+        """
+        templates = {
+            "popup": self._create_popup_html(),
+            **self._create_popup_links_html(),
+            "modal": self._create_modal_html(),
+            "results": self._create_results_modal_html(),
+            **self._create_animation_templates()
+        }
         return f'''
-        <div id="{modal_id}" style="display:none; position:fixed; top:0; left:0; 
-                                   width:100%; height:100%; background-color: rgba(0,0,0,0.8); 
-                                   z-index: 9999; cursor: pointer;" 
-             onclick="closeModal('{modal_id}');">
-            <span onclick="closeModal('{modal_id}');" 
-                  style="position:absolute; top:20px; right:30px; color:white; 
-                         font-size:40px; cursor:pointer; z-index: 10000;">&times;</span>
-            <div style="display:flex; align-items:center; justify-content:center; 
-                        height:100%; padding:20px;">
-                <div style="text-align:center; max-width:90%; max-height:90%;">
-                    <img src=../"{get_gif_path(camp.name)}" 
-                         style="max-width:100%; max-height:80vh; object-fit:contain;"
-                         alt="{camp.name}">
-                    <h2 style="color:white; margin-top:20px;">{camp.name}</h2>
-                    <p style="color:white;">Population: {camp.population} | Radar: {camp.radar}</p>
-                </div>
-            </div>
-        </div>
+        <div id="camp_modal_host"></div>
+        <script>
+        var campTable = {table_json};
+        var campTemplates = {script_json(templates)};
+        var campAssets = {script_json(camp_assets or {})};
+        </script>
         '''
     
     def _create_legend_html(self) -> str:
-        """Créer le HTML de la légende"""
+        """Créer le HTML de la légende (icônes publiées par le manifeste des assets)"""
         legend_items = ""
         for icon_type, config in ICON_CONFIG.items():
+            icon_url = self._icon_urls.get(icon_type)
+            if icon_url:
+                icon = f'<img src="{icon_url}" class="hcr-legend-icon">'
+            else:
+                icon = f'<span class="hcr-legend-icon hcr-legend-dot" style="background:{config["color"]}"></span>'
             legend_items += f'''
-            <div style="margin: 5px 0;">
-                <img src=../{get_icon_path(icon_type)}
-                     style="width: 20px; height: 20px; vertical-align: middle; margin-right: 8px;">
+            <div class="hcr-legend-item">
+                {icon}
                 {config['description']}
             </div>
             '''
         
-        return f'''
-        <div style="position: {LEGEND_STYLE['position']}; 
-                    bottom: {LEGEND_STYLE['bottom']}; 
-                    left: {LEGEND_STYLE['left']}; 
-                    width: {LEGEND_STYLE['width']}; 
-                    height: {LEGEND_STYLE['height']};
-                    background-color: {LEGEND_STYLE['background_color']}; 
-                    border: {LEGEND_STYLE['border']}; 
-                    z-index: {LEGEND_STYLE['z_index']};
-                    font-size: {LEGEND_STYLE['font_size']}; 
-                    padding: {LEGEND_STYLE['padding']};
-                    border-radius: 8px;
-                    box-shadow: 0 2px 10px rgba(0,0,0,0.3);">
-            <h4 style="margin: 0 0 10px 0; color: #2C3E50;">🗺️ Légende</h4>
+        return minify_markup(f'''
+        <div class="hcr-legend">
+            <h4>🗺️ Légende</h4>
             {legend_items}
-            <div style="margin-top: 15px; padding-top: 10px; border-top: 1px solid #ddd;">
-                <p style="margin: 5px 0; font-size: 12px;">
+            <div class="hcr-sources">
+                <p>
                     <strong>Sources:</strong><br>
-                    <a href="{DATA_SOURCES['unhcr']}" target="_blank" style="color: #3498db;">UNHCR</a> | 
-                    <a href="{DATA_SOURCES['copernicus']}" target="_blank" style="color: #3498db;">Copernicus</a>
+                    <a href="{DATA_SOURCES['unhcr']}" target="_blank">UNHCR</a> | 
+                    <a href="{DATA_SOURCES['copernicus']}" target="_blank">Copernicus</a>
                 </p>
             </div>
         </div>
-        '''
+        ''')
     
     def _create_javascript_functions(self) -> str:
-        """Créer les fonctions JavaScript pour les modals"""
+        """Créer les fonctions JavaScript pour les popups et le modal partagé"""
         return '''
         <script>
+        function escapeHtml(text) {
+            return String(text).replace(/[&<>"']/g, function (c) { return '&#' + c.charCodeAt(0) + ';'; });
+        }
+        
+        // Remplir un modèle avec les champs d'une ligne de campTable
+        function fillCampTemplate(template, index, modalId) {
+            var row = campTable[index];
+            var assets = campAssets[row[2]] || {};
+            var tif = (assets.tif || {})[row[4]];
+            var fields = {
+                name: escapeHtml(row[2]), population: escapeHtml(row[3]), radar: escapeHtml(row[4]),
+                latitude: row[0].toFixed(6), longitude: row[1].toFixed(6), modal_id: modalId || 'modal_' + index,
+                gif: escapeHtml(assets.gif || ''), results: escapeHtml(assets.results || ''), tif: escapeHtml(tif || ''),
+                thumbnail: escapeHtml(assets.thumbnail || assets.gif || ''),
+                webp: escapeHtml(assets.webp || ''), mp4: escapeHtml(assets.mp4 || '')
+            };
+            function fill(text) {
+                return text.replace(/\\{(\\w+)\\}/g, function (match, key) { return fields[key]; });
+            }
+            // Liens vers les seuls assets existants ; vignette légère dans la popup,
+            // l'animation n'est chargée qu'à l'ouverture du modal
+            fields.preview = assets.gif ? fill(campTemplates.preview) : '';
+            fields.results_link = assets.results ? fill(campTemplates.results_link) : '';
+            fields.tif_link = tif ? fill(campTemplates.tif_link) : '';
+            fields.animation = fill(campTemplates[assets.mp4 ? 'video' : assets.webp ? 'picture' : 'image']);
+            return fill(campTemplates[template]);
+        }
+        
         function openModal(modalId) {
+            // modal_<index> : GIF du camp, modal_<index>_results : résultats
+            var match = /^modal_(\\d+)(_results)?$/.exec(modalId);
+            if (!match) {
+                return;
+            }
+            document.getElementById('camp_modal_host').innerHTML =
+                fillCampTemplate(match[2] ? 'results' : 'modal', parseInt(match[1], 10), modalId);
             document.getElementById(modalId).style.display = "block";
             document.body.style.overflow = "hidden"; // Empêcher le scroll
         }
         
         function closeModal(modalId) {
-            document.getElementById(modalId).style.display = "none";
+            var modal = document.getElementById(modalId);
+            if (modal) {
+                modal.style.display = "none";
+            }
             document.body.style.overflow = "auto"; // Rétablir le scroll
         }
         
@@ -203,153 +312,321 @@ class MapGenerator:
         </script>
         '''
     
-    def _add_statistics_panel(self, map_obj: folium.Map) -> None:
+    def _add_statistics_panel(self, map_obj: folium.Map, camps: List[Camp]) -> None:
         """Ajouter un panneau de statistiques"""
-        total_camps = len(self.camp_manager.camps)
-        stats_by_icon = {}
-        
-        for icon_type in ICON_CONFIG.keys():
-            count = len(self.camp_manager.get_camps_by_icon_type(icon_type))
-            if count > 0:
-                stats_by_icon[icon_type] = count
+        total_camps = len(camps)
+        counts = Counter(camp.icon_type for camp in camps)
+        stats_by_icon = {icon_type: counts[icon_type] for icon_type in ICON_CONFIG.keys() if counts[icon_type] > 0}
         
         stats_html = f'''
-        <div style="position: fixed; 
-                    top: 10px; right: 10px; 
-                    background-color: white; 
-                    border: 2px solid #3498db; 
-                    border-radius: 8px;
-                    padding: 15px; 
-                    z-index: 9999;
-                    box-shadow: 0 2px 10px rgba(0,0,0,0.3);
-                    font-family: Arial;
-                    font-size: 14px;">
-            <h4 style="margin: 0 0 10px 0; color: #2C3E50;">📊 Statistiques</h4>
-            <p style="margin: 5px 0;"><strong>Total des camps:</strong> {total_camps}</p>
-            <hr style="border: 1px solid #ddd; margin: 10px 0;">
+        <div class="hcr-stats">
+            <h4>📊 Statistiques</h4>
+            <p><strong>Total des camps:</strong> {total_camps}</p>
+            <hr>
         '''
         
         for icon_type, count in stats_by_icon.items():
             description = ICON_CONFIG[icon_type]['description']
-            stats_html += f'<p style="margin: 3px 0;">• {description}: {count}</p>'
+            stats_html += f'<p class="hcr-stats-item">• {description}: {count}</p>'
         
         stats_html += '</div>'
         
-        map_obj.get_root().html.add_child(folium.Element(stats_html))
+        map_obj.get_root().html.add_child(RawElement(minify_markup(stats_html)))
     
-    def generate_map(self, output_file: str = None, include_statistics: bool = True) -> bool:
-        """Générer la carte interactive"""
+    def generate_map(self, output_file: str = None, include_statistics: bool = True,
+                     render_mode: str = None, group_by: str = None, force: bool = False,
+                     workers: int = None) -> bool:
+        """Générer la carte interactive
+        
+        render_mode : "markers" (un marqueur HTML par camp), "canvas" (points dessinés
+        sur un canvas), "cluster" (regroupement côté navigateur) ou "auto" (défaut de
+        MAP_CONFIG : rendu rapide au-delà de MAP_CONFIG["fast_render_threshold"] camps).
+        group_by : "icon_type" ou "radar" pour une couche GeoJSON par catégorie
+        avec un sélecteur de couches (voir CATEGORY_LAYERS).
+        La carte n'est pas reconstruite si ni les camps, ni les paramètres, ni la
+        configuration n'ont changé depuis la dernière génération (force=True pour l'imposer).
+        workers : nombre de processus sérialisant les camps par blocs (défaut de
+        MAP_CONFIG["render_workers"], 0 pour un par cœur) ; le résultat ne dépend pas de ce nombre.
+        """
         if output_file is None:
             output_file = OUTPUT_HTML
         
-        if not self.camp_manager.camps:
+        with metrics.phase("generate_map"):
+            return self._render_map(self.camp_manager.camps, output_file, include_statistics,
+                                    MAP_CONFIG["center_location"], MAP_CONFIG["zoom_start"], render_mode, group_by,
+                                    build_key=[self.camp_manager.content_hash()], force=force, workers=workers)
+    
+    def _render_map(self, camps: List[Camp], output_file: str, include_statistics: bool,
+                    location: List[float], zoom_start: int, render_mode: str = None,
+                    group_by: str = None, build_key: list = None, force: bool = False,
+                    workers: int = None) -> bool:
+        """Construire et sauvegarder une carte pour une liste de camps
+        
+        build_key identifie la liste de camps (empreinte du contenu et sélection) :
+        s'il est fourni, la génération est sautée quand la carte existante est à jour.
+        """
+        if not camps:
             print(MESSAGES["info"]["no_camps"])
             return False
         
         try:
+            render_mode = resolve_render_mode(render_mode, len(camps))
+            
+            camp_assets = self._published_assets()
+            overlays = raster_overlays(camp.name for camp in camps)
+            fingerprint = None
+            if build_key is not None:
+                fingerprint = MapBuildCache.fingerprint(build_key, len(camps), include_statistics, location,
+                                                        zoom_start, render_mode, group_by, camp_assets,
+                                                        self._icon_urls, overlays)
+                if not force and self.build_cache.is_up_to_date(output_file, fingerprint):
+                    metrics.count("maps_up_to_date")
+                    print(MESSAGES["info"]["map_up_to_date"].format(file=output_file))
+                    return True
+            
             # Créer la carte
             map_obj = folium.Map(
-                location=MAP_CONFIG["center_location"],
-                zoom_start=MAP_CONFIG["zoom_start"],
+                location=location,
+                zoom_start=zoom_start,
                 tiles='OpenStreetMap'
             )
+            map_obj.get_root().header.add_child(RawElement(self._create_stylesheet()))
             
-            # Ajouter les camps
-            for index, camp in enumerate(self.camp_manager.camps):
-                modal_id = f"modal_{index}"
+            # Le pool de rendu (s'il y a lieu) reste ouvert jusqu'à l'écriture de la page,
+            # où la table des camps est sérialisée et écrite bloc par bloc
+            with FragmentRenderer(camps, workers) as renderer:
+                # Ajouter la table des camps, puis la couche qui crée les marqueurs dans le navigateur
+                if group_by:
+                    map_obj.get_root().html.add_child(RawElement(self._create_camp_data_html(camp_assets=camp_assets)))
+                    layer_files = add_category_layers(map_obj, camps, render_mode, group_by, output_file, renderer,
+                                                      self._icon_urls)
+                    print(f"🗂️ {len(layer_files)} couches GeoJSON écrites dans {os.path.dirname(layer_files[0])}")
+                else:
+                    layer_files = []
+                    map_obj.get_root().html.add_child(
+                        StreamedElement(self._create_camp_data_html(STREAM_SLOT, camp_assets), renderer.write_rows))
+                    add_camp_layer(map_obj, render_mode, self._icon_urls)
                 
-                # Créer la popup
-                popup_html = self._create_popup_html(camp, modal_id)
+                # Ajouter les tuiles des rasters radar (couches activables)
+                add_raster_overlays(map_obj, overlays)
                 
-                # Créer le modal
-                modal_html = self._create_modal_html(camp, modal_id)
+                # Ajouter les fonctions JavaScript
+                js_functions = self._create_javascript_functions()
+                map_obj.get_root().html.add_child(folium.Element(js_functions))
                 
-                # Ajouter le marker
-                try:
-                    folium.Marker(
-                        location=[camp.latitude, camp.longitude],
-                        popup=folium.Popup(popup_html, max_width=MAP_CONFIG["popup_max_width"]),
-                        tooltip=f"<div style='font-size: 16px; font-weight: bold;'>{camp.name}</div>",
-                        icon=folium.CustomIcon(
-                            icon_image=get_icon_path(camp.icon_type), 
-                            icon_size=(ICON_CONFIG[camp.icon_type]["size"], ICON_CONFIG[camp.icon_type]["size"])
-                        )
-                    ).add_to(map_obj)
-                    
-                    # Ajouter le modal principal (GIF) à la carte
-                    map_obj.get_root().html.add_child(folium.Element(modal_html))
-                    
-                    # Ajouter le modal des résultats
-                    results_modal_html = self._create_results_modal_html(camp, f"{modal_id}_results")
-                    map_obj.get_root().html.add_child(folium.Element(results_modal_html))
-                    
-                except Exception as e:
-                    print(f"⚠️ Erreur lors de l'ajout du camp {camp.name}: {e}")
-                    continue
-                    
-                except Exception as e:
-                    print(f"⚠️ Erreur lors de l'ajout du camp {camp.name}: {e}")
-                    continue
-            
-            # Ajouter les fonctions JavaScript
-            js_functions = self._create_javascript_functions()
-            map_obj.get_root().html.add_child(folium.Element(js_functions))
-            
-            # Ajouter la légende
-            legend_html = self._create_legend_html()
-            map_obj.get_root().html.add_child(folium.Element(legend_html))
-            
-            # Ajouter les statistiques si demandé
-            if include_statistics:
-                self._add_statistics_panel(map_obj)
-            
-            # Sauvegarder la carte
-            ensure_directories()
-            map_obj.save(output_file)
+                # Ajouter la légende
+                legend_html = self._create_legend_html()
+                map_obj.get_root().html.add_child(folium.Element(legend_html))
+                
+                # Ajouter les statistiques si demandé
+                if include_statistics:
+                    self._add_statistics_panel(map_obj, camps)
+                
+                # Sauvegarder la carte
+                ensure_directories()
+                write_streamed_page(map_obj, output_file)
+            with metrics.phase("precompress"):
+                compressed = write_precompressed([output_file] + layer_files)
+            metrics.count("maps_generated")
+            if fingerprint is not None:
+                self.build_cache.record(output_file, fingerprint, [output_file] + layer_files + compressed)
             
             print(MESSAGES["success"]["map_generated"].format(file=output_file))
-            print(f"🌍 Carte générée avec {len(self.camp_manager.camps)} camps")
+            print(f"🌍 Carte générée avec {len(camps)} camps (rendu : {render_mode})")
             return True
             
         except Exception as e:
             print(MESSAGES["error"]["general_error"].format(error=str(e)))
             return False
     
+    @staticmethod
+    def viewport_bbox(center_lat: float, center_lon: float, zoom: int,
+                      size_px: Tuple[int, int] = None) -> Tuple[float, float, float, float]:
+        """Estimer la zone visible (sud, ouest, nord, est) d'une carte Web Mercator"""
+        width, height = size_px or MAP_CONFIG["viewport_size"]
+        degrees_per_px = 360 / (256 * 2 ** zoom)
+        half_lon = min(180.0, width / 2 * degrees_per_px)
+        
+        # En Mercator, l'échelle verticale dépend de la latitude
+        center_y = math.log(math.tan(math.pi / 4 + math.radians(center_lat) / 2))
+        half_y = math.radians(height / 2 * degrees_per_px)
+        south = math.degrees(2 * math.atan(math.exp(center_y - half_y)) - math.pi / 2)
+        north = math.degrees(2 * math.atan(math.exp(center_y + half_y)) - math.pi / 2)
+        
+        if half_lon >= 180.0:
+            return (south, -180.0, north, 180.0)
+        west = (center_lon - half_lon + 180) % 360 - 180
+        east = (center_lon + half_lon + 180) % 360 - 180
+        return (south, west, north, east)
+    
+    @staticmethod
+    def zoom_for_bbox(bbox: Tuple[float, float, float, float], size_px: Tuple[int, int] = None) -> int:
+        """Plus grand niveau de zoom affichant tout le rectangle (sud, ouest, nord, est) ; inverse de viewport_bbox"""
+        width, height = size_px or MAP_CONFIG["viewport_size"]
+        south, west, north, east = bbox
+        lon_span = max(east - west, 1e-6)
+        
+        def mercator_y(latitude: float) -> float:
+            latitude = max(-85.0, min(85.0, latitude))
+            return math.log(math.tan(math.pi / 4 + math.radians(latitude) / 2))
+        
+        y_span = max(mercator_y(north) - mercator_y(south), 1e-6)
+        zoom = min(math.log2(width * 360 / (256 * lon_span)), math.log2(height * 2 * math.pi / (256 * y_span)))
+        return max(1, min(18, math.floor(zoom)))
+    
     def generate_custom_map(self, center_lat: float, center_lon: float, zoom: int, 
-                          filter_icon_type: str = None, output_file: str = None) -> bool:
-        """Générer une carte personnalisée avec des paramètres spécifiques"""
+                          filter_icon_type: str = None, output_file: str = None,
+                          bbox: Optional[Tuple[float, float, float, float]] = None,
+                          viewport_only: bool = False, render_mode: str = None,
+                          group_by: str = None, workers: int = None) -> bool:
+        """Générer une carte personnalisée avec des paramètres spécifiques
+        
+        bbox (sud, ouest, nord, est) limite les camps affichés à un rectangle ;
+        viewport_only limite les camps à la zone visible estimée depuis le centre et le zoom.
+        """
         if output_file is None:
             output_file = OUTPUT_HTML.replace('.html', '_custom.html')
         
-        # Filtrer les camps si nécessaire
-        camps_to_display = self.camp_manager.camps
+        if bbox is None and viewport_only:
+            bbox = self.viewport_bbox(center_lat, center_lon, zoom)
+        
+        # Sélectionner les camps via l'index spatial, puis filtrer si nécessaire
+        if bbox is not None:
+            camps_to_display = self.camp_manager.camps_in_bbox(*bbox)
+        else:
+            camps_to_display = self.camp_manager.camps
         if filter_icon_type:
-            camps_to_display = self.camp_manager.get_camps_by_icon_type(filter_icon_type)
+            camps_to_display = [camp for camp in camps_to_display if camp.icon_type == filter_icon_type]
         
         if not camps_to_display:
             print(f"❌ Aucun camp à afficher pour le filtre '{filter_icon_type}'")
             return False
         
-        try:
-            # Créer la carte avec les paramètres personnalisés
-            map_obj = folium.Map(
-                location=[center_lat, center_lon],
-                zoom_start=zoom,
-                tiles='OpenStreetMap'
-            )
-            
-            # Temporairement remplacer les camps du manager
-            original_camps = self.camp_manager.camps
-            self.camp_manager.camps = camps_to_display
-            
-            # Générer la carte
-            result = self.generate_map(output_file, include_statistics=True)
-            
-            # Restaurer les camps originaux
-            self.camp_manager.camps = original_camps
-            
-            return result
-            
-        except Exception as e:
-            print(MESSAGES["error"]["general_error"].format(error=str(e)))
-            return False
\ No newline at end of file
+        return self._render_map(camps_to_display, output_file, True, [center_lat, center_lon], zoom,
+                                render_mode, group_by,
+                                build_key=[self.camp_manager.content_hash(), bbox, filter_icon_type],
+                                workers=workers)
+    
+    def generate_region_maps(self, regions: Dict[str, Dict] = None, grid_size: float = None,
+                             render_mode: str = None, group_by: str = None, workers: int = None,
+                             force: bool = False) -> Optional[str]:
+        """Générer une carte par région et une page d'ensemble renvoyant vers chacune
+        
+        regions : {nom: {"label": ..., "bbox": [sud, ouest, nord, est]}} (défaut : REGION_SHARDS) ;
+        grid_size découpe plutôt les camps en carrés de grid_size degrés. Chaque carte ne
+        contient que les camps de sa région. Retourne le chemin de la page d'ensemble.
+        """
+        if not self.camp_manager.camps:
+            print(MESSAGES["info"]["no_camps"])
+            return None
+        
+        if grid_size:
+            shards = self._grid_shards(grid_size)
+        else:
+            shards = self._region_shards(REGION_SHARDS if regions is None else regions)
+        
+        content_hash = self.camp_manager.content_hash()
+        pages = []
+        for name, label, bbox, camps in shards:
+            output_file = os.path.join(OUTPUT_DIR, f"{REGION_FILE_PREFIX}{name}.html")
+            south, west, north, east = bbox
+            if not self._render_map(camps, output_file, True, [(south + north) / 2, (west + east) / 2],
+                                    self.zoom_for_bbox(bbox), render_mode, group_by,
+                                    build_key=[content_hash, name, bbox], force=force, workers=workers):
+                return None
+            pages.append((label, output_file, bbox, len(camps)))
+        
+        self._remove_stale_region_maps({output_file for _, output_file, _, _ in pages})
+        self._write_region_overview(pages, REGIONS_OVERVIEW_HTML)
+        print(f"🧭 {len(pages)} cartes régionales, page d'ensemble : {REGIONS_OVERVIEW_HTML}")
+        return REGIONS_OVERVIEW_HTML
+    
+    def _region_shards(self, regions: Dict[str, Dict]) -> List[Tuple[str, str, Tuple, List[Camp]]]:
+        """(nom, libellé, rectangle, camps) des régions non vides, plus une région pour les camps hors de toute région
+
+        Les rectangles se touchant par un bord, un camp situé sur ce bord n'est
+        placé que dans la première région qui le contient.
+        """
+        shards, assigned = [], set()
+        for name, region in regions.items():
+            bbox = tuple(region["bbox"])
+            camps = [camp for camp in self.camp_manager.camps_in_bbox(*bbox) if camp.name not in assigned]
+            if camps:
+                shards.append((name, region["label"], bbox, camps))
+                assigned.update(camp.name for camp in camps)
+        
+        others = [camp for camp in self.camp_manager.camps if camp.name not in assigned]
+        if others:
+            latitudes = [camp.latitude for camp in others]
+            longitudes = [camp.longitude for camp in others]
+            bbox = (min(latitudes), min(longitudes), max(latitudes), max(longitudes))
+            shards.append(("autres", "Autres régions", bbox, others))
+        return shards
+    
+    def _grid_shards(self, grid_size: float) -> List[Tuple[str, str, Tuple, List[Camp]]]:
+        """(nom, libellé, rectangle, camps) des carrés de grid_size degrés contenant des camps, du nord au sud"""
+        cells: Dict[Tuple[int, int], List[Camp]] = {}
+        for camp in self.camp_manager.camps:
+            key = (math.floor(camp.latitude / grid_size), math.floor(camp.longitude / grid_size))
+            cells.setdefault(key, []).append(camp)
+        
+        shards = []
+        for (row, column) in sorted(cells, key=lambda cell: (-cell[0], cell[1])):
+            south, west = row * grid_size, column * grid_size
+            shards.append((f"grille_{south:+g}_{west:+g}", f"Carré {south:g}° / {west:g}°",
+                           (south, west, south + grid_size, west + grid_size), cells[(row, column)]))
+        return shards
+    
+    def _remove_stale_region_maps(self, written: set) -> None:
+        """Supprimer les cartes régionales d'une génération précédente (région vide ou découpage différent)
+        
+        Leurs copies compressées et leurs couches GeoJSON sont supprimées avec elles.
+        """
+        removed = 0
+        for entry in list(os.scandir(OUTPUT_DIR)):
+            if not (entry.name.startswith(REGION_FILE_PREFIX) and entry.name.endswith(".html")) or entry.path in written:
+                continue
+            for filename in [entry.path] + [entry.path + suffix for suffix in COMPRESSED_SUFFIXES.values()]:
+                if os.path.exists(filename):
+                    os.remove(filename)
+            shutil.rmtree(os.path.splitext(entry.path)[0] + "_layers", ignore_errors=True)
+            removed += 1
+        if removed:
+            print(f"🧹 {removed} ancienne(s) carte(s) régionale(s) supprimée(s)")
+    
+    def _write_region_overview(self, pages: List[Tuple[str, str, Tuple, int]], output_file: str) -> None:
+        """Page d'ensemble : un rectangle et un lien par région, avec son nombre de camps (sans données de camps)"""
+        south = min(bbox[0] for _, _, bbox, _ in pages)
+        west = min(bbox[1] for _, _, bbox, _ in pages)
+        north = max(bbox[2] for _, _, bbox, _ in pages)
+        east = max(bbox[3] for _, _, bbox, _ in pages)
+        map_obj = folium.Map(
+            location=[(south + north) / 2, (west + east) / 2],
+            zoom_start=self.zoom_for_bbox((south, west, north, east)),
+            tiles='OpenStreetMap'
+        )
+        
+        links = ""
+        for label, page_file, bbox, count in pages:
+            link = f'<a href="{html.escape(os.path.basename(page_file))}">{html.escape(label)}</a>'
+            folium.Rectangle(
+                bounds=[[bbox[0], bbox[1]], [bbox[2], bbox[3]]],
+                color="#3498db", weight=2, fill=True, fill_opacity=0.1,
+                tooltip=f"{html.escape(label)} : {count} camps",
+                popup=folium.Popup(f"{link}<br>{count} camps", max_width=MAP_CONFIG["popup_max_width"])
+            ).add_to(map_obj)
+            links += f'<p class="hcr-stats-item">• {link} : {count}</p>'
+        
+        panel_html = f'''
+        <div class="hcr-stats hcr-regions">
+            <h4>🧭 Cartes par région</h4>
+            {links}
+        </div>
+        '''
+        map_obj.get_root().header.add_child(RawElement(self._create_stylesheet()))
+        map_obj.get_root().html.add_child(RawElement(minify_markup(panel_html)))
+        
+        ensure_directories()
+        write_streamed_page(map_obj, output_file)
+        with metrics.phase("precompress"):
+            write_precompressed([output_file])
@@ -0,0 +1,433 @@
+# src/map_layers.py
+"""
+Couches de camps créées dans le navigateur
+Les camps sont transmis une seule fois sous forme d'une table JSON compacte
+(campTable) ; les marqueurs sont créés à partir de cette table, dessinés sur
+un canvas unique ou regroupés côté client (Leaflet.markercluster), et les
+popups ne sont construites qu'à l'ouverture.
+"""
+
+import gzip
+import json
+import os
+import re
+import shutil
+from array import array
+from typing import Callable, Dict, List, Optional, TextIO
+import folium
+from folium.elements import JSCSSMixin
+from folium.plugins import MarkerCluster
+from folium.template import Template
+from .camp_manager import Camp
+from .config import *
+from .metrics import metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+RENDER_MODES = ("markers", "canvas", "cluster")
+CATEGORY_FIELDS = ("icon_type", "radar")
+
+_JINJA_OPENING = re.compile(r"\{(?=[{%#])")
+
+# Emplacement, dans le HTML d'un StreamedElement, du contenu écrit directement dans le fichier
+STREAM_SLOT = "<!--stream-->"
+# Qualité brotli des copies précompressées (11, le maximum, est trop lent pour les grandes cartes)
+BROTLI_QUALITY = 9
+COMPRESSED_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+
+def resolve_render_mode(render_mode: str, camp_count: int) -> str:
+    """Mode de rendu effectif ("auto" : marqueurs HTML sous le seuil, rendu rapide au-delà)"""
+    render_mode = render_mode or MAP_CONFIG["render_mode"]
+    if render_mode == "auto":
+        if camp_count >= MAP_CONFIG["fast_render_threshold"]:
+            return MAP_CONFIG["fast_render_mode"]
+        return "markers"
+    if render_mode not in RENDER_MODES:
+        raise ValueError(f"Mode de rendu invalide: {render_mode}. Valeurs acceptées: {list(RENDER_MODES)} ou 'auto'")
+    return render_mode
+
+
+def script_json(value) -> str:
+    """JSON insérable dans un <script> d'une page folium
+
+    Les balises Jinja ({{, {%, {#) ne pouvant apparaître que dans les chaînes,
+    leur accolade est échappée : le texte reste sûr même s'il passe par un
+    élément folium compilé comme modèle.
+    """
+    text = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return _JINJA_OPENING.sub(r"\\u007b", text).replace("</", "<\\/")
+
+
+class RawElement(folium.Element):
+    """Élément HTML inséré tel quel dans la page, sans être compilé comme modèle Jinja
+    
+    Utilisé pour les données volumineuses (table des camps) : folium compile sinon
+    chaque élément comme un modèle, ce qui coûte plus cher que la génération elle-même.
+    """
+
+    def __init__(self, html: str):
+        super().__init__()
+        self.html = html
+
+    def render(self, **kwargs) -> str:
+        return self.html
+
+
+class StreamedElement(RawElement):
+    """Élément HTML dont une partie est écrite directement dans le fichier de sortie
+    
+    html contient une fois STREAM_SLOT ; à l'enregistrement (write_streamed_page),
+    cet emplacement est remplacé par ce qu'écrit write(fichier), sans que ce
+    contenu ne soit jamais assemblé en mémoire avec le reste de la page.
+    """
+
+    def __init__(self, html: str, write: Callable[[TextIO], None]):
+        if html.count(STREAM_SLOT) != 1:
+            raise ValueError("Le HTML d'un élément diffusé doit contenir exactement un emplacement")
+        super().__init__(html)
+        self.write = write
+
+    @property
+    def marker(self) -> str:
+        return f"<!--stream {self.get_name()}-->"
+
+    def render(self, **kwargs) -> str:
+        return self.html.replace(STREAM_SLOT, self.marker)
+
+
+def minify_markup(html: str) -> str:
+    """Réduire les espaces d'un fragment HTML sans script (modèles, légende, panneaux)"""
+    return re.sub(r">\s+<", "><", re.sub(r"\s+", " ", html)).strip()
+
+
+def minify_page(page: str) -> str:
+    """Retirer l'indentation et les lignes vides d'une page
+
+    Les retours à la ligne sont gardés : les commentaires // et l'insertion
+    automatique des points-virgules des scripts restent valides.
+    """
+    return "\n".join(line.strip() for line in page.splitlines() if line.strip())
+
+
+def write_streamed_page(map_obj: folium.Map, output_file: str) -> None:
+    """Enregistrer la carte comme map_obj.save, en écrivant le contenu des StreamedElement au fil de l'eau
+    
+    Seule l'ossature de la page (scripts Leaflet, légende, modèles) est rendue en mémoire ;
+    elle est minifiée si MAP_CONFIG["minify"].
+    """
+    root = map_obj.get_root()
+    streamed = [child for child in root.html._children.values() if isinstance(child, StreamedElement)]
+    with metrics.phase("folium_render"):
+        page = root.render()
+        if MAP_CONFIG["minify"]:
+            page = minify_page(page)
+    with metrics.phase("file_write"):
+        with open(output_file, 'w', encoding='utf-8', newline='') as file:
+            for element in streamed:
+                before, page = page.split(element.marker, 1)
+                file.write(before)
+                element.write(file)
+            file.write(page)
+        metrics.count("bytes_written", os.path.getsize(output_file))
+
+
+def write_precompressed(files: List[str]) -> List[str]:
+    """Écrire les copies compressées (MAP_CONFIG["precompress"]) de fichiers produits, retourner les copies écrites
+
+    Chaque copie est compressée par blocs dans un fichier temporaire renommé ; les
+    copies d'un format qui n'est plus produit sont supprimées.
+    """
+    written = []
+    for filename in files:
+        for encoding, suffix in COMPRESSED_SUFFIXES.items():
+            target = filename + suffix
+            if encoding not in MAP_CONFIG["precompress"] or (encoding == "br" and brotli is None):
+                if os.path.exists(target):
+                    os.remove(target)
+                continue
+            temporary = target + ".tmp"
+            with open(filename, 'rb') as source, open(temporary, 'wb') as output:
+                if encoding == "gzip":
+                    with gzip.GzipFile(fileobj=output, mode='wb', compresslevel=9, mtime=0) as compressed:
+                        shutil.copyfileobj(source, compressed, 1 << 20)
+                else:
+                    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+                    for block in iter(lambda: source.read(1 << 20), b""):
+                        output.write(compressor.process(block))
+                    output.write(compressor.finish())
+            os.replace(temporary, target)
+            written.append(target)
+            metrics.count("bytes_written", os.path.getsize(target))
+    return written
+
+
+def camp_marker_factory(render_mode: str, icon_urls: Dict[str, Optional[str]] = None) -> str:
+    """Fonction JavaScript (ligne, index) créant le marqueur d'un camp, avec popup et infobulle à la demande
+
+    icon_urls : URL publiée de l'icône de chaque type (voir AssetManifest.icon_urls) ;
+    un type sans icône publiée garde le marqueur par défaut de Leaflet.
+    """
+    if render_mode == "canvas":
+        styles = {icon_type: {"radius": 6, "color": "white", "weight": 1,
+                              "fillColor": config["color"], "fillOpacity": 0.9}
+                  for icon_type, config in ICON_CONFIG.items()}
+        create_marker = '''
+            var renderer = L.canvas({padding: 0.5});
+            var styles = %s;
+            function createMarker(row) {
+                return L.circleMarker([row[0], row[1]], L.extend({renderer: renderer}, styles[row[5]]));
+            }''' % json.dumps(styles)
+    else:
+        icons = {icon_type: {"iconUrl": (icon_urls or {})[icon_type], "iconSize": [config["size"], config["size"]]}
+                 for icon_type, config in ICON_CONFIG.items() if (icon_urls or {}).get(icon_type)}
+        create_marker = '''
+            var icons = %s;
+            for (var type in icons) { icons[type] = L.icon(icons[type]); }
+            function createMarker(row) {
+                return L.marker([row[0], row[1]], icons[row[5]] ? {icon: icons[row[5]]} : {});
+            }''' % json.dumps(icons)
+
+    return '''(function () {
+            %s
+            return function (row, index) {
+                var marker = createMarker(row);
+                marker.bindPopup(function () { return fillCampTemplate('popup', index); }, {maxWidth: %d});
+                marker.bindTooltip(function () {
+                    return "<div style='font-size: 16px; font-weight: bold;'>" + escapeHtml(row[2]) + "</div>";
+                });
+                return marker;
+            };
+        })()''' % (create_marker, MAP_CONFIG["popup_max_width"])
+
+
+class CampLayer(folium.MacroElement):
+    """Un marqueur par camp (icône ou point sur canvas), créé depuis campTable"""
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                var createCampMarker = {{ this.factory }};
+                var layer = L.featureGroup();
+                for (var i = 0; i < campTable.length; i++) {
+                    createCampMarker(campTable[i], i).addTo(layer);
+                }
+                layer.addTo({{ this._parent.get_name() }});
+                return layer;
+            })();
+        {% endmacro %}"""
+    )
+
+    def __init__(self, factory: str):
+        super().__init__()
+        self._name = "CampLayer"
+        self.factory = factory
+
+
+class ClusteredCampLayer(MarkerCluster):
+    """Camps regroupés côté navigateur (Leaflet.markercluster), créés depuis campTable"""
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                var createCampMarker = {{ this.factory }};
+                var cluster = L.markerClusterGroup({{ this.options|tojavascript }});
+                cluster.addLayers(campTable.map(createCampMarker));
+                cluster.addTo({{ this._parent.get_name() }});
+                return cluster;
+            })();
+        {% endmacro %}"""
+    )
+
+    def __init__(self, factory: str):
+        super().__init__(chunkedLoading=True)
+        self._name = "ClusteredCampLayer"
+        self.factory = factory
+
+
+def add_camp_layer(map_obj: folium.Map, render_mode: str, icon_urls: Dict[str, Optional[str]] = None) -> None:
+    """Ajouter à la carte la couche des camps de campTable"""
+    factory = camp_marker_factory(render_mode, icon_urls)
+    if render_mode == "cluster":
+        ClusteredCampLayer(factory).add_to(map_obj)
+    else:
+        CampLayer(factory).add_to(map_obj)
+
+
+def category_label(group_by: str, value: str) -> str:
+    """Nom d'une catégorie dans le sélecteur de couches"""
+    if group_by == "icon_type":
+        return ICON_CONFIG[value]["description"]
+    return f"Radar {value}"
+
+
+class CategoryCampLayers(JSCSSMixin, folium.MacroElement):
+    """Une couche par catégorie avec sélecteur ; les couches masquées sont chargées à leur activation"""
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                var map = {{ this._parent.get_name() }};
+                var createCampMarker = {{ this.factory }};
+                var categories = campCategories;
+                var overlays = {};
+
+                // Ajouter des camps [lat, lon, nom, population, radar, icône, index] (et leurs lignes dans campTable)
+                function addRows(group, rows) {
+                    var markers = rows.map(function (row) {
+                        var index = row.pop();
+                        campTable[index] = row;
+                        return createCampMarker(row, index);
+                    });
+                    {%- if this.clustered %}
+                    group.addLayers(markers);
+                    {%- else %}
+                    markers.forEach(function (marker) { group.addLayer(marker); });
+                    {%- endif %}
+                }
+
+                function featureRows(collection) {
+                    return collection.features.map(function (feature) {
+                        var p = feature.properties, coordinates = feature.geometry.coordinates;
+                        return [coordinates[1], coordinates[0], p.name, p.population, p.radar, p.icon_type, p.index];
+                    });
+                }
+
+                categories.forEach(function (category) {
+                    {%- if this.clustered %}
+                    var group = L.markerClusterGroup({chunkedLoading: true});
+                    {%- else %}
+                    var group = L.featureGroup();
+                    {%- endif %}
+                    var loaded = category.rows !== null;
+                    if (loaded) {
+                        addRows(group, category.rows);
+                    }
+                    group.on('add', function () {
+                        if (loaded) {
+                            return;
+                        }
+                        loaded = true;
+                        fetch(category.url)
+                            .then(function (response) {
+                                if (!response.ok) {
+                                    throw new Error(response.status + ' ' + response.statusText);
+                                }
+                                return response.json();
+                            })
+                            .then(function (collection) { addRows(group, featureRows(collection)); })
+                            .catch(function (error) {
+                                loaded = false;
+                                console.error('Couche ' + category.url + ' non chargée : ' + error);
+                            });
+                    });
+                    overlays[category.label] = group;
+                    if (category.visible) {
+                        group.addTo(map);
+                    }
+                });
+
+                L.control.layers(null, overlays, {collapsed: false}).addTo(map);
+                return overlays;
+            })();
+        {% endmacro %}"""
+    )
+
+    def __init__(self, factory: str, clustered: bool):
+        super().__init__()
+        self._name = "CategoryCampLayers"
+        self.factory = factory
+        self.clustered = clustered
+        self.default_js = MarkerCluster.default_js if clustered else []
+        self.default_css = MarkerCluster.default_css if clustered else []
+
+
+def add_category_layers(map_obj: folium.Map, camps: List[Camp], render_mode: str,
+                        group_by: str, output_file: str, renderer,
+                        icon_urls: Dict[str, Optional[str]] = None) -> List[str]:
+    """Écrire un fichier GeoJSON par catégorie et ajouter les couches correspondantes à la carte
+
+    Les catégories visibles par défaut (CATEGORY_LAYERS) sont aussi incluses dans
+    la page, en lignes compactes ; les autres ne sont téléchargées qu'à leur
+    activation. Les fragments sont sérialisés et écrits par blocs par renderer
+    (FragmentRenderer). Retourne les fichiers écrits.
+    """
+    if group_by not in CATEGORY_FIELDS:
+        raise ValueError(f"Catégorie invalide: {group_by}. Valeurs acceptées: {list(CATEGORY_FIELDS)}")
+
+    values = list(ICON_CONFIG.keys()) if group_by == "icon_type" else RADAR_TYPES
+    members: Dict[str, array] = {value: array('q') for value in values}
+    for index, camp in enumerate(camps):
+        members[getattr(camp, group_by)].append(index)
+
+    directory = os.path.splitext(output_file)[0] + "_layers"
+    os.makedirs(directory, exist_ok=True)
+    visible = CATEGORY_LAYERS[group_by]["visible"]
+    categories, written = [], []
+    for value in values:
+        indexes = members[value]
+        filename = os.path.join(directory, f"{group_by}_{value}.geojson")
+        with open(filename, 'w', encoding='utf-8') as file:
+            renderer.write_features(file, indexes)
+        written.append(filename)
+        metrics.count("bytes_written", os.path.getsize(filename))
+        category = script_json({
+            "label": f"{category_label(group_by, value)} ({len(indexes)})",
+            "url": f"{os.path.basename(directory)}/{group_by}_{value}.geojson",
+            "visible": value in visible
+        })
+        categories.append((category[:-1] + ',"rows":', indexes if value in visible else None))
+
+    def write_categories(file: TextIO) -> None:
+        for position, (category, indexes) in enumerate(categories):
+            file.write("," + category if position else category)
+            if indexes is None:
+                file.write("null")
+            else:
+                renderer.write_rows(file, indexes)
+            file.write("}")
+
+    map_obj.get_root().html.add_child(
+        StreamedElement(f"<script>var campCategories = [{STREAM_SLOT}];</script>", write_categories))
+    CategoryCampLayers(camp_marker_factory(render_mode, icon_urls), render_mode == "cluster").add_to(map_obj)
+    return written
+
+
+class RasterOverlays(folium.MacroElement):
+    """Couches de tuiles XYZ des rasters radar, masquées par défaut, avec leur sélecteur"""
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                var overlays = {};
+                {{ this.overlays|tojson }}.forEach(function (raster) {
+                    // bounds : aucune tuile n'est demandée hors de l'emprise du raster
+                    overlays[raster.label] = L.tileLayer(raster.url, {
+                        bounds: raster.bounds, minZoom: raster.minZoom, maxNativeZoom: raster.maxNativeZoom,
+                        maxZoom: 19, opacity: {{ this.opacity }}, attribution: 'Copernicus Sentinel-1'
+                    });
+                });
+                L.control.layers(null, overlays, {collapsed: true}).addTo({{ this._parent.get_name() }});
+                return overlays;
+            })();
+        {% endmacro %}"""
+    )
+
+    def __init__(self, overlays: List[Dict]):
+        super().__init__()
+        self._name = "RasterOverlays"
+        self.overlays = overlays
+        self.opacity = RASTER_CONFIG["opacity"]
+
+
+def add_raster_overlays(map_obj: folium.Map, overlays: List[Dict]) -> None:
+    """Ajouter à la carte les couches de tuiles des rasters (voir rasters.raster_overlays), s'il y en a"""
+    if overlays:
+        RasterOverlays(overlays).add_to(map_obj)
@@ -0,0 +1,222 @@
+# src/metrics.py
+"""
+Mesures des phases d'exécution
+Chaque phase (chargement, validation, rendu des fragments, rendu folium,
+écriture, sauvegarde...) note son temps réel, son temps CPU et le pic de
+mémoire du processus pendant son exécution ; des compteurs (camps rendus,
+octets écrits...) complètent le rapport JSON. Le collecteur global `metrics`
+est inactif par défaut : phase() et count() ne coûtent alors presque rien.
+main.py et add_camps.py l'activent avec --metrics ou --profile.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+from .journal import atomic_write
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_PROC_STATUS = "/proc/self/status"
+_PROC_CLEAR_REFS = "/proc/self/clear_refs"
+
+
+def _peak_rss() -> Optional[int]:
+    """Pic de mémoire résidente du processus (octets) depuis le début ou la dernière remise à zéro"""
+    try:
+        with open(_PROC_STATUS, 'rb') as file:
+            for line in file:
+                if line.startswith(b"VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Octets sous macOS, Ko ailleurs
+
+
+def _reset_peak_rss() -> bool:
+    """Remettre le pic de mémoire au niveau actuel (Linux) ; False si impossible"""
+    try:
+        with open(_PROC_CLEAR_REFS, 'w') as file:
+            file.write("5")
+        return True
+    except OSError:
+        return False
+
+
+class _Frame:
+    """Phase en cours d'exécution"""
+    __slots__ = ("name", "wall", "cpu", "peak")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.peak = 0
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+
+
+class Metrics:
+    """Collecteur des phases et des compteurs
+
+    Les phases peuvent s'imbriquer (le rendu des fragments a lieu pendant
+    l'écriture de la page) : leurs temps incluent ceux des phases qu'elles
+    contiennent, et chaque phase note sa phase parente (celle de sa première
+    exécution). Une phase exécutée plusieurs fois cumule ses temps et garde
+    le plus haut pic mémoire. Si le pic ne peut pas être remis à zéro (hors
+    Linux), la mémoire notée est le pic du processus depuis son démarrage.
+    Les processus du pool de rendu ne sont pas comptés.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.phases: Dict[str, Dict] = {}
+        self.counters: Counter = Counter()
+        self._stack: List[_Frame] = []
+        self._started = None
+        self._profile = False
+        self._profiles: Dict[str, pstats.Stats] = {}
+        self._resettable = False
+
+    def enable(self, profile: bool = False) -> None:
+        """Activer la collecte (profile : profiler chaque phase de premier niveau avec cProfile)"""
+        self.enabled = True
+        self._profile = profile
+        self._started = (datetime.now(), time.perf_counter(), time.process_time())
+        self._resettable = _reset_peak_rss()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Mesurer le bloc comme une exécution de la phase name"""
+        if not self.enabled:
+            yield
+            return
+
+        parent = self._stack[-1] if self._stack else None
+        if parent is not None and self._resettable:
+            # Le pic atteint jusqu'ici appartient au parent avant la remise à zéro
+            parent.peak = max(parent.peak, _peak_rss() or 0)
+        if self._resettable:
+            _reset_peak_rss()
+        profiler = cProfile.Profile() if self._profile and parent is None else None
+        # Entrée créée au début de la phase : le rapport suit l'ordre d'exécution
+        stats = self.phases.setdefault(name, {
+            "parent": parent.name if parent else None,
+            "calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "peak_rss_bytes": 0
+        })
+
+        frame = _Frame(name)
+        self._stack.append(frame)
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            wall = time.perf_counter() - frame.wall
+            cpu = time.process_time() - frame.cpu
+            peak = max(frame.peak, _peak_rss() or 0)
+            self._stack.pop()
+            if parent is not None:
+                parent.peak = max(parent.peak, peak)
+
+            stats["calls"] += 1
+            stats["wall_seconds"] += wall
+            stats["cpu_seconds"] += cpu
+            stats["peak_rss_bytes"] = max(stats["peak_rss_bytes"], peak)
+            if profiler is not None:
+                self._keep_profile(name, profiler)
+
+    def _keep_profile(self, name: str, profiler: cProfile.Profile) -> None:
+        """Garder le profil de la phase de premier niveau la plus lente (cumulé si elle se répète)"""
+        kept = self.slowest_phase()
+        if kept == name:
+            self._profiles[name].add(profiler)
+        elif kept is None or self.phases[name]["wall_seconds"] > self.phases[kept]["wall_seconds"]:
+            self._profiles = {name: pstats.Stats(profiler)}
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Incrémenter un compteur"""
+        if self.enabled:
+            self.counters[name] += value
+
+    def slowest_phase(self) -> Optional[str]:
+        """Phase de premier niveau dont le profil est gardé (la plus lente)"""
+        return next(iter(self._profiles), None)
+
+    def dump_profile(self, filename: str) -> Optional[str]:
+        """Écrire le profil cProfile de la phase la plus lente (lisible avec pstats), retourner la phase"""
+        phase = self.slowest_phase()
+        if phase is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+            self._profiles[phase].dump_stats(filename)
+        return phase
+
+    def report(self, command: str = None) -> Dict:
+        """Rapport sérialisable en JSON"""
+        started, wall, cpu = self._started or (datetime.now(), time.perf_counter(), time.process_time())
+        return {
+            "command": command,
+            "started": started.isoformat(timespec="seconds"),
+            "wall_seconds": round(time.perf_counter() - wall, 6),
+            "cpu_seconds": round(time.process_time() - cpu, 6),
+            "peak_rss_resettable": self._resettable,
+            "phases": [{"name": name, **stats, "wall_seconds": round(stats["wall_seconds"], 6),
+                        "cpu_seconds": round(stats["cpu_seconds"], 6)}
+                       for name, stats in self.phases.items()],
+            "counters": dict(self.counters)
+        }
+
+    def write(self, filename: str, command: str = None, extra: Dict = None) -> None:
+        """Écrire le rapport JSON de façon atomique"""
+        report = {**self.report(command), **(extra or {})}
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        atomic_write(filename, lambda file: json.dump(report, file, indent=2, ensure_ascii=False))
+
+    def print_summary(self) -> None:
+        """Afficher le temps et la mémoire de chaque phase"""
+        print("\n⏱️ Phases :")
+        for name, stats in self.phases.items():
+            indent = "   " * (1 + self._depth(name))
+            print(f"{indent}• {name} : {stats['wall_seconds']:.3f} s "
+                  f"(CPU {stats['cpu_seconds']:.3f} s, pic {stats['peak_rss_bytes'] / (1024 * 1024):.1f} Mo)"
+                  + (f", {stats['calls']} fois" if stats["calls"] > 1 else ""))
+        if self.counters:
+            print("🔢 " + ", ".join(f"{name}: {value}" for name, value in self.counters.items()))
+
+    def finish(self, command: str, metrics_file: str = None, profile_file: str = None) -> None:
+        """Afficher le résumé, écrire le profil de la phase la plus lente et le rapport JSON"""
+        self.print_summary()
+        extra = {"profile": None}
+        if profile_file:
+            phase = self.dump_profile(profile_file)
+            if phase is not None:
+                extra["profile"] = {"phase": phase, "file": profile_file}
+                print(f"🔬 Profil de la phase la plus lente ({phase}) : {profile_file}")
+                print(f"   python -m pstats {profile_file}")
+        if metrics_file:
+            self.write(metrics_file, command, extra)
+            print(f"📈 Mesures enregistrées : {metrics_file}")
+
+    def _depth(self, name: str) -> int:
+        depth = 0
+        parent = self.phases[name]["parent"]
+        while parent is not None and parent in self.phases and depth < 10:
+            depth += 1
+            parent = self.phases[parent]["parent"]
+        return depth
+
+
+# Collecteur global des scripts
+metrics = Metrics()
@@ -0,0 +1,187 @@
+# src/previews.py
+"""
+Aperçus des GIFs des camps
+Chaque GIF de assets/img_TIF est converti en une vignette fixe, légère,
+affichée dans la popup, et en animations compressées (WebP animé, MP4)
+chargées seulement à l'ouverture du modal. Les fichiers produits sont
+décrits dans un manifeste et ne sont reconstruits que si le GIF a changé
+(taille et date, puis empreinte SHA-256) ou si les outils disponibles ont changé.
+
+Pillow et ffmpeg sont optionnels : sans eux, la vignette est la première
+image du GIF, extraite sans décodage, et le modal affiche le GIF d'origine.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+from typing import Dict, Optional
+from .config import *
+from .journal import atomic_write
+
+try:
+    from PIL import Image, ImageSequence
+except ImportError:
+    Image = None
+
+GIF_TRAILER = b"\x3b"
+
+
+def available_tools() -> Dict[str, bool]:
+    """Outils de conversion installés"""
+    return {"pillow": Image is not None, "ffmpeg": shutil.which("ffmpeg") is not None}
+
+
+def _skip_sub_blocks(data: bytes, position: int) -> int:
+    """Position suivant une suite de sous-blocs GIF (terminée par un bloc de taille 0)"""
+    while True:
+        size = data[position]
+        position += 1 + size
+        if size == 0:
+            return position
+
+
+def gif_first_frame(data: bytes) -> bytes:
+    """GIF fixe contenant uniquement la première image d'un GIF animé (sans décodage)"""
+    if data[:6] not in (b"GIF87a", b"GIF89a"):
+        raise ValueError("Ce n'est pas un fichier GIF")
+    packed = data[10]
+    position = 13
+    if packed & 0x80:
+        position += 3 * 2 ** ((packed & 0x07) + 1)
+    header = data[:position]
+
+    control = b""
+    try:
+        while data[position] != GIF_TRAILER[0]:
+            if data[position] == 0x21:
+                end = _skip_sub_blocks(data, position + 2)
+                if data[position + 1] == 0xF9:
+                    # Extension de contrôle graphique (transparence) de l'image suivante
+                    control = data[position:end]
+                position = end
+            elif data[position] == 0x2C:
+                start = position
+                packed = data[position + 9]
+                position += 10
+                if packed & 0x80:
+                    position += 3 * 2 ** ((packed & 0x07) + 1)
+                end = _skip_sub_blocks(data, position + 1)
+                return header + control + data[start:end] + GIF_TRAILER
+            else:
+                break
+    except IndexError:
+        pass
+    raise ValueError("GIF tronqué ou sans image")
+
+
+def file_sha256(filename: str) -> str:
+    """Empreinte SHA-256 d'un fichier, lu par blocs"""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _build_camp_previews(source: str, name: str, tools: Dict[str, bool]) -> Dict[str, str]:
+    """Produire les aperçus d'un GIF, retourner {type: fichier relatif à PREVIEWS_DIR}"""
+    outputs = {}
+    if tools["pillow"]:
+        with Image.open(source) as image:
+            duration = image.info.get("duration", 100)
+            frames = [frame.convert("RGBA") for frame in ImageSequence.Iterator(image)]
+        thumbnail = frames[0].copy()
+        width = PREVIEW_CONFIG["thumbnail_width"]
+        thumbnail.thumbnail((width, width * thumbnail.height // thumbnail.width))
+        outputs["thumbnail"] = f"{name}_thumb.webp"
+        thumbnail.save(os.path.join(PREVIEWS_DIR, outputs["thumbnail"]), "WEBP",
+                       quality=PREVIEW_CONFIG["thumbnail_quality"])
+        outputs["webp"] = f"{name}.webp"
+        frames[0].save(os.path.join(PREVIEWS_DIR, outputs["webp"]), "WEBP", save_all=True,
+                       append_images=frames[1:], duration=duration, loop=0,
+                       quality=PREVIEW_CONFIG["webp_quality"])
+    else:
+        with open(source, 'rb') as file:
+            first_frame = gif_first_frame(file.read())
+        outputs["thumbnail"] = f"{name}_thumb.gif"
+        with open(os.path.join(PREVIEWS_DIR, outputs["thumbnail"]), 'wb') as file:
+            file.write(first_frame)
+
+    if tools["ffmpeg"]:
+        outputs["mp4"] = f"{name}.mp4"
+        subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-i", source, "-movflags", "+faststart",
+                        "-pix_fmt", "yuv420p", "-vf", "scale=trunc(iw/2)*2:trunc(ih/2)*2",
+                        "-crf", str(PREVIEW_CONFIG["mp4_crf"]), os.path.join(PREVIEWS_DIR, outputs["mp4"])],
+                       check=True)
+    return outputs
+
+
+def load_preview_manifest() -> Dict[str, Dict]:
+    """Manifeste des aperçus {nom du camp: {"source": ..., "tools": ..., "outputs": ...}}"""
+    try:
+        with open(PREVIEW_MANIFEST, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _is_current(entry: Optional[Dict], source: str, stat: os.stat_result, tools: Dict[str, bool]) -> bool:
+    """Les aperçus d'un GIF sont-ils à jour (l'empreinte n'est calculée que si la taille ou la date a changé)"""
+    if entry is None or entry["tools"] != tools:
+        return False
+    if not all(os.path.exists(os.path.join(PREVIEWS_DIR, output)) for output in entry["outputs"].values()):
+        return False
+    if entry["source"]["size"] == stat.st_size and entry["source"]["mtime_ns"] == stat.st_mtime_ns:
+        return True
+    return entry["source"]["sha256"] == file_sha256(source)
+
+
+def build_previews(force: bool = False) -> Dict[str, Dict]:
+    """Construire les aperçus manquants ou périmés des GIFs des camps, retourner le manifeste"""
+    if not os.path.isdir(IMG_TIF_DIR):
+        return {}
+    os.makedirs(PREVIEWS_DIR, exist_ok=True)
+    tools = available_tools()
+    manifest = load_preview_manifest()
+    updated, built, touched = {}, 0, False
+
+    for filename in sorted(os.listdir(IMG_TIF_DIR)):
+        name, extension = os.path.splitext(filename)
+        if extension.lower() != ".gif":
+            continue
+        source = os.path.join(IMG_TIF_DIR, filename)
+        stat = os.stat(source)
+        entry = manifest.get(name)
+        if not force and _is_current(entry, source, stat, tools):
+            if entry["source"]["mtime_ns"] != stat.st_mtime_ns:
+                # Fichier touché mais contenu identique : ne retenir que la nouvelle date
+                entry["source"]["mtime_ns"] = stat.st_mtime_ns
+                touched = True
+            updated[name] = entry
+            continue
+        try:
+            outputs = _build_camp_previews(source, name, tools)
+        except (OSError, ValueError, subprocess.CalledProcessError) as e:
+            print(f"⚠️ Aperçu de {filename} non généré : {e}")
+            continue
+        updated[name] = {
+            "source": {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_sha256(source)},
+            "tools": tools,
+            "outputs": outputs
+        }
+        built += 1
+
+    # Supprimer les aperçus des GIFs disparus ou des formats qui ne sont plus produits
+    kept = {output for entry in updated.values() for output in entry["outputs"].values()}
+    for entry in manifest.values():
+        for output in entry["outputs"].values():
+            if output not in kept and os.path.exists(os.path.join(PREVIEWS_DIR, output)):
+                os.remove(os.path.join(PREVIEWS_DIR, output))
+
+    if built or touched or updated.keys() != manifest.keys():
+        atomic_write(PREVIEW_MANIFEST, lambda file: json.dump(updated, file, indent=2, ensure_ascii=False))
+    if built:
+        print(f"🖼️ {built} aperçu(s) généré(s) dans {PREVIEWS_DIR}")
+    return updated
@@ -0,0 +1,280 @@
+# src/rasters.py
+"""
+Rasters radar des camps
+Chaque FBRcollectionMonthly{radar}_{nom}.tif de assets/TIF est converti en
+GeoTIFF optimisé pour le cloud (COG : tuilé, compressé, avec une pyramide
+d'aperçus), puis découpé en tuiles PNG XYZ (Web Mercator) écrites dans
+output/tiles/ : la carte les affiche dans une couche activable et le
+navigateur ne télécharge que les tuiles visibles. Comme pour les aperçus,
+un manifeste évite de reconvertir un .tif inchangé.
+
+rasterio est optionnel : sans lui, les rasters déjà produits restent
+utilisés et les .tif nouveaux ou modifiés ne sont pas convertis.
+"""
+
+import hashlib
+import json
+import math
+import os
+import shutil
+import struct
+import zlib
+from typing import Dict, List, Optional, Tuple
+from .config import *
+from .journal import atomic_write
+from .previews import file_sha256
+
+try:
+    import numpy as np
+    import rasterio
+    import rasterio.errors
+    from rasterio.enums import Resampling
+    from rasterio.shutil import copy as rasterio_copy
+    from rasterio.vrt import WarpedVRT
+    from rasterio.warp import transform_bounds
+    from rasterio.windows import Window, from_bounds
+except ImportError:
+    rasterio = None
+
+MERCATOR_HALF_SIZE = 20037508.342789244  # Demi-circonférence de la Terre en Web Mercator (m)
+
+
+def tif_sources() -> List[Tuple[str, str, str]]:
+    """(fichier, nom du camp, radar) des .tif de TIF_DIR nommés comme get_tif_path"""
+    sources = []
+    for filename in sorted(os.listdir(TIF_DIR)):
+        for radar in RADAR_TYPES:
+            prefix, suffix = os.path.basename(get_tif_path("{name}", radar)).split("{name}")
+            if filename.startswith(prefix) and filename.endswith(suffix) and len(filename) > len(prefix) + len(suffix):
+                sources.append((filename, filename[len(prefix):len(filename) - len(suffix)], radar))
+                break
+    return sources
+
+
+def png_bytes(pixels: 'np.ndarray') -> bytes:
+    """Image PNG 8 bits d'un tableau (hauteur, largeur) ou (hauteur, largeur, canaux)
+
+    1 canal : niveaux de gris, 2 : gris + transparence, 3 : RGB, 4 : RGBA.
+    """
+    height, width = pixels.shape[:2]
+    channels = pixels.shape[2] if pixels.ndim == 3 else 1
+    color_type = {1: 0, 2: 4, 3: 2, 4: 6}[channels]
+    rows = pixels.astype(np.uint8).reshape(height, width * channels)
+    # Chaque ligne commence par son filtre (0 : aucun)
+    raw = np.hstack([np.zeros((height, 1), np.uint8), rows]).tobytes()
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 6)) + chunk(b"IEND", b""))
+
+
+def _convert_to_cog(source: str, target: str) -> None:
+    """Convertir un GeoTIFF en COG (écrit dans un fichier temporaire renommé)"""
+    temporary = target + ".tmp"
+    rasterio_copy(source, temporary, driver="COG", COMPRESS=RASTER_CONFIG["compression"],
+                  BLOCKSIZE=RASTER_CONFIG["block_size"], OVERVIEWS="AUTO", RESAMPLING="AVERAGE", PREDICTOR="YES",
+                  BIGTIFF="IF_SAFER")
+    os.replace(temporary, target)
+
+
+def _band_index(src) -> int:
+    band = RASTER_CONFIG["band"]
+    return band if band > 0 else src.count + 1 + band
+
+
+def _stretch(src, band: int) -> Tuple[float, float]:
+    """Bornes de l'étirement des niveaux de gris, calculées sur un aperçu réduit du raster"""
+    factor = max(1.0, max(src.width, src.height) / 1024)
+    data = src.read(band, out_shape=(max(1, int(src.height / factor)), max(1, int(src.width / factor))),
+                    resampling=Resampling.average, masked=True)
+    values = np.ma.masked_invalid(data).compressed()
+    if values.size == 0:
+        return 0.0, 1.0
+    low, high = (float(value) for value in np.percentile(values, RASTER_CONFIG["percentiles"]))
+    return low, high if high > low else low + 1.0
+
+
+def native_zoom(resolution: float) -> int:
+    """Zoom XYZ dont les pixels font au plus la résolution du raster (en mètres Web Mercator)"""
+    zoom = math.ceil(math.log2(2 * MERCATOR_HALF_SIZE / (RASTER_CONFIG["tile_size"] * resolution)))
+    return max(RASTER_CONFIG["min_zoom"], min(zoom, RASTER_CONFIG["max_zoom_limit"]))
+
+
+def _tile_range(bounds: Tuple[float, float, float, float], zoom: int) -> List[Tuple[int, int]]:
+    """Tuiles (x, y) d'un zoom couvrant une emprise Web Mercator (gauche, bas, droite, haut)"""
+    left, bottom, right, top = bounds
+    span = 2 * MERCATOR_HALF_SIZE / 2 ** zoom
+    last = 2 ** zoom - 1
+
+    def index(value: float) -> int:
+        return min(last, max(0, int(value // span)))
+
+    columns = range(index(left + MERCATOR_HALF_SIZE), index(right + MERCATOR_HALF_SIZE - 1e-6) + 1)
+    rows = range(index(MERCATOR_HALF_SIZE - top), index(MERCATOR_HALF_SIZE - bottom - 1e-6) + 1)
+    return [(x, y) for x in columns for y in rows]
+
+
+def _render_tile(vrt, band: int, x: int, y: int, zoom: int, low: float, high: float) -> Optional[bytes]:
+    """PNG d'une tuile XYZ, None si le raster n'y a aucun pixel valide"""
+    size = RASTER_CONFIG["tile_size"]
+    span = 2 * MERCATOR_HALF_SIZE / 2 ** zoom
+    left, top = -MERCATOR_HALF_SIZE + x * span, MERCATOR_HALF_SIZE - y * span
+    window = from_bounds(left, top - span, left + span, top, vrt.transform)
+    try:
+        covered = window.intersection(Window(0, 0, vrt.width, vrt.height))
+    except rasterio.errors.WindowError:
+        return None
+
+    # Partie de la tuile couverte par le raster, lue à la résolution de la tuile
+    # (les aperçus du COG sont utilisés aux petits zooms)
+    scale = size / window.width
+    column, row = round((covered.col_off - window.col_off) * scale), round((covered.row_off - window.row_off) * scale)
+    width = max(1, min(size - column, round(covered.width * scale)))
+    height = max(1, min(size - row, round(covered.height * scale)))
+    data = np.ma.masked_invalid(vrt.read(band, window=covered, out_shape=(height, width),
+                                         resampling=Resampling.average, masked=True))
+    valid = ~np.ma.getmaskarray(data)
+    if not valid.any():
+        return None
+
+    gray, alpha = np.zeros((size, size), np.uint8), np.zeros((size, size), np.uint8)
+    scaled = (data.filled(low).astype(np.float64) - low) / (high - low) * 255
+    gray[row:row + height, column:column + width] = np.clip(scaled, 0, 255)
+    alpha[row:row + height, column:column + width] = valid * 255
+    return png_bytes(np.dstack([gray, alpha]))
+
+
+def _render_tiles(cog: str, directory: str) -> Dict:
+    """Écrire les tuiles XYZ d'un COG dans directory/{z}/{x}/{y}.png, retourner leur description"""
+    with rasterio.open(cog) as src:
+        band = _band_index(src)
+        low, high = _stretch(src, band)
+        west, south, east, north = transform_bounds(src.crs, "EPSG:4326", *src.bounds)
+        with WarpedVRT(src, crs="EPSG:3857", resampling=Resampling.bilinear, add_alpha=src.nodata is None) as vrt:
+            max_zoom = RASTER_CONFIG["max_zoom"] or native_zoom(vrt.res[0])
+            count = 0
+            for zoom in range(RASTER_CONFIG["min_zoom"], max_zoom + 1):
+                for x, y in _tile_range(vrt.bounds, zoom):
+                    png = _render_tile(vrt, band, x, y, zoom, low, high)
+                    if png is None:
+                        continue
+                    os.makedirs(os.path.join(directory, str(zoom), str(x)), exist_ok=True)
+                    with open(os.path.join(directory, str(zoom), str(x), f"{y}.png"), 'wb') as file:
+                        file.write(png)
+                    count += 1
+        return {"bounds": [[south, west], [north, east]], "min_zoom": RASTER_CONFIG["min_zoom"],
+                "max_zoom": max_zoom, "band": src.descriptions[band - 1] or str(band), "tiles_count": count}
+
+
+def _build_raster(source: str, stem: str, sha256: str) -> Dict:
+    """Produire le COG et les tuiles d'un .tif, retourner l'entrée du manifeste (sans la source)"""
+    cog = f"{stem}.tif"
+    _convert_to_cog(source, os.path.join(RASTERS_DIR, cog))
+    # Le nom du dossier des tuiles change avec le .tif ou la configuration : les URLs des tuiles
+    # publiées ne désignent jamais deux contenus différents
+    version = hashlib.sha256((sha256 + json.dumps(RASTER_CONFIG, sort_keys=True)).encode()).hexdigest()
+    tiles = f"{stem}.{version[:ASSET_HASH_LENGTH]}"
+    temporary = os.path.join(TILES_DIR, tiles + ".tmp")
+    shutil.rmtree(temporary, ignore_errors=True)
+    description = _render_tiles(os.path.join(RASTERS_DIR, cog), temporary)
+    shutil.rmtree(os.path.join(TILES_DIR, tiles), ignore_errors=True)
+    os.replace(temporary, os.path.join(TILES_DIR, tiles))
+    return dict(description, cog=cog, tiles=tiles)
+
+
+def load_raster_manifest() -> Dict[str, Dict]:
+    """Manifeste des rasters {nom du .tif sans extension: {"name", "radar", "cog", "tiles", "bounds"...}}"""
+    try:
+        with open(RASTER_MANIFEST, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _is_current(entry: Optional[Dict], source: str, stat: os.stat_result) -> bool:
+    """Le COG et les tuiles d'un .tif sont-ils à jour (l'empreinte n'est calculée que si la taille ou la date a changé)"""
+    if entry is None or entry["config"] != RASTER_CONFIG:
+        return False
+    if not (os.path.exists(os.path.join(RASTERS_DIR, entry["cog"])) and os.path.isdir(os.path.join(TILES_DIR, entry["tiles"]))):
+        return False
+    if entry["source"]["size"] == stat.st_size and entry["source"]["mtime_ns"] == stat.st_mtime_ns:
+        return True
+    return entry["source"]["sha256"] == file_sha256(source)
+
+
+def build_rasters(force: bool = False) -> Dict[str, Dict]:
+    """Convertir les .tif nouveaux ou modifiés en COG et en tuiles XYZ, retourner le manifeste"""
+    if not os.path.isdir(TIF_DIR):
+        return {}
+    manifest = load_raster_manifest()
+    updated, built, tiles, changed = {}, 0, 0, False
+    missing_rasterio = False
+
+    for filename, name, radar in tif_sources():
+        stem = os.path.splitext(filename)[0]
+        source = os.path.join(TIF_DIR, filename)
+        stat = os.stat(source)
+        entry = manifest.get(stem)
+        if not force and _is_current(entry, source, stat):
+            if entry["source"]["mtime_ns"] != stat.st_mtime_ns:
+                # Fichier touché mais contenu identique : ne retenir que la nouvelle date
+                entry["source"]["mtime_ns"] = stat.st_mtime_ns
+                changed = True
+            updated[stem] = entry
+            continue
+        if rasterio is None:
+            # Garder le COG et les tuiles de la version précédente (reconvertis avec rasterio)
+            missing_rasterio = True
+            if entry is not None:
+                updated[stem] = entry
+            continue
+        os.makedirs(RASTERS_DIR, exist_ok=True)
+        os.makedirs(TILES_DIR, exist_ok=True)
+        sha256 = file_sha256(source)
+        try:
+            description = _build_raster(source, stem, sha256)
+        except (OSError, ValueError, rasterio.errors.RasterioError) as e:
+            print(f"⚠️ Raster {filename} non converti : {e}")
+            continue
+        updated[stem] = dict(description, name=name, radar=radar, config=RASTER_CONFIG,
+                             source={"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256})
+        built += 1
+        tiles += description["tiles_count"]
+    if missing_rasterio:
+        print("⚠️ rasterio n'est pas installé : les .tif nouveaux ou modifiés ne sont pas convertis en tuiles "
+              "(les tuiles déjà produites restent utilisées)")
+
+    # Supprimer les COG et les tuiles des .tif disparus ou reconvertis
+    kept_cogs = {entry["cog"] for entry in updated.values()}
+    kept_tiles = {entry["tiles"] for entry in updated.values()}
+    for entry in manifest.values():
+        if entry["cog"] not in kept_cogs and os.path.exists(os.path.join(RASTERS_DIR, entry["cog"])):
+            os.remove(os.path.join(RASTERS_DIR, entry["cog"]))
+        if entry["tiles"] not in kept_tiles:
+            shutil.rmtree(os.path.join(TILES_DIR, entry["tiles"]), ignore_errors=True)
+
+    if built or changed or updated.keys() != manifest.keys():
+        os.makedirs(RASTERS_DIR, exist_ok=True)
+        atomic_write(RASTER_MANIFEST, lambda file: json.dump(updated, file, indent=2, ensure_ascii=False))
+    if built:
+        print(f"🛰️ {built} raster(s) converti(s) en COG, {tiles} tuile(s) écrite(s) dans {TILES_DIR}")
+    return updated
+
+
+def raster_overlays(camp_names) -> List[Dict]:
+    """Couches de tuiles des rasters des camps donnés, pour la carte (URLs relatives à output/)"""
+    names = set(camp_names)
+    overlays = []
+    for entry in load_raster_manifest().values():
+        if entry["name"] not in names or not os.path.isdir(os.path.join(TILES_DIR, entry["tiles"])):
+            continue
+        overlays.append({
+            "label": f"Radar {entry['radar']} – {entry['name']} ({entry['band']})",
+            "url": f"{os.path.basename(TILES_DIR)}/{entry['tiles']}/{{z}}/{{x}}/{{y}}.png",
+            "bounds": entry["bounds"],
+            "minZoom": entry["min_zoom"],
+            "maxNativeZoom": entry["max_zoom"]
+        })
+    return sorted(overlays, key=lambda overlay: overlay["label"])
@@ -0,0 +1,350 @@
+# src/server.py
+"""
+Serveur local des cartes
+Sert output/ et assets/ avec un fil par connexion (connexions persistantes
+HTTP/1.1). Les fichiers texte sont envoyés compressés : variante .br ou .gz
+écrite à côté du fichier si elle est à jour, sinon compression gzip (ou
+brotli, s'il est installé) faite une seule fois et gardée en mémoire. Chaque
+réponse porte un ETag fort (empreinte SHA-256 du contenu, reprise du
+manifeste des assets quand elle y est) et les requêtes conditionnelles et
+partielles (Range) sont prises en charge, ce qui permet de reprendre le
+téléchargement d'un gros .tif.
+"""
+
+import email.utils
+import gzip
+import http.client
+import mimetypes
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+from .assets import AssetManifest
+from .config import *
+from .previews import file_sha256
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CONTENT_TYPES = {".geojson": "application/geo+json", ".tif": "image/tiff", ".webp": "image/webp",
+                 ".mp4": "video/mp4", ".js": "text/javascript", ".json": "application/json"}
+# Variantes précompressées, par ordre de préférence
+PRECOMPRESSED = [("br", ".br"), ("gzip", ".gz")]
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def accepted_encodings(header: Optional[str]) -> List[str]:
+    """Encodages acceptés par le client (en-tête Accept-Encoding, hors q=0)"""
+    encodings = []
+    for item in (header or "").split(","):
+        name, _, parameters = item.strip().partition(";")
+        if name and _quality(parameters) != 0:
+            encodings.append(name.strip().lower())
+    return encodings
+
+
+def _quality(parameters: str) -> float:
+    """Valeur q d'un élément d'en-tête Accept-* (1 si absente ou illisible)"""
+    quality = parameters.strip()
+    if not quality.startswith("q="):
+        return 1.0
+    try:
+        return float(quality[2:])
+    except ValueError:
+        return 1.0
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Intervalle (début, fin incluse) d'un en-tête Range à un seul intervalle
+
+    Retourne None si l'en-tête est absent, invalide (bytes=5-3) ou non pris en charge
+    (plusieurs intervalles) : le fichier entier est envoyé, comme le demande la RFC 9110 ;
+    lève ValueError si l'intervalle n'est pas satisfiable (début au-delà de la fin du fichier).
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[6:].strip().partition("-")
+    try:
+        if first:
+            start, end = int(first), int(last) if last else size - 1
+        else:
+            start, end = max(0, size - int(last)), size - 1
+    except ValueError:
+        return None
+    if first and last and end < start:
+        return None  # Intervalle invalide : ignoré
+    if start >= size:
+        raise ValueError(header)
+    return start, min(end, size - 1)
+
+
+class StaticFiles:
+    """Fichiers servis : chemins autorisés, empreintes et réponses compressées, partagés entre les fils"""
+
+    def __init__(self, roots: List[str] = None):
+        self.roots = [os.path.realpath(root) for root in (roots or SERVE_CONFIG["roots"])]
+        self._lock = threading.Lock()
+        self._digests: Dict[str, Tuple[int, int, str]] = {}
+        self._compressed: 'OrderedDict[Tuple, bytes]' = OrderedDict()
+        self._compressed_bytes = 0
+
+        # Les empreintes des assets (et de leurs copies publiées) sont déjà dans le manifeste
+        manifest = AssetManifest()
+        for relative, entry in manifest.files.items():
+            digest = (entry["size"], entry["mtime_ns"], entry["sha256"])
+            self._digests[os.path.realpath(os.path.join(BASE_DIR, relative))] = digest
+            self._digests[os.path.realpath(os.path.join(OUTPUT_DIR, manifest.published_name(relative)))] = digest
+
+    def resolve(self, url: str) -> Optional[str]:
+        """Fichier correspondant à une URL (/output/..., /assets/...), None s'il n'existe pas ou n'est pas servi
+
+        Les fichiers et dossiers cachés (.map_build_cache.json...) ne sont pas servis.
+        """
+        requested = unquote(urlsplit(url).path)
+        if any(part.startswith(".") for part in requested.split("/")):
+            return None
+        path = os.path.realpath(os.path.join(BASE_DIR, requested.lstrip("/")))
+        root = next((root for root in self.roots if path.startswith(root + os.sep)), None)
+        if root is None or not os.path.isfile(path):
+            return None
+        if any(part.startswith(".") for part in os.path.relpath(path, root).split(os.sep)):
+            return None
+        return path
+
+    def digest(self, path: str, stat: os.stat_result) -> str:
+        """Empreinte SHA-256 d'un fichier, recalculée seulement si sa taille ou sa date a changé"""
+        cached = self._digests.get(path)
+        if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            return cached[2]
+        sha256 = file_sha256(path)
+        with self._lock:
+            self._digests[path] = (stat.st_size, stat.st_mtime_ns, sha256)
+        return sha256
+
+    def compressible(self, path: str) -> bool:
+        return os.path.splitext(path)[1].lower() in SERVE_CONFIG["compress_extensions"]
+
+    def representation(self, path: str, stat: os.stat_result,
+                       encodings: List[str]) -> Tuple[Optional[str], Optional[str], Optional[bytes]]:
+        """Version à envoyer : (encodage, fichier, contenu en mémoire) ; encodage None pour le fichier tel quel"""
+        for encoding, suffix in PRECOMPRESSED:
+            if encoding in encodings:
+                try:
+                    variant = os.stat(path + suffix)
+                except OSError:
+                    continue
+                if variant.st_mtime_ns >= stat.st_mtime_ns:
+                    return encoding, path + suffix, None
+
+        if not self.compressible(path) or stat.st_size > SERVE_CONFIG["compress_max_bytes"]:
+            return None, path, None
+        encoding = "br" if brotli is not None and "br" in encodings else "gzip" if "gzip" in encodings else None
+        if encoding is None:
+            return None, path, None
+
+        key = (path, stat.st_size, stat.st_mtime_ns, encoding)
+        with self._lock:
+            body = self._compressed.get(key)
+            if body is not None:
+                self._compressed.move_to_end(key)
+                return encoding, None, body
+        with open(path, 'rb') as file:
+            data = file.read()
+        body = brotli.compress(data) if encoding == "br" else gzip.compress(data, 9, mtime=0)
+        with self._lock:
+            if key not in self._compressed:
+                self._compressed[key] = body
+                self._compressed_bytes += len(body)
+            while self._compressed_bytes > SERVE_CONFIG["memory_cache_bytes"] and len(self._compressed) > 1:
+                _, evicted = self._compressed.popitem(last=False)
+                self._compressed_bytes -= len(evicted)
+        return encoding, None, body
+
+    @staticmethod
+    def immutable(path: str) -> bool:
+        """Fichier dont le nom contient l'empreinte (assets publiés, tuiles)"""
+        return any(path.startswith(os.path.realpath(directory) + os.sep) for directory in SERVE_CONFIG["immutable_dirs"])
+
+
+class StaticRequestHandler(BaseHTTPRequestHandler):
+    """Requêtes GET et HEAD sur les fichiers de StaticFiles"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "HCRServe/1.0"
+    # En-têtes et corps sont écrits séparément : sans TCP_NODELAY, chaque réponse
+    # d'une connexion persistante attendrait l'accusé de réception retardé (~40 ms)
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        self._serve(send_body=True)
+
+    def do_HEAD(self) -> None:
+        self._serve(send_body=False)
+
+    def log_message(self, format: str, *args) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _serve(self, send_body: bool) -> None:
+        files: StaticFiles = self.server.files
+        if urlsplit(self.path).path == "/":
+            self.send_response(302)
+            self.send_header("Location", "/" + os.path.relpath(OUTPUT_HTML, BASE_DIR).replace(os.sep, "/"))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        path = files.resolve(self.path)
+        if path is None:
+            self.send_error(404)
+            return
+
+        stat = os.stat(path)
+        encoding, source, body = files.representation(path, stat, accepted_encodings(self.headers.get("Accept-Encoding")))
+        tag = files.digest(path, stat)[:32]
+        etag = f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+        last_modified = email.utils.formatdate(stat.st_mtime, usegmt=True)
+
+        if self._not_modified(etag, stat):
+            self.send_response(304)
+            self._send_entity_headers(path, etag, last_modified, encoding)
+            self.end_headers()
+            return
+
+        size = len(body) if body is not None else os.stat(source).st_size
+        start, end, status = 0, size - 1, 200
+        if encoding is None and self._range_applies(etag, last_modified):
+            try:
+                requested = parse_range(self.headers.get("Range"), size)
+            except ValueError:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if requested is not None:
+                (start, end), status = requested, 206
+
+        self.send_response(status)
+        self._send_entity_headers(path, etag, last_modified, encoding)
+        self.send_header("Content-Type", self._content_type(path))
+        self.send_header("Content-Length", str(end - start + 1))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if not send_body:
+            return
+        if body is not None:
+            self.wfile.write(body[start:end + 1])
+        elif end >= start:
+            with open(source, 'rb') as file:
+                self.connection.sendfile(file, start, end - start + 1)
+
+    def _send_entity_headers(self, path: str, etag: str, last_modified: str, encoding: Optional[str]) -> None:
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        if StaticFiles.immutable(path):
+            self.send_header("Cache-Control", f"public, max-age={IMMUTABLE_MAX_AGE}, immutable")
+        else:
+            self.send_header("Cache-Control", "no-cache")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        else:
+            self.send_header("Accept-Ranges", "bytes")
+        if encoding or self.server.files.compressible(path):
+            self.send_header("Vary", "Accept-Encoding")
+
+    def _not_modified(self, etag: str, stat: os.stat_result) -> bool:
+        """Requête conditionnelle satisfaite (If-None-Match, sinon If-Modified-Since)"""
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return int(stat.st_mtime) <= email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _range_applies(self, etag: str, last_modified: str) -> bool:
+        """L'en-tête Range est-il à prendre en compte (If-Range absent ou toujours valide)"""
+        if_range = self.headers.get("If-Range")
+        return if_range is None or if_range.strip() in (etag, last_modified)
+
+    @staticmethod
+    def _content_type(path: str) -> str:
+        extension = os.path.splitext(path)[1].lower()
+        content_type = CONTENT_TYPES.get(extension) or mimetypes.guess_type(path)[0] or "application/octet-stream"
+        return content_type + "; charset=utf-8" if content_type.startswith("text/") else content_type
+
+
+class StaticServer(ThreadingHTTPServer):
+    """Serveur HTTP, un fil par connexion"""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address: Tuple[str, int], files: StaticFiles = None, quiet: bool = False):
+        super().__init__(address, StaticRequestHandler)
+        self.files = files or StaticFiles()
+        self.quiet = quiet
+
+
+def load_test(host: str, port: int, path: str, clients: int = 50, requests: int = 2000,
+              headers: Dict[str, str] = None) -> Dict:
+    """Envoyer requests requêtes GET depuis clients connexions persistantes simultanées
+
+    Retourne le débit (requêtes/s), les latences (médiane, 99e centile, en ms), les octets reçus et les erreurs.
+    """
+    latencies, errors, received = [], [], [0]
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def client() -> None:
+        connection = http.client.HTTPConnection(host, port, timeout=30)
+        mine, size = [], 0
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    break
+            began = time.perf_counter()
+            try:
+                connection.request("GET", path, headers=headers or {})
+                response = connection.getresponse()
+                size += len(response.read())
+                if response.status >= 400:
+                    errors.append(response.status)
+            except (OSError, http.client.HTTPException) as e:
+                errors.append(str(e))
+                connection.close()
+                connection = http.client.HTTPConnection(host, port, timeout=30)
+            mine.append(time.perf_counter() - began)
+        connection.close()
+        with lock:
+            latencies.extend(mine)
+            received[0] += size
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2) if latencies else None,
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2) if latencies else None,
+        "bytes": received[0]
+    }
@@ -0,0 +1,148 @@
+# src/snapshot.py
+"""
+Format binaire compact des camps (.hcrs)
+Le fichier reprend directement les colonnes du CampStore : il se charge en
+projetant le fichier en mémoire (mmap) et en recopiant chaque colonne d'un
+bloc, sans analyse JSON ni revalidation ligne par ligne.
+
+Disposition (petit-boutiste) :
+    en-tête   magic "HCRS", version (u16), réservé (u16), nombre de camps (u32),
+              numéro de journal (u64), CRC32 du contenu (u32), taille des métadonnées (u32)
+    contenu   métadonnées JSON (tables des codes radar/icône, populations en texte libre)
+              latitudes (f64) | longitudes (f64) | populations (i64) | radars (u8) | icônes (u8)
+              noms en UTF-8 séparés par un octet nul
+Les colonnes numériques sont alignées sur 8 octets.
+"""
+
+import json
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from typing import Tuple
+from .config import *
+from .camp_store import CampStore, ICON_TYPES
+from .journal import atomic_write
+
+SNAPSHOT_MAGIC = b"HCRS"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_EXTENSION = ".hcrs"
+_HEADER = struct.Struct("<4sHHIQII")
+_NAME_SEPARATOR = "\x00"
+
+
+def is_snapshot_file(filename: str) -> bool:
+    """Le fichier est-il au format binaire (d'après son extension)"""
+    return filename.endswith(SNAPSHOT_EXTENSION)
+
+
+def _padding(offset: int) -> int:
+    """Octets de bourrage pour aligner un décalage sur 8 octets"""
+    return -offset % 8
+
+
+def write_snapshot(store: CampStore, filename: str, journal_seq: int = 0) -> None:
+    """Écrire les lignes vivantes d'un stockage dans un fichier binaire (écriture atomique)"""
+    rows = [row for row in range(len(store)) if store.alive[row]]
+    if len(rows) == len(store):
+        names = store.names
+        columns = (store.latitudes, store.longitudes, store.populations, store.radars, store.icon_types)
+        raw_populations = store.raw_populations
+    else:
+        # Des lignes ont été supprimées : ne recopier que les lignes vivantes
+        names = [store.names[row] for row in rows]
+        columns = tuple(array(column.typecode, (column[row] for row in rows))
+                        for column in (store.latitudes, store.longitudes, store.populations,
+                                       store.radars, store.icon_types))
+        new_rows = {row: position for position, row in enumerate(rows)}
+        raw_populations = {new_rows[row]: value for row, value in store.raw_populations.items() if row in new_rows}
+
+    if any(_NAME_SEPARATOR in name for name in names):
+        raise ValueError("Un nom de camp contient un octet nul")
+
+    metadata = json.dumps({
+        "radar_types": RADAR_TYPES,
+        "icon_types": ICON_TYPES,
+        "raw_populations": {str(row): value for row, value in raw_populations.items()}
+    }, ensure_ascii=False).encode('utf-8')
+
+    parts = [metadata, b"\x00" * _padding(_HEADER.size + len(metadata))]
+    for column in columns:
+        data = column.tobytes() if sys.byteorder == "little" else _swapped(column)
+        parts.append(data)
+        parts.append(b"\x00" * _padding(len(data)))
+    parts.append(_NAME_SEPARATOR.join(names).encode('utf-8'))
+    payload = b"".join(parts)
+
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, len(names), journal_seq,
+                          zlib.crc32(payload), len(metadata))
+
+    def write(file):
+        file.write(header)
+        file.write(payload)
+
+    atomic_write(filename, write, binary=True)
+
+
+def _swapped(column: array) -> bytes:
+    """Octets d'une colonne en petit-boutiste sur une machine gros-boutiste"""
+    copy = array(column.typecode, column)
+    copy.byteswap()
+    return copy.tobytes()
+
+
+def read_snapshot(filename: str, trusted: bool = False) -> Tuple[CampStore, int]:
+    """Charger un fichier binaire dans un nouveau CampStore, retourner (stockage, numéro de journal)
+
+    Le CRC32 est vérifié sauf si trusted=True (chemin rapide pour des fichiers
+    produits localement) ; les valeurs ne sont jamais revalidées une à une.
+    """
+    with open(filename, 'rb') as file:
+        size = file.seek(0, 2)
+        if size < _HEADER.size:
+            raise ValueError(f"Fichier binaire tronqué : {filename}")
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            magic, version, _, count, journal_seq, checksum, metadata_size = _HEADER.unpack_from(mapped, 0)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"Ce n'est pas un fichier de camps binaire : {filename}")
+            if version != SNAPSHOT_VERSION:
+                raise ValueError(f"Version de fichier binaire non supportée : {version}")
+            if not trusted and zlib.crc32(memoryview(mapped)[_HEADER.size:]) != checksum:
+                raise ValueError(f"Somme de contrôle invalide, fichier corrompu : {filename}")
+
+            offset = _HEADER.size
+            metadata = json.loads(bytes(mapped[offset:offset + metadata_size]).decode('utf-8'))
+            offset += metadata_size
+            offset += _padding(offset)
+
+            store = CampStore()
+            for column, itemsize in ((store.latitudes, 8), (store.longitudes, 8), (store.populations, 8),
+                                     (store.radars, 1), (store.icon_types, 1)):
+                length = count * itemsize
+                column.frombytes(mapped[offset:offset + length])
+                if sys.byteorder != "little":
+                    column.byteswap()
+                offset += length + _padding(length)
+
+            names_blob = mapped[offset:].decode('utf-8')
+
+    store.names = list(map(sys.intern, names_blob.split(_NAME_SEPARATOR))) if count else []
+    if len(store.names) != count:
+        raise ValueError(f"Nombre de noms incohérent dans {filename}")
+    store.alive = bytearray(b"\x01" * count)
+    store.raw_populations = {int(row): value for row, value in metadata["raw_populations"].items()}
+    _remap_codes(store.radars, metadata["radar_types"], RADAR_TYPES, "radar")
+    _remap_codes(store.icon_types, metadata["icon_types"], ICON_TYPES, "icône")
+    return store, journal_seq
+
+
+def _remap_codes(column: array, stored: list, current: list, label: str) -> None:
+    """Traduire les codes d'énumération si la configuration a changé depuis l'écriture du fichier"""
+    if stored == current:
+        return
+    unknown = set(stored) - set(current)
+    if unknown:
+        raise ValueError(f"Types de {label} inconnus dans le fichier binaire : {sorted(unknown)}")
+    translation = bytes(current.index(value) for value in stored).ljust(256, b"\x00")
+    column[:] = array('B', column.tobytes().translate(translation))
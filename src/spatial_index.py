@@ -0,0 +1,173 @@
+# src/spatial_index.py
+"""
+Index spatial en grille pour les camps de réfugiés
+Permet les requêtes par rectangle géographique, par rayon et des plus proches voisins
+sans parcourir l'ensemble des camps
+"""
+
+import heapq
+import math
+from typing import Dict, Iterator, List, Sequence, Set, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distance orthodromique en kilomètres entre deux points"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_bbox(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """Rectangle (sud, ouest, nord, est) contenant le cercle de rayon radius_km (west > east : traverse l'antiméridien)"""
+    lat_span = radius_km / KM_PER_DEGREE
+    south, north = max(-90.0, lat - lat_span), min(90.0, lat + lat_span)
+
+    max_cos = min(math.cos(math.radians(south)), math.cos(math.radians(north)))
+    if south <= -90.0 or north >= 90.0 or max_cos * 180 * KM_PER_DEGREE <= radius_km:
+        return south, -180.0, north, 180.0
+    lon_span = lat_span / max_cos
+    west, east = lon - lon_span, lon + lon_span
+    if west < -180.0:
+        west += 360.0
+    if east > 180.0:
+        east -= 360.0
+    return south, west, north, east
+
+
+class SpatialIndex:
+    """Grille de cellules de taille fixe (en degrés) associant chaque cellule aux clés qu'elle contient
+    
+    Les coordonnées ne sont pas dupliquées : la clé d'un point est son index
+    dans les colonnes latitudes/longitudes fournies à la construction.
+    """
+
+    def __init__(self, latitudes: Sequence[float], longitudes: Sequence[float], cell_size: float = 1.0):
+        if cell_size <= 0:
+            raise ValueError("La taille de cellule doit être positive")
+        self.cell_size = cell_size
+        self._lat = latitudes
+        self._lon = longitudes
+        self._cells: Dict[Tuple[int, int], Set[int]] = {}
+        self._count = 0
+        self._n_cols = math.ceil(360 / cell_size)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        """Cellule contenant un point"""
+        return (math.floor(lat / self.cell_size), math.floor(lon / self.cell_size))
+
+    def _point(self, key: int) -> Tuple[float, float]:
+        return self._lat[key], self._lon[key]
+
+    def insert(self, key: int) -> None:
+        """Indexer le point d'une clé à sa position actuelle dans les colonnes"""
+        bucket = self._cells.setdefault(self._cell(*self._point(key)), set())
+        if key not in bucket:
+            bucket.add(key)
+            self._count += 1
+
+    def remove(self, key: int, lat: float = None, lon: float = None) -> None:
+        """Retirer un point ; lat/lon donnent l'ancienne position si les colonnes ont déjà été modifiées"""
+        if lat is None or lon is None:
+            lat, lon = self._point(key)
+        cell = self._cell(lat, lon)
+        bucket = self._cells.get(cell)
+        if bucket is None or key not in bucket:
+            return
+        bucket.discard(key)
+        self._count -= 1
+        if not bucket:
+            del self._cells[cell]
+
+    def _cells_in_range(self, row_min: int, row_max: int,
+                        col_min: int, col_max: int) -> Iterator[Tuple[int, int]]:
+        """Cellules occupées dans une plage de lignes/colonnes"""
+        span = (row_max - row_min + 1) * (col_max - col_min + 1)
+        if span > len(self._cells):
+            # Plage plus grande que la grille occupée : parcourir les cellules occupées
+            for cell in self._cells:
+                if row_min <= cell[0] <= row_max and col_min <= cell[1] <= col_max:
+                    yield cell
+        else:
+            for row in range(row_min, row_max + 1):
+                for col in range(col_min, col_max + 1):
+                    if (row, col) in self._cells:
+                        yield (row, col)
+
+    def query_bbox(self, south: float, west: float, north: float, east: float) -> List[int]:
+        """Clés des points contenus dans un rectangle (west > east : traverse l'antiméridien)"""
+        if west > east:
+            return sorted(set(self.query_bbox(south, west, north, 180.0)) |
+                          set(self.query_bbox(south, -180.0, north, east)))
+
+        (row_min, col_min), (row_max, col_max) = self._cell(south, west), self._cell(north, east)
+        keys = []
+        for cell in self._cells_in_range(row_min, row_max, col_min, col_max):
+            for key in self._cells[cell]:
+                lat, lon = self._lat[key], self._lon[key]
+                if south <= lat <= north and west <= lon <= east:
+                    keys.append(key)
+        keys.sort()
+        return keys
+
+    def query_radius(self, lat: float, lon: float, radius_km: float) -> List[Tuple[float, int]]:
+        """Couples (distance, clé) des points situés à moins de radius_km, triés par distance"""
+        results = []
+        for key in self.query_bbox(*radius_bbox(lat, lon, radius_km)):
+            distance = haversine_km(lat, lon, *self._point(key))
+            if distance <= radius_km:
+                results.append((distance, key))
+        results.sort()
+        return results
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> List[Tuple[float, int]]:
+        """Couples (distance, clé) des k points les plus proches, triés par distance"""
+        if k <= 0 or not self._count:
+            return []
+
+        center_row, center_col = self._cell(lat, lon)
+        best: List[Tuple[float, int]] = []  # tas max via distances négatives
+        seen_cells = 0
+        ring = 0
+
+        while True:
+            ring_cells = 1 if ring == 0 else 8 * ring
+            if ring_cells > len(self._cells) - seen_cells or 2 * ring + 1 > self._n_cols:
+                # L'anneau dépasse le nombre de cellules restantes : recherche exhaustive
+                candidates = ((haversine_km(lat, lon, *self._point(key)), key)
+                              for bucket in self._cells.values() for key in bucket)
+                return heapq.nsmallest(k, candidates)
+
+            for row in range(center_row - ring, center_row + ring + 1):
+                on_edge = row in (center_row - ring, center_row + ring)
+                cols = range(center_col - ring, center_col + ring + 1) if on_edge else (center_col - ring, center_col + ring)
+                for col in cols:
+                    # Les colonnes bouclent autour de l'antiméridien
+                    wrapped = (row, (col + self._n_cols // 2) % self._n_cols - self._n_cols // 2)
+                    bucket = self._cells.get(wrapped)
+                    if not bucket:
+                        continue
+                    seen_cells += 1
+                    for key in bucket:
+                        entry = (-haversine_km(lat, lon, *self._point(key)), -key)
+                        if len(best) < k:
+                            heapq.heappush(best, entry)
+                        elif entry > best[0]:
+                            heapq.heapreplace(best, entry)
+
+            # Distance minimale à toute cellule hors des anneaux parcourus
+            span = ring * self.cell_size
+            bound_lat = min(90.0, abs(lat) + (ring + 1) * self.cell_size)
+            lon_bound_km = 2 * EARTH_RADIUS_KM * math.asin(
+                math.cos(math.radians(bound_lat)) * math.sin(math.radians(min(span, 180.0)) / 2))
+            bound_km = min(span * KM_PER_DEGREE, lon_bound_km)
+            if len(best) == k and -best[0][0] <= bound_km:
+                return sorted((-distance, -key) for distance, key in best)
+            ring += 1
@@ -0,0 +1,357 @@
+# src/storage.py
+"""
+Moteurs de stockage des camps
+Par défaut, CampManager garde tous les camps en mémoire et les sauvegarde dans
+un fichier (JSON ou binaire, avec son journal). Avec un moteur de stockage, les
+camps restent dans une base : chaque modification y est écrite tout de suite,
+dans une transaction, et les requêtes (nom, type, rectangle...) sont exécutées
+par la base. Le moteur est choisi d'après l'extension du fichier de données.
+"""
+
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from array import array
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from .config import *
+from .camp_store import CampStore, ICON_TYPES, POPULATION_RAW
+
+# Colonnes lues pour reconstruire un CampStore (dans l'ordre de CampStore.extend)
+_COLUMNS = "name, latitude, longitude, population, population_raw, radar, icon_type"
+
+# Population donnée comme entier : texte de l'entier dans population_raw (colonne TEXT)
+_POPULATION_INT = -3
+
+_SCHEMA_VERSION = 1
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS camps (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,  -- Ordre d'ajout
+    name TEXT NOT NULL UNIQUE,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    population INTEGER NOT NULL,           -- Codes de CampStore (-1 : N/A, -2 : texte libre), -3 : entier
+    population_raw TEXT,
+    radar TEXT NOT NULL,
+    icon_type TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS camps_icon_type ON camps (icon_type);
+CREATE INDEX IF NOT EXISTS camps_radar ON camps (radar);
+"""
+
+# Index spatial R-tree tenu à jour par des déclencheurs (index simple si le module manque)
+_RTREE_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS camps_rtree USING rtree (id, min_lat, max_lat, min_lon, max_lon);
+CREATE TRIGGER IF NOT EXISTS camps_rtree_insert AFTER INSERT ON camps BEGIN
+    INSERT INTO camps_rtree VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+END;
+CREATE TRIGGER IF NOT EXISTS camps_rtree_update AFTER UPDATE OF latitude, longitude ON camps BEGIN
+    UPDATE camps_rtree SET min_lat = new.latitude, max_lat = new.latitude,
+                           min_lon = new.longitude, max_lon = new.longitude WHERE id = new.id;
+END;
+CREATE TRIGGER IF NOT EXISTS camps_rtree_delete AFTER DELETE ON camps BEGIN
+    DELETE FROM camps_rtree WHERE id = old.id;
+END;
+"""
+_COORDINATES_INDEX = "CREATE INDEX IF NOT EXISTS camps_coordinates ON camps (latitude, longitude);"
+
+# Noms passés par requête aux recherches par lot (limite des paramètres des anciens SQLite : 999)
+_NAMES_PER_QUERY = 500
+
+
+class CampBackend(ABC):
+    """Interface d'un moteur de stockage
+
+    Les camps sont échangés sous forme de lignes de CampStore (déjà validées) ;
+    les requêtes retournent un CampStore contenant les lignes trouvées, dans
+    l'ordre d'ajout. Les écritures faites hors de transaction() forment chacune
+    leur propre transaction.
+    """
+
+    name = None
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+
+    @abstractmethod
+    def transaction(self):
+        """Contexte regroupant des écritures en une transaction (tout ou rien, imbricable)"""
+
+    @abstractmethod
+    def changed(self) -> bool:
+        """La base a-t-elle été modifiée par une autre connexion depuis le dernier appel"""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Nombre de camps"""
+
+    @abstractmethod
+    def read_all(self) -> CampStore:
+        """Tous les camps, dans l'ordre d'ajout"""
+
+    @abstractmethod
+    def get(self, name: str) -> Optional[CampStore]:
+        """Camp d'un nom donné (CampStore d'une ligne), None s'il n'existe pas"""
+
+    @abstractmethod
+    def get_many(self, names: Iterable[str]) -> CampStore:
+        """Camps existants parmi des noms"""
+
+    @abstractmethod
+    def query_field(self, field: str, value: str) -> CampStore:
+        """Camps dont le champ (radar ou icon_type) vaut value"""
+
+    @abstractmethod
+    def query_bbox(self, south: float, west: float, north: float, east: float) -> CampStore:
+        """Camps situés dans un rectangle (west > east : traverse l'antiméridien)"""
+
+    @abstractmethod
+    def insert(self, store: CampStore, rows: Iterable[int]) -> None:
+        """Ajouter des lignes d'un stockage (ValueError si un nom existe déjà)"""
+
+    @abstractmethod
+    def update(self, name: str, store: CampStore, row: int) -> None:
+        """Remplacer le camp name par une ligne d'un stockage (renommage compris)"""
+
+    @abstractmethod
+    def update_many(self, store: CampStore, changes: Iterable[Tuple[str, int]]) -> None:
+        """Remplacer plusieurs camps (couples nom, ligne du stockage) ; KeyError si l'un manque"""
+
+    @abstractmethod
+    def delete(self, name: str) -> bool:
+        """Supprimer un camp, False s'il n'existe pas"""
+
+    @abstractmethod
+    def delete_many(self, names: Iterable[str]) -> int:
+        """Supprimer plusieurs camps, retourner le nombre de camps supprimés"""
+
+    @abstractmethod
+    def replace_all(self, store: CampStore) -> None:
+        """Remplacer tout le contenu de la base par les lignes vivantes d'un stockage"""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Fermer la connexion à la base"""
+
+
+class SqliteCampBackend(CampBackend):
+    """Base SQLite en mode WAL
+
+    Les lecteurs ne bloquent pas l'écrivain et inversement ; chaque transaction
+    prend le verrou d'écriture dès son début (BEGIN IMMEDIATE), si bien qu'une
+    lecture suivie d'une écriture dans la même transaction ne peut pas écraser
+    la modification d'un autre processus. Un écrivain qui trouve la base
+    verrouillée attend jusqu'à SQLITE_CONFIG["busy_timeout"] secondes.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, create: bool = False):
+        super().__init__(path)
+        if not create and not os.path.exists(self.path):
+            raise FileNotFoundError(path)
+
+        # Connexion partagée entre threads (service des camps), les appels étant sérialisés par l'appelant
+        self._connection = sqlite3.connect(self.path, timeout=SQLITE_CONFIG["busy_timeout"],
+                                           isolation_level=None, check_same_thread=False)
+        self._depth = 0
+        self._data_version = None
+        try:
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute(f"PRAGMA synchronous = {SQLITE_CONFIG['synchronous']}")
+            self._create_schema()
+            self.rtree = self._connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'camps_rtree'").fetchone() is not None
+        except Exception:
+            self._connection.close()
+            raise
+
+    def _create_schema(self) -> None:
+        """Créer les tables et index absents (une seule fois si plusieurs processus ouvrent la base)"""
+        with self.transaction():
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            if version > _SCHEMA_VERSION:
+                raise ValueError(f"Base {self.path} créée par une version plus récente (schéma {version})")
+            for statement in _split_statements(_SCHEMA):
+                self._connection.execute(statement)
+            try:
+                with self.transaction():
+                    for statement in _split_statements(_RTREE_SCHEMA):
+                        self._connection.execute(statement)
+            except sqlite3.OperationalError:
+                # SQLite compilé sans R-tree : index classique sur les coordonnées
+                self._connection.execute(_COORDINATES_INDEX)
+            self._connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        if self._depth:
+            # Transaction imbriquée : point de sauvegarde, annulable seul
+            savepoint = f"camps_{self._depth}"
+            self._connection.execute(f"SAVEPOINT {savepoint}")
+            self._depth += 1
+            try:
+                yield
+            except BaseException:
+                self._connection.execute(f"ROLLBACK TO {savepoint}")
+                self._connection.execute(f"RELEASE {savepoint}")
+                raise
+            else:
+                self._connection.execute(f"RELEASE {savepoint}")
+            finally:
+                self._depth -= 1
+            return
+
+        self._connection.execute("BEGIN IMMEDIATE")
+        self._depth = 1
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        else:
+            self._connection.execute("COMMIT")
+        finally:
+            self._depth = 0
+
+    def changed(self) -> bool:
+        # data_version ne change qu'après les validations des autres connexions
+        version = self._connection.execute("PRAGMA data_version").fetchone()[0]
+        changed = version != self._data_version
+        self._data_version = version
+        return changed
+
+    def count(self) -> int:
+        return self._connection.execute("SELECT count(*) FROM camps").fetchone()[0]
+
+    def _select(self, where: str = "", parameters: tuple = ()) -> CampStore:
+        """Lire des camps dans un nouveau CampStore, dans l'ordre d'ajout"""
+        rows = self._connection.execute(
+            f"SELECT {_COLUMNS} FROM camps {where} ORDER BY id", parameters).fetchall()
+        store = CampStore()
+        if rows:
+            names, latitudes, longitudes, populations, raw_populations, radars, icon_types = zip(*rows)
+            store.extend(list(names), latitudes, longitudes, ("N/A",) * len(rows), radars, icon_types)
+            # Colonne population recopiée sans repasser par parse_population
+            store.populations = array('q', (POPULATION_RAW if value == _POPULATION_INT else value
+                                            for value in populations))
+            store.raw_populations = {row: int(raw) if value == _POPULATION_INT else raw
+                                     for row, (value, raw) in enumerate(zip(populations, raw_populations))
+                                     if raw is not None}
+        return store
+
+    def read_all(self) -> CampStore:
+        return self._select()
+
+    def get(self, name: str) -> Optional[CampStore]:
+        store = self._select("WHERE name = ?", (name,))
+        return store if len(store) else None
+
+    def get_many(self, names: Iterable[str]) -> CampStore:
+        names = list(dict.fromkeys(names))
+        store = CampStore()
+        for chunk in _chunks(names, _NAMES_PER_QUERY):
+            store.append_store(self._select(f"WHERE name IN ({', '.join('?' * len(chunk))})", tuple(chunk)))
+        return store
+
+    def query_field(self, field: str, value: str) -> CampStore:
+        if field not in ("radar", "icon_type"):
+            raise ValueError(f"Champ non indexé : {field}")
+        return self._select(f"WHERE {field} = ?", (value,))
+
+    def query_bbox(self, south: float, west: float, north: float, east: float) -> CampStore:
+        ranges = [(west, 180.0), (-180.0, east)] if west > east else [(west, east)]
+        conditions, parameters = [], []
+        for low, high in ranges:
+            if self.rtree:
+                # Le R-tree stocke des bornes en simple précision arrondies vers l'extérieur :
+                # il présélectionne les candidats, la comparaison exacte se fait sur la table
+                conditions.append("id IN (SELECT id FROM camps_rtree WHERE max_lat >= ? AND min_lat <= ? "
+                                  "AND max_lon >= ? AND min_lon <= ?) "
+                                  "AND latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?")
+                parameters += [south, north, low, high] * 2
+            else:
+                conditions.append("latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?")
+                parameters += [south, north, low, high]
+        return self._select("WHERE " + " OR ".join(f"({condition})" for condition in conditions),
+                            tuple(parameters))
+
+    def insert(self, store: CampStore, rows: Iterable[int]) -> None:
+        try:
+            with self.transaction():
+                self._connection.executemany(
+                    "INSERT INTO camps (name, latitude, longitude, population, population_raw, radar, icon_type) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", (_encode_row(store, row) for row in rows))
+        except sqlite3.IntegrityError as e:
+            raise ValueError(f"Nom de camp déjà présent dans {self.path} ({e})") from None
+
+    def update(self, name: str, store: CampStore, row: int) -> None:
+        try:
+            cursor = self._connection.execute(
+                "UPDATE camps SET name = ?, latitude = ?, longitude = ?, population = ?, population_raw = ?, "
+                "radar = ?, icon_type = ? WHERE name = ?", _encode_row(store, row) + (name,))
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Le camp '{store.names[row]}' existe déjà") from None
+        if cursor.rowcount == 0:
+            raise KeyError(name)
+
+    def update_many(self, store: CampStore, changes: Iterable[Tuple[str, int]]) -> None:
+        with self.transaction():
+            for name, row in changes:
+                self.update(name, store, row)
+
+    def delete(self, name: str) -> bool:
+        return self._connection.execute("DELETE FROM camps WHERE name = ?", (name,)).rowcount > 0
+
+    def delete_many(self, names: Iterable[str]) -> int:
+        with self.transaction():
+            cursor = self._connection.executemany("DELETE FROM camps WHERE name = ?", ((name,) for name in names))
+            return cursor.rowcount
+
+    def replace_all(self, store: CampStore) -> None:
+        with self.transaction():
+            self._connection.execute("DELETE FROM camps")
+            self.insert(store, (row for row in range(len(store)) if store.alive[row]))
+
+    def close(self) -> None:
+        try:
+            self._connection.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
+        self._connection.close()
+
+
+def _split_statements(script: str) -> Iterator[str]:
+    """Instructions d'un script SQL (executescript validerait la transaction en cours)"""
+    statement = ""
+    for line in script.strip().splitlines():
+        statement += line + "\n"
+        if sqlite3.complete_statement(statement):
+            yield statement
+            statement = ""
+
+
+def _chunks(values: List, size: int) -> Iterator[List]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _encode_row(store: CampStore, row: int) -> tuple:
+    """Valeurs d'une ligne de stockage pour la table camps"""
+    value, raw = store.populations[row], store.raw_populations.get(row)
+    if isinstance(raw, int):
+        value, raw = _POPULATION_INT, str(raw)
+    return (store.names[row], store.latitudes[row], store.longitudes[row], value,
+            raw, RADAR_TYPES[store.radars[row]], ICON_TYPES[store.icon_types[row]])
+
+
+# Moteurs disponibles, par extension du fichier de données
+STORAGE_BACKENDS: Dict[str, type] = {
+    ".sqlite": SqliteCampBackend,
+    ".db": SqliteCampBackend
+}
+
+
+def backend_for(filename: str) -> Optional[type]:
+    """Moteur de stockage d'un fichier de données (None : fichier JSON ou binaire chargé en mémoire)"""
+    return STORAGE_BACKENDS.get(os.path.splitext(filename)[1].lower())
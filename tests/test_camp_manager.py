@@ -0,0 +1,80 @@
+# tests/test_camp_manager.py
+"""
+Tests du gestionnaire des camps
+"""
+
+import pytest
+from src.camp_manager import CampManager
+
+
+def make_manager() -> CampManager:
+    """Gestionnaire en mémoire avec deux camps"""
+    manager = CampManager(quiet=True)
+    manager.add_camp("A", 33.5, 36.3, "12 000", "VH", "blue")
+    manager.add_camp("C", 34.0, 36.0)
+    return manager
+
+
+def test_update_camp_renames_and_reindexes():
+    manager = make_manager()
+    assert manager.update_camp("A", name="B", population="15 000")
+    assert manager.get_camp_by_name("A") is None
+    assert manager.get_camp_by_name("B").population == "15 000"
+    assert [camp.name for camp in manager.camps_in_bbox(33, 36, 34, 37)] == ["B", "C"]
+
+
+def test_update_camp_invalid_rename_leaves_camp_untouched():
+    manager = make_manager()
+    manager.camps_in_bbox(33, 36, 34, 37)  # Construire l'index spatial avant la modification
+    assert not manager.update_camp("A", name="B", latitude=34.5, radar="XX")
+
+    camp = manager.get_camp_by_name("A")
+    assert camp is not None
+    assert (camp.name, camp.latitude, camp.radar) == ("A", 33.5, "VH")
+    assert manager.get_camp_by_name("B") is None
+    assert [camp.name for camp in manager.camps_in_bbox(33, 36, 34, 37)] == ["A", "C"]
+
+    # Le nom B est resté libre : un seul camp B après l'ajout
+    assert manager.add_camp("B", 35.0, 37.0)
+    assert [camp.name for camp in manager.camps].count("B") == 1
+    assert manager.get_camps_count() == 3
+
+
+def test_update_camps_invalid_batch_leaves_camps_untouched():
+    manager = make_manager()
+    errors = []
+    assert not manager.update_camps({"A": {"name": "B"}, "C": {"icon_type": "purple"}}, save=False, errors=errors)
+    assert [error["name"] for error in errors] == ["C"]
+    assert [camp.name for camp in manager.camps] == ["A", "C"]
+
+
+@pytest.mark.parametrize("extension", [".json", ".hcrs", ".sqlite"])
+def test_population_type_survives_save_and_load(tmp_path, extension):
+    manager = make_manager()
+    manager.add_camp("D", 35.0, 37.0, 50000)
+    manager.add_camp("E", 35.5, 37.5, "environ 3 000")
+    filename = str(tmp_path / f"camps{extension}")
+    assert manager.save(filename)
+    manager.close()
+
+    loaded = CampManager(quiet=True)
+    assert loaded.load(filename)
+    assert [camp.population for camp in loaded.camps] == ["12 000", "N/A", 50000, "environ 3 000"]
+    loaded.close()
+
+
+def test_camp_read_from_database_is_read_only(tmp_path):
+    filename = str(tmp_path / "camps.sqlite")
+    assert make_manager().save(filename)
+    manager = CampManager(quiet=True)
+    assert manager.load(filename)
+
+    camp = manager.get_camp_by_name("A")
+    with pytest.raises(AttributeError):
+        camp.population = "99 999"
+    with pytest.raises(AttributeError):
+        manager.camps_in_bbox(33, 36, 34, 37)[0].name = "B"
+
+    assert manager.update_camp("A", population="99 999")
+    assert manager.get_camp_by_name("A").population == "99 999"
+    manager.close()
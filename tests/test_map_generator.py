@@ -0,0 +1,24 @@
+# tests/test_map_generator.py
+"""
+Tests du générateur de carte
+"""
+
+from src.camp_manager import CampManager
+from src.config import REGION_SHARDS
+from src.map_generator import MapGenerator
+
+
+def test_region_shards_place_each_camp_once():
+    manager = CampManager(quiet=True)
+    # Camps sur les bords communs de REGION_SHARDS, et un camp hors de toute région
+    for region in REGION_SHARDS.values():
+        south, west, north, east = region["bbox"]
+        for latitude in (south, north):
+            for longitude in (west, east):
+                if not manager._exists(f"{latitude}/{longitude}"):
+                    manager.add_camp(f"{latitude}/{longitude}", latitude, longitude)
+    manager.add_camp("Ailleurs", -80.0, -170.0)
+
+    shards = MapGenerator(manager)._region_shards(REGION_SHARDS)
+    names = [camp.name for _, _, _, camps in shards for camp in camps]
+    assert sorted(names) == sorted(camp.name for camp in manager.camps)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# watch_inbox.py
+"""
+Script pour importer automatiquement les fichiers de camps déposés dans un dossier
+"""
+
+import argparse
+import asyncio
+import signal
+import sys
+from src.camp_manager import CampManager
+from src.camp_service import CampClient
+from src.inbox_watcher import InboxWatcher
+from src.map_generator import MapGenerator
+from src.config import *
+
+def stop(signum, frame):
+    """Arrêt demandé par le système (SIGTERM) : même traitement que Ctrl+C"""
+    raise KeyboardInterrupt
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(
+        description='Importer les fichiers CSV/JSON déposés dans le dossier d\'arrivée et régénérer la carte',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""
+Exemples:
+  # Surveiller {INBOX_DIR} (Ctrl+C pour arrêter)
+  python watch_inbox.py
+  
+  # Traiter les fichiers déjà déposés, régénérer la carte une fois, puis s'arrêter
+  python watch_inbox.py --once
+  
+  # Autre dossier, import seul (carte générée plus tard par main.py)
+  python watch_inbox.py --inbox /srv/partenaires --no-map
+        """
+    )
+    
+    parser.add_argument('--inbox', help=f'Dossier surveillé (défaut : {INBOX_DIR})')
+    parser.add_argument('--once', action='store_true', help='Traiter les fichiers présents puis s\'arrêter')
+    parser.add_argument('--no-map', action='store_true', help='Ne pas régénérer la carte')
+    
+    args = parser.parse_args()
+    
+    client = CampClient.connect()
+    if client is not None:
+        client.close()
+        print("❌ Le service des camps utilise le fichier de données : l'arrêter avant la surveillance")
+        return 1
+    
+    manager = CampManager(quiet=True)
+    manager.load()
+    generator = None if args.no_map else MapGenerator(manager)
+    watcher = InboxWatcher(manager, args.inbox, None if generator is None else generator.generate_map)
+    
+    try:
+        signal.signal(signal.SIGTERM, stop)
+        if not args.once:
+            print(f"👀 Surveillance de {watcher.inbox_dir} (Ctrl+C pour arrêter)")
+        asyncio.run(watcher.run(once=args.once))
+        return 0
+    except KeyboardInterrupt:
+        print("\n⚠️ Surveillance arrêtée")
+        return 0
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+        return 1
+    finally:
+        # Les camps importés depuis la dernière génération doivent figurer sur la carte
+        watcher.finish()
+        manager.close()
+        stats = watcher.stats
+        print(f"📊 {stats['batches']} lot(s), {stats['processed_files']} fichier(s) traité(s), "
+              f"{stats['failed_files']} en échec, {stats['camps_added']} camps ajoutés, "
+              f"{stats['regenerations']} génération(s) de la carte")
+
+if __name__ == "__main__":
+    sys.exit(main())